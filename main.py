@@ -1,57 +1,61 @@
 import sys
+import time
+
+# 啟動計時起點（盡量接近進入點，本模組不匯入第三方套件）
+from src.startup_trace import startup, profile_output
+
+if __name__ == "__main__":
+    # 特權代理程式（由 UI 以 UAC / pkexec 啟動），只承載防火牆後端
+    if "--broker" in sys.argv[1:]:
+        from src.controller.broker import main as broker_main
+        sys.exit(broker_main(sys.argv[1:]))
+    # 命令列模式（--block / --unblock / --status）不載入 PySide6，直接執行後結束
+    from src.cli import is_cli_invocation
+    if is_cli_invocation(sys.argv[1:]):
+        from src.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    # 已有執行中的執行個體時只叫出它的視窗，不再重新啟動（也不會觸發 UAC）
+    from src.ipc import send_command
+    with startup.phase("single-instance check"):
+        forwarded = send_command("show") is not None
+    if forwarded:
+        sys.exit(0)
+
+_imports_started = time.perf_counter()
+
 import os
-import ctypes
-import configparser
 
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtCore import QTimer, QObject
 from PySide6.QtGui import QIcon
 
 from loguru import logger
-from src.controller import FirewallController, RuleCreationError, RuleDeletionError
-from src.ui import WarframeMainUI, SettingsUI, TrayManager
-from src.utils import HotkeyManager
-
-# 設定基本路徑
-def get_base_dir():
-    # 如果是 PyInstaller 打包後的執行環境
-    if getattr(sys, 'frozen', False):
-        return os.path.dirname(sys.executable)
-    # 開發環境下使用檔案位置
-    return os.path.dirname(os.path.abspath(__file__))
-
-def get_resource_path(relative_path):
-    if getattr(sys, 'frozen', False):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(get_base_dir(), relative_path)
-
-def get_app_data_dir():
-    """取得應用程式資料目錄 (AppData/Roaming)"""
-    app_data = os.path.join(os.getenv('APPDATA'), "WarframePairBlockTool")
-    # 確保目錄存在
-    if not os.path.exists(app_data):
-        os.makedirs(app_data)
-    return app_data
-
-BASE_DIR = get_base_dir()
-APP_DATA_DIR = get_app_data_dir()
-CONFIG_PATH = os.path.join(APP_DATA_DIR, "WarframePairBlockTool.ini")
-LOG_PATH = os.path.join(APP_DATA_DIR, "WarframePairBlockTool.log")
-ICON_PATH = get_resource_path("assets/logo.ico")
-BLOCKED_ICON_PATH = get_resource_path("assets/logo_blocked.ico")
-
-def is_admin():
-    """檢查是否有管理員權限"""
-    try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except:
-        return False
-
-def restart_as_admin():
-    """用管理員權限重新啟動"""
-    ctypes.windll.shell32.ShellExecuteW(
-        None, "runas", sys.executable, __file__, None, 1
-    )
+from src.config import (
+    APP_DATA_DIR,
+    CONFIG_PATH,
+    LOG_PATH,
+    ICON_PATH,
+    BLOCKED_ICON_PATH,
+    get_resource_path
+)
+from src.bindings import ACTIONS, BindingTable
+from src.config_store import ConfigStore
+from src.settings import Settings, SettingsError
+from src.latency import latency
+from src.controller import FirewallController, FirewallError, PortSet, RuleTarget
+from src.controller.broker import BrokerBackend, needs_broker
+from src.utils import HotkeyManager, RuleStateMonitor, FirewallWorker, ToggleCoalescer, IpcServer, FirstPaintProbe
+
+startup.record("imports", _imports_started)
+
+# 切換狀態（BLOCKING / UNBLOCKING 為操作進行中）
+STATE_NORMAL = "STATE_NORMAL"
+STATE_BLOCKED = "STATE_BLOCKED"
+STATE_BLOCKING = "STATE_BLOCKING"
+STATE_UNBLOCKING = "STATE_UNBLOCKING"
+# 啟動時尚未確認實際規則狀態
+STATE_CHECKING = "STATE_CHECKING"
+PENDING_STATES = (STATE_BLOCKING, STATE_UNBLOCKING)
 
 class AppController:
     def __init__(self):
@@ -60,153 +64,261 @@ class AppController:
         
         # 基本元件初始化
         self.firewall = FirewallController()
-        self.config = configparser.ConfigParser()
+        self.firewall_worker = FirewallWorker()
+        # 連續切換合併器：快捷鍵連按時只執行最後的目標
+        self.toggle_coalescer = ToggleCoalescer()
+        self.toggle_coalescer.dispatch.connect(self._apply_target)
+        self.toggle_coalescer.settled.connect(self._on_toggle_settled)
+        # 實際狀態確認前的切換先排入，確認後再以實際狀態換算
+        self.toggle_coalescer.hold()
+        self._initial_state = None
+        self._toggle_source = "ui"
+        self._active_target = None
+        # 快捷鍵延遲追蹤：等待合併器送出的 / 工作執行緒執行中的操作
+        self._pending_trace = None
+        self._active_trace = None
+        # IPC 指定的阻斷秒數，優先於自動恢復設定（只套用在下一次阻斷）
+        self._recover_override = None
+        # 設定在啟動時解析一次成型別化的 Settings，之後只讀取屬性；
+        # 變更的欄位由背景執行緒延遲寫入設定檔（切換路徑上不做磁碟 I/O）
+        self.config = ConfigStore(CONFIG_PATH)
+        self.settings = Settings()
         self.auto_recover_timer = QTimer()
         self.auto_recover_timer.setSingleShot(True)
         self.auto_recover_timer.timeout.connect(self._on_recover_timeout)
         
-        # 設定標誌
-        self.notifications_enabled = True
-        self.hotkey = None
+        # 快捷鍵綁定（由 settings 的 hotkey_<動作> 欄位建立）
+        self.bindings = BindingTable()
         self.settings_window = None
         
         # 快捷鍵處理
         self.hotkey_handler = HotkeyManager()
         self.hotkey_handler.toggle_signal.connect(self._safe_toggle_firewall)
+        self.hotkey_handler.action_triggered.connect(self._on_hotkey_action)
+        self.hotkey_handler.bindings_applied.connect(self._on_bindings_applied)
         
         # 初始化主視窗
-        self.window = WarframeMainUI(
-            toggle_callback=self.toggle_firewall,
-            auto_recover_callback=self.on_auto_recover_changed,
-            open_firewall_callback=self.open_firewall_ui,
-            open_settings_callback=self.open_settings,
-            state_labels={
-                "STATE_BLOCKED": "配對已阻斷",
-                "STATE_NORMAL": "配對正常"
-            },
-            resolve_path=get_resource_path
-        )
+        # 主視窗與 Tray 的模組在建立時才載入，匯入成本計入各自的啟動階段
+        with startup.phase("main window"):
+            from src.ui.main import WarframeMainUI
+            self.window = WarframeMainUI(
+                toggle_callback=self.toggle_firewall,
+                auto_recover_callback=self.on_auto_recover_changed,
+                open_firewall_callback=self.open_firewall_ui,
+                open_settings_callback=self.open_settings,
+                udp_changed_callback=self.on_udp_changed,
+                state_labels={
+                    STATE_BLOCKED: "配對已阻斷",
+                    STATE_NORMAL: "配對正常",
+                    STATE_BLOCKING: "阻斷中…",
+                    STATE_UNBLOCKING: "恢復中…",
+                    STATE_CHECKING: "檢查中…"
+                },
+                resolve_path=get_resource_path
+            )
         
         # 設定窗口關閉事件
         self.window.closeEvent = self._on_window_close
         
         # 初始化系統Tray，並與主介面關聯
-        self.tray = TrayManager(resolve_path=get_resource_path)
-        
-        # 連接Tray訊號
-        self.tray.show_window_signal.connect(self.window.show)
-        self.tray.toggle_firewall_signal.connect(self.toggle_firewall)
-        self.tray.open_firewall_signal.connect(self.open_firewall_ui)
-        self.tray.open_settings_signal.connect(self.open_settings)
-        self.tray.quit_app_signal.connect(self.quit_app)
-        
-        # 設定Tray並關聯到主介面
-        self.tray.setup(parent_window=self.window)
+        with startup.phase("tray setup"):
+            from src.ui.tray import TrayManager
+            self.tray = TrayManager(resolve_path=get_resource_path)
+
+            # 連接Tray訊號
+            self.tray.show_window_signal.connect(self.window.show)
+            self.tray.toggle_firewall_signal.connect(self.toggle_firewall)
+            self.tray.open_firewall_signal.connect(self.open_firewall_ui)
+            self.tray.open_settings_signal.connect(self.open_settings)
+            self.tray.show_latency_signal.connect(self.show_latency_stats)
+            self.tray.quit_app_signal.connect(self.quit_app)
+
+            # 設定Tray並關聯到主介面
+            self.tray.setup(parent_window=self.window)
         
         # 載入設定 (Tray初始化完成後再載入)
-        self._load_config()
-        
-        # 初始化UI狀態
+        with startup.phase("load config"):
+            self._load_config()
+
+        # 初始化UI狀態；防火牆後端的啟動與目前規則狀態在背景確認，視窗先以「檢查中」顯示
         self._init_ui_state()
-        
-        # 根據目前狀態更新Tray圖示
-        self._update_tray_status()
+        self._set_state(STATE_CHECKING)
+
+        # 背景檢查規則是否被外部修改（例如在 wf.msc 中刪除），在初始狀態確認後才開始
+        self.rule_monitor = RuleStateMonitor(self.firewall, worker=self.firewall_worker)
+        self.rule_monitor.status_changed.connect(self._on_external_rule_change)
+
+        with startup.phase("submit initial state check"):
+            self._resolve_initial_state()
+
+        # 單一執行個體：之後的啟動（含命令列模式）與外部工具透過 IPC 轉送命令
+        with startup.phase("ipc listen"):
+            self.ipc_server = IpcServer(self._on_ipc_command)
+            self.ipc_server.listen()
 
     def _load_config(self):
         """載入設定檔，若不存在則建立預設設定"""
         try:
-            # 如果設定檔不存在，建立一份
-            if not os.path.exists(CONFIG_PATH):
+            if not self.config.load():
                 logger.warning("找不到設定檔，將建立預設設定檔")
-                self.config["Settings"] = {
-                    "udp_index": "0",
-                    "auto_recover": "true",
-                    "recover_time": "20",
-                    "notifications": "true",
-                    "hotkey": ""
-                }
-                with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                    self.config.write(f)
-                logger.info("已建立預設設定檔")
-
-            # 載入設定檔
-            self.config.read(CONFIG_PATH)
-
-            if "Settings" not in self.config:
-                self.config["Settings"] = {
-                    "udp_index": "0",
-                    "auto_recover": "true",
-                    "recover_time": "20",
-                    "notifications": "true",
-                    "hotkey": ""
-                }
-
-            # 讀取通知設定
-            s = self.config["Settings"]
-            if "notifications" in s:
-                self.notifications_enabled = s.getboolean("notifications")
+            # 解析一次；經過版本轉換、補上欄位或修正不合法的值時寫回設定檔（由背景執行緒寫入）
+            self.settings, changed = Settings.from_strings(self.config.values())
+            if changed:
+                self.config.replace(self.settings.to_strings())
+            s = self.settings
+
+            # 讀取防火牆後端設定（auto / com / netsh / nft / fake）
+            # UI 以一般權限執行，需要特權的後端改由代理程式承載（第一次操作時才啟動，之後常駐供重新開啟的 UI 沿用）
+            backend = s.firewall_backend
+            with startup.phase("elevation check"):
+                use_broker = needs_broker(backend)
+            if use_broker:
+                logger.info(f"以一般權限執行，防火牆操作改由代理程式執行 (後端: {backend})")
+                backend = BrokerBackend(remote=backend)
+            self.firewall.set_backend(backend)
 
             # 讀取並設定快捷鍵
-            if "hotkey" in s:
-                self.hotkey = s.get("hotkey")
-                if self.hotkey:
-                    self._register_hotkey()
+            # 快捷鍵後端：auto（Windows 使用 RegisterHotKey，其他系統使用 keyboard）/ win32 / keyboard / fake
+            self.hotkey_handler.set_backend(s.hotkey_backend)
+            self.bindings = s.binding_table()
+            if len(self.bindings):
+                with startup.phase("hotkey registration"):
+                    self.hotkey_handler.set_bindings(self.bindings)
 
             logger.info("設定檔載入完成")
 
         except Exception as e:
             logger.error(f"載入設定檔時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
             self._show_error(f"載入設定時發生錯誤: {e}\n已使用預設設定。")
-            # 確保有預設設定
-            self.config["Settings"] = {
-                "udp_index": "0",
-                "auto_recover": "true",
-                "recover_time": "20",
-                "notifications": "true",
-                "hotkey": ""
-            }
-
-    def _save_config(self):
-        """儲存設定檔"""
-        try:
-            with open(CONFIG_PATH, "w") as f:
-                self.config.write(f)
-            logger.info("設定已保存")
-        except Exception as e:
-            logger.error(f"保存設定檔時發生錯誤: {e}")
-            self._show_error(f"無法保存設定: {e}")
+            # 本次以預設設定執行，但不覆寫設定檔，之後只寫回實際修改的欄位
+            self.settings = Settings()
+        # 之後的每個欄位變更都寫回設定檔
+        self.settings.subscribe(self._on_setting_changed)
+
+    def _on_setting_changed(self, name, old, new):
+        """設定欄位變更：更新記憶體中的設定檔內容，由背景執行緒合併寫入"""
+        logger.debug(f"設定變更: {name} = {new!r}")
+        self.config.update({name: self.settings.format(name)})
 
     def _init_ui_state(self):
         """初始化UI狀態"""
-        s = self.config["Settings"]
-        self.window.set_selected_udp_index(int(s.get("udp_index", 0)))
-        self.window.set_auto_recover_enabled(s.get("auto_recover", "true") == "true")
-        self.window.set_auto_recover_time(int(s.get("recover_time", 20)))
-
-        status = self.firewall.get_rule_status()
-        if status == self.firewall.STATUS_BLOCKED:
-            self.window.set_toggle_state("STATE_BLOCKED")
+        s = self.settings
+        self.window.set_selected_udp_index(s.udp_index)
+        # 自訂的埠設定（可包含多組範圍）優先於下拉選單索引
+        if s.udp_ports:
+            self.window.set_selected_udp_ports(s.udp_ports)
+        self.window.set_auto_recover_enabled(s.auto_recover)
+        self.window.set_auto_recover_time(s.recover_time)
+
+    def _resolve_initial_state(self):
+        """在防火牆工作執行緒上啟動後端並確認目前阻斷狀態，完成後由 _on_initial_state 更新 UI"""
+        try:
+            ports = self._selected_ports()
+        except ValueError as e:
+            logger.warning(f"埠設定格式錯誤，暫不預建規則: {e}")
+            ports = None
+        self._initial_state = self.firewall_worker.submit(
+            "initial state", self._probe_initial_state, ports,
+            on_success=self._on_initial_state,
+            on_error=self._on_initial_state_failed
+        )
+
+    def _probe_initial_state(self, ports):
+        """（工作執行緒）預建（停用的）規則並檢查是否與設定相符，同時取得目前阻斷狀態"""
+        self.firewall.start()
+        try:
+            if ports is not None and self.firewall.backend.is_ready():
+                return self.firewall.stage_rule(ports)
+            # 代理程式尚未啟動：不為了預建規則而在啟動時要求 UAC，
+            # 只在有登錄快速路徑時讀取目前狀態，規則留到第一次阻斷時建立
+            status = self.firewall.get_rule_status() if self.firewall.registry else self.firewall.cached_status()
+        except FirewallError as e:
+            logger.error(f"預先建立防火牆規則失敗: {e}")
+            status = self.firewall.cached_status()
+        return status == self.firewall.STATUS_BLOCKED
+
+    def _on_initial_state(self, blocked):
+        """初始狀態確認（UI 線程）：套用排入的切換，並開始背景檢查"""
+        startup.mark("initial state resolved")
+        logger.info(f"目前配對狀態: {'阻斷' if blocked else '正常'}")
+        if self.toggle_coalescer.release(blocked):
+            # 排入的切換已交給合併器處理（互相抵銷時已直接回到實際狀態）
+            if self.toggle_coalescer.in_flight:
+                self._set_state(STATE_BLOCKING if self.toggle_coalescer.target() else STATE_UNBLOCKING)
         else:
-            self.window.set_toggle_state("STATE_NORMAL")
+            self._set_state(STATE_BLOCKED if blocked else STATE_NORMAL)
+        self.rule_monitor.start()
+
+    def _on_initial_state_failed(self, error):
+        logger.error(f"確認初始規則狀態失敗: {error}")
+        self._on_initial_state(self.firewall.cached_status() == self.firewall.STATUS_BLOCKED)
+
+    def _selected_ports(self):
+        """取得目前選擇的埠集合（PortSet），格式錯誤時拋出 ValueError"""
+        return PortSet.parse(self.window.get_selected_udp_ports())
+
+    def on_udp_changed(self, index):
+        """UDP 埠選擇變更時，重新預建對應的停用規則"""
+        try:
+            logger.debug(f"UDP 埠選擇變更為: {index}")
+            # 阻斷中不動規則，下次阻斷時會自動重新預建
+            if self.window.current_state != STATE_NORMAL:
+                return
+            ports = self._selected_ports()
+            # 代理程式尚未啟動時不為預建而觸發 UAC
+            if not self.firewall.backend.is_ready():
+                return
+            self.firewall_worker.submit(
+                "stage", self.firewall.apply_target, RuleTarget(ports, False),
+                on_error=lambda e: logger.error(f"重新預建防火牆規則失敗: {e}")
+            )
+        except ValueError as e:
+            logger.warning(f"埠設定格式錯誤，暫不預建規則: {e}")
+        except Exception as e:
+            logger.error(f"處理 UDP 埠變更時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
 
     def _update_tray_status(self):
         """更新系統Tray狀態圖示和文字"""
         try:
-            is_blocked = (self.window.current_state == "STATE_BLOCKED")
+            # 操作進行中時樂觀顯示目標狀態，啟動確認中時顯示為未知
+            state = self.window.current_state
+            is_blocked = None if state == STATE_CHECKING else state in (STATE_BLOCKED, STATE_BLOCKING)
             logger.debug(f"更新Tray狀態: {'阻斷中' if is_blocked else '正常'}")
-            self.tray.update_status(is_blocked)
+            self.tray.update_status(is_blocked, pending=state in PENDING_STATES)
             logger.debug(f"Tray狀態更新完成")
         except Exception as e:
             logger.error(f"更新Tray狀態時發生錯誤: {e}")
             logger.exception("詳細錯誤")
 
+    def _on_external_rule_change(self, status):
+        """背景檢查偵測到規則被外部修改時，同步 UI 與 Tray"""
+        try:
+            # 有操作進行中時以操作結果為準
+            if self.toggle_coalescer.is_busy() or self.window.current_state in PENDING_STATES:
+                return
+            state = STATE_BLOCKED if status == self.firewall.STATUS_BLOCKED else STATE_NORMAL
+            self.toggle_coalescer.reset(state == STATE_BLOCKED)
+            if state == self.window.current_state:
+                return
+            logger.warning(f"防火牆規則被外部變更，同步狀態為: {state}")
+            self.window.set_toggle_state(state)
+            if state == STATE_NORMAL and self.auto_recover_timer.isActive():
+                logger.debug("取消自動恢復計時器")
+                self.auto_recover_timer.stop()
+            self._update_tray_status()
+        except Exception as e:
+            logger.error(f"同步外部規則變更時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+
     def _on_window_close(self, event):
         """窗口關閉事件處理"""
         event.ignore()
         self.window.hide()
         
         # 窗口最小化時顯示通知
-        if self.notifications_enabled:
+        if self.settings.notifications:
             self.tray.show_message(
                 title="Warframe 配對阻斷器",
                 msg="程式已縮小到右下角系統列，點擊圖示可再次開啟",
@@ -214,11 +326,26 @@ class AppController:
                 timeout=5000
             )
 
-    def run(self):
-        """啟動應用程式"""
-        self.window.show()
+    def run(self, profile_path=None):
+        """啟動應用程式；profile_path 不為 None 時於第一次繪製後輸出啟動時間 JSON"""
+        self._profile_path = profile_path
+        self._first_paint = FirstPaintProbe(self.window)
+        self._first_paint.painted.connect(self._on_first_paint)
+        with startup.phase("window.show()"):
+            self.window.show()
         logger.info("應用程式已啟動")
 
+    def _on_first_paint(self):
+        """主視窗第一次繪製：啟動完成，記錄各階段耗時"""
+        startup.finish()
+        logger.info(startup.summary())
+        if self._profile_path:
+            try:
+                path = startup.dump_json(self._profile_path)
+                logger.info(f"啟動時間分析已輸出: {path}")
+            except OSError as e:
+                logger.error(f"輸出啟動時間分析失敗: {e}")
+
     def toggle_firewall(self, from_hotkey=False):
         """
         切換防火牆狀態
@@ -240,148 +367,252 @@ class AppController:
             logger.exception("詳細錯誤")
     
     def _safe_toggle_firewall(self, from_hotkey=False):
-        """防火牆切換的實際操作函數"""
+        """
+        防火牆切換：只翻轉期望狀態並樂觀更新按鈕與Tray，
+        短時間內的連續切換由合併器收斂成單一操作後才交給防火牆工作執行緒
+        """
         try:
-            state = self.window.current_state
-            port_text = self.window.get_selected_udp_ports().replace(" ", "")
-            port_start, port_end = port_text.split("&")
+            logger.debug(f"切換防火牆前狀態: {self.window.current_state}")
 
-            # 記錄切換前的狀態
-            prev_state = state
-            logger.debug(f"切換防火牆前狀態: {prev_state}")
-            
             # 檢查是否由快捷鍵觸發
             if from_hotkey:
-                logger.debug(f"由快捷鍵觸發防火牆切換，將顯示通知: {self.notifications_enabled}")
+                logger.debug(f"由快捷鍵觸發防火牆切換，將顯示通知: {self.settings.notifications}")
             else:
                 logger.debug("由UI觸發防火牆切換，不會顯示通知")
 
-            if state == "STATE_BLOCKED":
-                try:
-                    logger.info(f"解除阻斷 UDP 埠 {port_start}-{port_end}")
-                    self.firewall.delete_rule()
-                    self.window.set_toggle_state("STATE_NORMAL")
-                    if self.auto_recover_timer.isActive():
-                        logger.debug("取消自動恢復計時器")
-                        self.auto_recover_timer.stop()
-                    
-                    # 快捷鍵觸發時顯示
-                    if from_hotkey and self.notifications_enabled:
-                        logger.debug("發送解除阻斷的通知")
-                        self.tray.show_message(
-                            title="配對已恢復",
-                            msg="已解除對 Warframe 配對的阻斷",
-                            icon=QIcon(ICON_PATH),
-                            timeout=5000
-                        )
-                except RuleDeletionError as e:
-                    logger.error(f"移除防火牆規則失敗: {e}")
-                    self._show_error(f"無法移除防火牆規則: {e}")
-                    return
-                except Exception as e:
-                    logger.error(f"解除阻斷時發生未知錯誤: {e}")
-                    self._show_error(f"發生未知錯誤: {e}")
-                    return
-            else:
-                try:
-                    logger.info(f"阻斷 UDP 埠 {port_start}-{port_end}")
-                    self.firewall.create_rule(port_start, port_end)
-                    self.firewall.enable_rule()
-                    self.window.set_toggle_state("STATE_BLOCKED")
-                    
-                    # 快捷鍵觸發時顯示
-                    if from_hotkey and self.notifications_enabled:
-                        logger.debug("發送阻斷的通知")
-                        self.tray.show_message(
-                            title="配對已阻斷",
-                            msg=f"已阻斷 UDP 埠 {port_start}-{port_end}",
-                            icon=QIcon(BLOCKED_ICON_PATH),
-                            timeout=5000
-                        )
-                    
-                    if self.window.is_auto_recover_enabled():
-                        seconds = max(self.window.get_auto_recover_time(), 1)
-                        self.auto_recover_timer.start(seconds * 1000)
-                        logger.info(f"已設定 {seconds} 秒後自動恢復")
-                except RuleCreationError as e:
-                    logger.error(f"建立防火牆規則失敗: {e}")
-                    self._show_error(f"無法建立防火牆規則: {e}")
-                    return
-                except Exception as e:
-                    logger.error(f"阻斷配對時發生未知錯誤: {e}")
-                    self._show_error(f"發生未知錯誤: {e}")
-                    return
-
-            # 記錄切換後的狀態
-            current_state = self.window.current_state
-            logger.debug(f"切換防火牆後狀態: {current_state}")
-            
-            # 確保狀態有變更時才更新Tray
-            if prev_state != current_state:
-                logger.debug("狀態已變更，更新Tray圖示")
-                # 更新Tray圖示狀態
-                self._update_tray_status()
-            else:
-                logger.debug("狀態未變更，強制更新Tray圖示")
-                # 強制更新Tray圖示
-                self._update_tray_status()
-
-            # 保存設定
-            s = self.config["Settings"]
-            s["udp_index"] = str(self.window.combo.currentIndex())
-            s["auto_recover"] = str(self.window.is_auto_recover_enabled()).lower()
-            s["recover_time"] = str(self.window.get_auto_recover_time())
-            self._save_config()
-            
-            logger.debug("防火牆狀態切換完成")
+            source = "hotkey" if from_hotkey else "ui"
+            target = self.toggle_coalescer.target()
+            if target is None:
+                # 實際狀態尚在確認：切換先排入，確認後以實際狀態為準
+                self._toggle_source = source
+                self.toggle_coalescer.toggle()
+                logger.info("初始狀態確認中，切換請求已排入")
+                return
+            self._request_state(not target, source)
         except Exception as e:
             logger.error(f"_safe_toggle_firewall方法發生錯誤: {e}")
             logger.exception("詳細錯誤")
             self._show_error(f"切換防火牆狀態時發生錯誤: {e}")
 
+    def _request_state(self, blocked, source):
+        """指定期望狀態並樂觀更新顯示，實際操作由合併器決定何時執行"""
+        self._toggle_source = source
+        self.toggle_coalescer.request(blocked)
+        if not blocked:
+            self._recover_override = None
+            if self.auto_recover_timer.isActive():
+                logger.debug("取消自動恢復計時器")
+                self.auto_recover_timer.stop()
+        self._set_state(STATE_BLOCKING if blocked else STATE_UNBLOCKING)
+
+    def _on_ipc_command(self, command, args):
+        """處理其他啟動或外部工具透過 IPC 送來的命令（UI 線程），回傳回應"""
+        if command == "show":
+            self.window.show()
+            self.window.raise_()
+            self.window.activateWindow()
+            return {"ok": True}
+        if command == "toggle":
+            self._safe_toggle_firewall(from_hotkey=True)
+        elif command == "block":
+            ports = args.get("ports")
+            if ports:
+                try:
+                    PortSet.parse(ports)
+                except ValueError as e:
+                    return {"ok": False, "message": f"埠設定格式錯誤: {e}"}
+                self.window.set_selected_udp_ports(ports)
+            self._recover_override = args.get("for")
+            self._request_state(True, "hotkey")
+        elif command == "unblock":
+            self._request_state(False, "hotkey")
+        return self._ipc_status()
+
+    def _ipc_status(self):
+        status = {
+            STATE_BLOCKED: "blocked",
+            STATE_NORMAL: "normal",
+            STATE_BLOCKING: "blocking",
+            STATE_UNBLOCKING: "unblocking",
+            STATE_CHECKING: "checking"
+        }.get(self.window.current_state, "unknown")
+        return {"ok": True, "status": status, "ports": self.window.get_selected_udp_ports()}
+
+    def _set_state(self, state, trace=None):
+        """更新主視窗與Tray狀態；trace 為該次快捷鍵操作的延遲追蹤（最後兩個階段）"""
+        self.window.set_toggle_state(state)
+        if trace is not None:
+            trace.mark("window")
+        self._update_tray_status()
+        if trace is not None:
+            trace.mark("tray")
+            trace.finish()
+
+    def _hold_trace(self, trace):
+        """快捷鍵操作交給合併器，取代尚未送出的追蹤（被合併的請求不記入統計）"""
+        if self._pending_trace is not None:
+            self._pending_trace.discard("合併")
+        self._pending_trace = trace
+
+    def _take_trace(self, attr, reason=None):
+        """取出等待中 / 執行中的追蹤；指定 reason 時直接捨棄"""
+        trace = getattr(self, attr)
+        setattr(self, attr, None)
+        if trace is not None and reason is not None:
+            trace.discard(reason)
+            return None
+        return trace
+
+    def _apply_target(self, blocked, collapsed):
+        """合併器決定最終目標後，交給防火牆工作執行緒執行（非同步）"""
+        try:
+            logger.debug(f"套用防火牆目標: {'阻斷' if blocked else '解除阻斷'} (合併 {collapsed} 次請求)")
+            target = self._target_for(blocked)
+            self._active_target = target
+            trace = self._take_trace("_pending_trace")
+            apply = self.firewall.apply_target
+            if trace is not None:
+                trace.mark("coalesce")
+                apply = trace.timed("queue", "backend", apply)
+            self._take_trace("_active_trace", "取代")
+            self._active_trace = trace
+            if blocked:
+                logger.info(f"阻斷 UDP 埠 {target.ports}")
+                error_message = "無法建立防火牆規則"
+            else:
+                logger.info(f"解除阻斷 UDP 埠 {target.ports}")
+                error_message = "無法移除防火牆規則"
+            self.firewall_worker.submit(
+                "apply", apply, target,
+                on_success=self._on_operation_done,
+                on_error=lambda e: self._on_operation_failed(f"{error_message}: {e}")
+            )
+
+            # 每次實際操作只更新記憶體中的設定，由背景執行緒合併寫入
+            self._remember_ui_settings()
+        except ValueError as e:
+            logger.warning(f"埠設定格式錯誤: {e}")
+            self._on_operation_failed(f"埠設定格式錯誤: {e}\n範例：4950-4955, 4960 & 4965, 3074")
+        except Exception as e:
+            logger.error(f"套用防火牆目標時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+            self._on_operation_failed(f"切換防火牆狀態時發生錯誤: {e}")
+
+    def _remember_ui_settings(self):
+        """把主視窗目前的埠與自動恢復設定記入設定"""
+        try:
+            self.settings.update(
+                udp_index=self.window.combo.currentIndex(),
+                udp_ports=self.window.get_selected_udp_ports(),
+                auto_recover=self.window.is_auto_recover_enabled(),
+                recover_time=self.window.get_auto_recover_time(),
+            )
+        except SettingsError as e:
+            logger.warning(f"無法記錄主視窗設定: {e}")
+
+    def _target_for(self, blocked):
+        """
+        依目前 UI 設定建立規則目標。
+        解除阻斷時沿用現有規則的埠範圍，只需一次停用操作；
+        埠選擇的變更會在下次阻斷時才重新預建。
+        """
+        if not blocked:
+            rule = self.firewall.cached_rule()
+            if rule is not None:
+                return RuleTarget(rule["ports"], False)
+            return RuleTarget(self._selected_ports(), False)
+        ports = self._selected_ports()
+        until = None
+        override, self._recover_override = self._recover_override, None
+        if override is not None:
+            # IPC 指定的秒數，0 表示不自動解除
+            if override > 0:
+                until = time.monotonic() + override
+        elif self.window.is_auto_recover_enabled():
+            until = time.monotonic() + max(self.window.get_auto_recover_time(), 1)
+        return RuleTarget(ports, True, until)
+
+    def _on_operation_done(self, blocked):
+        """防火牆操作完成（UI 線程）；期間有新的請求時維持進行中狀態"""
+        trace = self._take_trace("_active_trace")
+        if trace is not None:
+            trace.mark("completion")
+        if self.toggle_coalescer.mark_done(blocked):
+            logger.debug("操作完成但已有新的目標，繼續處理")
+            if trace is not None:
+                trace.discard("被新目標取代")
+            self._set_state(STATE_BLOCKING if self.toggle_coalescer.target() else STATE_UNBLOCKING)
+            return
+        self._settle(blocked, notify=True, trace=trace)
+
+    def _on_operation_failed(self, message):
+        """操作失敗：回復為實際的規則狀態並顯示錯誤（UI 線程）"""
+        blocked = self.firewall.cached_status() == self.firewall.STATUS_BLOCKED
+        self._take_trace("_active_trace", "失敗")
+        if not self.toggle_coalescer.mark_done(blocked):
+            logger.warning(f"防火牆操作失敗，回復狀態為: {'阻斷' if blocked else '正常'}")
+            self._settle(blocked, notify=False)
+        self._show_error(message)
+
+    def _on_toggle_settled(self, blocked):
+        """連續切換互相抵銷，直接回到實際狀態"""
+        self._take_trace("_pending_trace", "抵銷")
+        self._settle(blocked, notify=False)
+
+    def _settle(self, blocked, notify=True, trace=None):
+        """顯示最終狀態、發送通知並處理自動恢復計時器"""
+        self._set_state(STATE_BLOCKED if blocked else STATE_NORMAL, trace)
+        logger.debug(f"切換防火牆後狀態: {self.window.current_state}")
+        source = self._toggle_source
+
+        if blocked:
+            # 快捷鍵觸發時顯示
+            if notify and source == "hotkey" and self.settings.notifications:
+                logger.debug("發送阻斷的通知")
+                self.tray.show_message(
+                    title="配對已阻斷",
+                    msg=f"已阻斷 UDP 埠 {self._active_target.ports}",
+                    icon=QIcon(BLOCKED_ICON_PATH),
+                    timeout=5000
+                )
+            # 自動恢復時間以目標的到期時間為準（扣除操作本身花費的時間）
+            target = self._active_target
+            remaining = target.remaining() if target is not None else None
+            if remaining is not None and not self.auto_recover_timer.isActive():
+                self.auto_recover_timer.start(int(remaining * 1000))
+                logger.info(f"已設定 {remaining:.1f} 秒後自動恢復")
+            return
+
+        if self.auto_recover_timer.isActive():
+            logger.debug("取消自動恢復計時器")
+            self.auto_recover_timer.stop()
+        if not notify or not self.settings.notifications:
+            return
+        if source == "hotkey":
+            logger.debug("發送解除阻斷的通知")
+            self.tray.show_message(
+                title="配對已恢復",
+                msg="已解除對 Warframe 配對的阻斷",
+                icon=QIcon(ICON_PATH),
+                timeout=5000
+            )
+        elif source == "recover":
+            self.tray.show_message(
+                title="Warframe 配對已恢復",
+                msg="UDP 配對封鎖已自動解除，已恢復為正常連線狀態。",
+                icon=QIcon(ICON_PATH),
+                timeout=5000
+            )
+
     def _on_recover_timeout(self):
         """自動恢復計時器超時處理"""
         try:
             logger.debug("自動恢復計時器觸發")
-            if self.window.current_state == "STATE_BLOCKED":
-                try:
-                    logger.info("自動恢復防火牆規則")
-                    # 記錄切換前的狀態
-                    prev_state = self.window.current_state
-                    
-                    # 執行防火牆規則刪除
-                    self.firewall.delete_rule()
-                    self.window.set_toggle_state("STATE_NORMAL")
-                    
-                    # 記錄切換後的狀態
-                    current_state = self.window.current_state
-                    logger.debug(f"自動恢復切換後狀態: {current_state}")
-                    
-                    # 確保無論如何都更新Tray圖示
-                    logger.debug("自動恢復：更新Tray圖示")
-                    # 更新Tray圖示狀態
-                    self._update_tray_status()
-                    
-                    # 自動恢復時顯示通知
-                    if self.notifications_enabled:
-                        self.tray.show_message(
-                            title="Warframe 配對已恢復",
-                            msg="UDP 配對封鎖已自動解除，已恢復為正常連線狀態。",
-                            icon=QIcon(ICON_PATH),
-                            timeout=5000
-                        )
-                    
-                    # 額外檢查Tray圖示是否正常更新
-                    is_blocked = (self.window.current_state == "STATE_BLOCKED")
-                    logger.debug(f"自動恢復後再次檢查狀態: {'阻斷中' if is_blocked else '正常'}")
-                    
-                except RuleDeletionError as e:
-                    logger.error(f"自動恢復時刪除規則失敗: {e}")
-                    self._show_error(f"自動恢復失敗: {e}\n請手動檢查防火牆")
-                except Exception as e:
-                    logger.error(f"自動恢復時發生未知錯誤: {e}")
-                    logger.exception("詳細錯誤")
-                    self._show_error(f"自動恢復時發生錯誤: {e}")
+            if self.window.current_state == STATE_BLOCKED:
+                logger.info("自動恢復防火牆規則")
+                self._toggle_source = "recover"
+                self.toggle_coalescer.request(False)
+                self._set_state(STATE_UNBLOCKING)
         except Exception as e:
             logger.error(f"處理自動恢復計時器時發生錯誤: {e}")
             logger.exception("詳細錯誤")
@@ -400,30 +631,34 @@ class AppController:
     def open_firewall_ui(self):
         """開啟防火牆UI"""
         self.firewall.open_firewall_ui()
+        # 使用者可能在 wf.msc 中修改規則，讓下一次檢查提早執行
+        self.rule_monitor.refresh_now()
 
     def open_settings(self):
         """開啟設定視窗"""
         try:
             logger.debug("開啟設定視窗")
+            block_for = self.settings.block_for_time
             if not self.settings_window:
                 logger.debug("初始化設定視窗")
+                # 設定視窗第一次開啟時才載入；捕獲快捷鍵沿用快捷鍵管理器的掛鉤執行緒
+                from src.ui.settings import SettingsUI
                 self.settings_window = SettingsUI(
                     notify_callback=self.toggle_notifications,
-                    hotkey_callback=self.set_hotkey,
-                    clear_config_callback=self.clear_config
+                    bindings_callback=self.set_bindings,
+                    block_for_callback=self.set_block_for_time,
+                    clear_config_callback=self.clear_config,
+                    bindings=self.bindings,
+                    block_for=block_for,
+                    hotkey_manager=self.hotkey_handler
                 )
                 # 設定初始狀態
-                self.settings_window.notify_checkbox.setChecked(self.notifications_enabled)
-                if self.hotkey:
-                    formatted_hotkey = HotkeyManager.format_hotkey_display(self.hotkey)
-                    self.settings_window.hotkey_display.setText(f"目前設定：{formatted_hotkey}")
+                self.settings_window.notify_checkbox.setChecked(self.settings.notifications)
             else:
                 # 更新設定視窗狀態以確保它反映最新的設定
                 logger.debug("更新現有設定視窗狀態")
-                self.settings_window.notify_checkbox.setChecked(self.notifications_enabled)
-                if self.hotkey:
-                    formatted_hotkey = HotkeyManager.format_hotkey_display(self.hotkey)
-                    self.settings_window.hotkey_display.setText(f"目前設定：{formatted_hotkey}")
+                self.settings_window.notify_checkbox.setChecked(self.settings.notifications)
+                self.settings_window.set_bindings(self.bindings, block_for)
         
             self.settings_window.show()
             self.settings_window.activateWindow()
@@ -435,101 +670,112 @@ class AppController:
 
     def toggle_notifications(self, enabled):
         """切換通知設定"""
-        self.notifications_enabled = enabled
-        s = self.config["Settings"]
-        s["notifications"] = str(enabled).lower()
-        self._save_config()
+        self.settings.notifications = enabled
         logger.info(f"通知設定已更改為: {enabled}")
 
-    def set_hotkey(self, hotkey):
-        """設定快捷鍵"""
+    def set_bindings(self, bindings):
+        """設定快捷鍵綁定（設定視窗已處理衝突），保存並重新套用"""
         try:
-            # 先取消之前的快捷鍵
-            self._unregister_hotkey()
-            
-            # 設定新的快捷鍵
-            self.hotkey = hotkey
-            self.config["Settings"]["hotkey"] = hotkey
-            self._save_config()
-            
-            # 註冊新快捷鍵
-            if hotkey:
-                self._register_hotkey()
-            
-            formatted_hotkey = HotkeyManager.format_hotkey_display(hotkey) if hotkey else "無"
-            logger.info(f"快捷鍵已更新: {formatted_hotkey}")
+            self.bindings = bindings.copy()
+            self.settings.set_bindings(self.bindings)
+            self.hotkey_handler.set_bindings(self.bindings)
+            summary = ", ".join(
+                f"{ACTIONS[action]}={HotkeyManager.format_hotkey_display(chord)}" for action, chord in self.bindings
+            ) or "無"
+            logger.info(f"快捷鍵已更新: {summary}")
         except Exception as e:
             logger.error(f"設定快捷鍵時發生錯誤: {e}")
             logger.exception("詳細錯誤")
             self._show_error(f"設定快捷鍵失敗: {e}")
 
-    def _register_hotkey(self):
-        """註冊全局快捷鍵"""
-        try:
-            if not self.hotkey:
-                logger.debug("沒有配置快捷鍵，跳過註冊")
-                return
-                
-            def hotkey_callback():
-                # 使用訊號在不同線程間安全通信，標記為來自快捷鍵
-                logger.debug("快捷鍵觸發，發送訊號並標記為快捷鍵來源")
-                self.hotkey_handler.emit_toggle(True)
-                
-            result = self.hotkey_handler.register_hotkey(self.hotkey, hotkey_callback)
-            if result:
-                # 顯示格式化的快捷鍵
-                formatted_hotkey = HotkeyManager.format_hotkey_display(self.hotkey)
-                logger.debug(f"已註冊快捷鍵: {formatted_hotkey}")
-                
-                # 註冊快捷鍵時直接顯示通知 (確保Tray已存在)
-                if hasattr(self, 'tray') and self.tray and self.notifications_enabled:
-                    try:
-                        self.tray.show_message(
-                            title="快捷鍵已啟用",
-                            msg=f"已設定 {formatted_hotkey} 為切換阻斷狀態的快捷鍵",
-                            icon=QIcon(ICON_PATH),
-                            timeout=3000
-                        )
-                    except Exception as e:
-                        logger.error(f"顯示快捷鍵註冊通知時發生錯誤: {e}")
-        except Exception as e:
-            logger.error(f"註冊快捷鍵時發生錯誤: {e}")
-            logger.exception("詳細錯誤")
+    def set_block_for_time(self, seconds):
+        """設定「阻斷 N 秒」快捷鍵的秒數"""
+        self.settings.block_for_time = seconds
+        logger.info(f"阻斷 N 秒快捷鍵的秒數已更改為: {seconds}")
+
+    def _on_bindings_applied(self, count, ok):
+        """快捷鍵掛鉤執行緒套用綁定完成（UI 線程）"""
+        if not ok:
+            self._show_error("無法啟用快捷鍵（鍵盤掛鉤安裝失敗）")
+            return
+        if not count:
+            logger.debug("已移除所有快捷鍵")
+            return
+        logger.debug(f"已啟用 {count} 組快捷鍵")
+        if self.tray and self.settings.notifications:
+            try:
+                toggle = self.bindings.chord_for("toggle")
+                if count == 1 and toggle:
+                    msg = f"已設定 {HotkeyManager.format_hotkey_display(toggle)} 為切換阻斷狀態的快捷鍵"
+                else:
+                    msg = f"已啟用 {count} 組快捷鍵，可在設定中查看"
+                self.tray.show_message(
+                    title="快捷鍵已啟用",
+                    msg=msg,
+                    icon=QIcon(ICON_PATH),
+                    timeout=3000
+                )
+            except Exception as e:
+                logger.error(f"顯示快捷鍵註冊通知時發生錯誤: {e}")
 
-    def _unregister_hotkey(self):
-        """取消註冊全局快捷鍵"""
+    def _on_hotkey_action(self, action, trace=None):
+        """快捷鍵觸發的動作（UI 線程）；防火牆相關的動作把延遲追蹤交給合併器"""
         try:
-            if self.hotkey:
-                logger.debug(f"取消註冊快捷鍵: {self.hotkey}")
-                self.hotkey_handler.unregister_hotkey()
+            logger.debug(f"快捷鍵動作: {action}")
+            if trace is not None:
+                trace.mark("signal")
+                if action in ("toggle", "block", "unblock", "block_for"):
+                    self._hold_trace(trace)
+                else:
+                    trace.discard("非防火牆動作")
+            if action == "toggle":
+                self._safe_toggle_firewall(from_hotkey=True)
+            elif action == "block":
+                self._request_state(True, "hotkey")
+            elif action == "unblock":
+                self._request_state(False, "hotkey")
+            elif action == "block_for":
+                self._recover_override = self.settings.block_for_time
+                self._request_state(True, "hotkey")
+            elif action == "cycle_ports":
+                self._cycle_ports()
+            elif action == "show_window":
+                self._on_ipc_command("show", {})
         except Exception as e:
-            logger.error(f"取消註冊快捷鍵時發生錯誤: {e}")
+            logger.error(f"處理快捷鍵動作 {action} 時發生錯誤: {e}")
             logger.exception("詳細錯誤")
 
+    def _cycle_ports(self):
+        """切換到下一組預設埠範圍（阻斷中時於下次阻斷生效）"""
+        combo = self.window.combo
+        index = (combo.currentIndex() + 1) % combo.count()
+        self.window.set_selected_udp_index(index)
+        self.on_udp_changed(index)
+        ports = self.window.get_selected_udp_ports()
+        self.settings.update(udp_index=index, udp_ports=ports)
+        logger.info(f"快捷鍵切換埠範圍為: {ports}")
+        if self.settings.notifications:
+            self.tray.show_message(
+                title="埠範圍已切換",
+                msg=f"UDP {ports}" + ("（下次阻斷時生效）" if self.window.current_state != STATE_NORMAL else ""),
+                icon=QIcon(ICON_PATH),
+                timeout=2000
+            )
+
     def clear_config(self):
         """清除所有設定"""
         try:
-            # 取消註冊快捷鍵
-            self._unregister_hotkey()
-            
-            # 重置設定
-            self.config["Settings"] = {
-                "udp_index": "0",
-                "auto_recover": "true", 
-                "recover_time": "20",
-                "notifications": "true",
-                "hotkey": ""
-            }
-            self._save_config()
+            # 重置設定（各欄位的變更會寫回設定檔）
+            self.settings.reset()
             
-            # 重新初始化UI
+            # 重新初始化UI並移除所有快捷鍵
             self._init_ui_state()
-            self.hotkey = ""
-            self.notifications_enabled = True
+            self.bindings = BindingTable()
+            self.hotkey_handler.clear_bindings()
             
             # 如果設定視窗是開啟的，也要更新它的狀態
             if self.settings_window and self.settings_window.isVisible():
-                self.settings_window.hotkey_display.setText("目前設定：無")
+                self.settings_window.set_bindings(self.bindings, self.settings.block_for_time)
                 self.settings_window.notify_checkbox.setChecked(True)
             
             logger.info("所有設定已清除")
@@ -543,18 +789,43 @@ class AppController:
         logger.error(msg)
         QMessageBox.warning(self.window, "錯誤", msg)
 
+    def _needs_restore_on_quit(self):
+        """結束前是否需要解除阻斷；初始狀態仍在確認時等待確認結果"""
+        if self.window.current_state != STATE_CHECKING:
+            return self.window.current_state != STATE_NORMAL
+        try:
+            return self._initial_state.result(timeout=10)
+        except Exception as e:
+            logger.error(f"結束前無法確認規則狀態: {e}")
+            return False
+
+    def show_latency_stats(self):
+        """把快捷鍵各階段的延遲統計寫入 log 並顯示（Tray選單）"""
+        lines = latency.summary_lines()
+        logger.info("\n".join(lines))
+        QMessageBox.information(self.window, "快捷鍵延遲統計", "\n".join(line.strip() for line in lines))
+
     def quit_app(self):
         """退出應用程式"""
         logger.info("應用程式關閉中")
-        # 確保取消註冊快捷鍵
-        self._unregister_hotkey()
-        # 恢復防火牆規則（如果被阻斷）
-        if self.window.current_state == "STATE_BLOCKED":
+        logger.info("\n".join(latency.summary_lines()))
+        # 移除快捷鍵並停止掛鉤執行緒
+        self.hotkey_handler.shutdown()
+        self.ipc_server.close()
+        self.rule_monitor.stop()
+        # 恢復防火牆規則（如果被阻斷或正在切換），等待已排入的操作完成
+        self.toggle_coalescer.cancel()
+        if self._needs_restore_on_quit():
             try:
-                self.firewall.delete_rule()
+                target = self._target_for(False)
+                self.firewall_worker.submit("apply", self.firewall.apply_target, target).result(timeout=10)
                 logger.info("程式關閉前已恢復防火牆規則")
             except Exception as e:
                 logger.error(f"程式關閉時恢復防火牆規則失敗: {e}")
+        self.firewall_worker.shutdown(wait=True)
+        self.firewall.close()
+        # 寫入尚未寫入的設定（沒有變更時不寫檔）
+        self.config.close()
 
         # 清理Tray圖示資源
         try:
@@ -609,20 +880,21 @@ def set_logger():
 
 if __name__ == "__main__":
     # 初始化 loguru
-    set_logger()
+    with startup.phase("set_logger"):
+        set_logger()
+    # --profile-startup[=路徑]：輸出詳細的啟動時間分析（預設寫到設定檔目錄）
+    profile_path = profile_output(sys.argv[1:], os.path.join(APP_DATA_DIR, "startup_profile.json"))
     try:
-        if not is_admin():
-            restart_as_admin()
-            sys.exit()
-
-        # 啟動應用程式
-        app = QApplication(sys.argv)
-        app.setApplicationDisplayName("Warframe 配對阻斷器")
-        app.setWindowIcon(QIcon(ICON_PATH))
+        # 啟動應用程式（一般權限；防火牆操作需要時才啟動特權代理程式）
+        with startup.phase("QApplication"):
+            app = QApplication(sys.argv)
+            app.setApplicationDisplayName("Warframe 配對阻斷器")
+            app.setWindowIcon(QIcon(ICON_PATH))
         logger.info("Warframe 配對阻斷器啟動")
         try:
-            controller = AppController()
-            controller.run()
+            with startup.phase("AppController.__init__"):
+                controller = AppController()
+            controller.run(profile_path)
             sys.exit(app.exec())
         except Exception as e:
             logger.exception(f"Controller 初始化或執行時發生嚴重錯誤")
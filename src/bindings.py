@@ -0,0 +1,146 @@
+"""
+快捷鍵綁定 - 不依賴 PySide6 的「組合鍵 → 動作」對照表
+
+所有綁定由同一個鍵盤掛鉤分派：掛鉤把目前按下的按鍵正規化成組合鍵字串，
+再以預先建立的 dict 查出對應動作（O(1)），不需要為每個綁定各註冊一個回呼。
+"""
+
+# 動作 → 顯示名稱（順序即設定視窗中的順序）
+ACTIONS = {
+    "toggle": "切換阻斷",
+    "block": "阻斷配對",
+    "unblock": "解除阻斷",
+    "block_for": "阻斷 N 秒",
+    "cycle_ports": "切換埠範圍",
+    "show_window": "顯示視窗",
+}
+
+# 設定檔中的欄位名稱（src.settings 的 hotkey_<動作> 欄位）
+SETTING_PREFIX = "hotkey_"
+
+# 修飾鍵的固定順序與別名（keyboard 會回報 left / right 等變體）
+MODIFIERS = ("ctrl", "alt", "shift", "win")
+_ALIASES = {
+    "control": "ctrl",
+    "windows": "win",
+    "cmd": "win",
+    "command": "win",
+    "super": "win",
+    "meta": "win",
+    "alt gr": "alt",
+    "option": "alt",
+    "return": "enter",
+    "escape": "esc",
+    "del": "delete",
+}
+
+
+class BindingConflictError(ValueError):
+    """組合鍵已綁定到其他動作"""
+
+    def __init__(self, chord, action, existing):
+        super().__init__(f"{format_chord(chord)} 已綁定到「{ACTIONS.get(existing, existing)}」")
+        self.chord = chord
+        self.action = action
+        self.existing = existing
+
+
+def normalize_key(name):
+    """正規化單一按鍵名稱（小寫、去除 left / right、套用別名）"""
+    key = name.strip().lower()
+    for side in ("left ", "right "):
+        if key.startswith(side):
+            key = key[len(side):]
+    return _ALIASES.get(key, key)
+
+
+def normalize_chord(text):
+    """
+    把組合鍵正規化成固定格式（修飾鍵依固定順序在前，其餘按鍵依字母排序），
+    例如 "Shift + Ctrl + B" → "ctrl+shift+b"；空字串回傳 ""。
+    """
+    if not text:
+        return ""
+    keys = {normalize_key(part) for part in text.split("+") if part.strip()}
+    return chord_from_keys(keys)
+
+
+def chord_from_keys(keys):
+    """由按下的按鍵集合組成正規化的組合鍵"""
+    modifiers = [key for key in MODIFIERS if key in keys]
+    others = sorted(key for key in keys if key not in MODIFIERS)
+    return "+".join(modifiers + others)
+
+
+def format_chord(chord):
+    """組合鍵的顯示格式，例如 "ctrl+shift+b" → "Ctrl + Shift + B\""""
+    if not chord:
+        return ""
+    parts = []
+    for part in chord.split("+"):
+        parts.append(part.upper() if len(part) == 1 else part.capitalize())
+    return " + ".join(parts)
+
+
+class BindingTable:
+    """
+    動作與組合鍵的雙向對照表。
+
+    - bindings：{動作: 組合鍵}
+    - lookup(chord)：由正規化的組合鍵查出動作（掛鉤執行緒使用，只讀取 dict）
+    - bind() 在組合鍵已被其他動作使用時拋出 BindingConflictError
+    """
+
+    def __init__(self, bindings=None):
+        self.bindings = {}
+        self._by_chord = {}
+        for action, chord in (bindings or {}).items():
+            self.bind(action, chord)
+
+    def __len__(self):
+        return len(self.bindings)
+
+    def __iter__(self):
+        return iter(self.bindings.items())
+
+    def __eq__(self, other):
+        return isinstance(other, BindingTable) and self.bindings == other.bindings
+
+    def copy(self):
+        return BindingTable(self.bindings)
+
+    def chord_for(self, action):
+        return self.bindings.get(action, "")
+
+    def lookup(self, chord):
+        return self._by_chord.get(chord)
+
+    def conflict(self, action, chord):
+        """組合鍵已綁定到其他動作時回傳該動作，否則回傳 None"""
+        existing = self._by_chord.get(normalize_chord(chord))
+        return existing if existing not in (None, action) else None
+
+    def bind(self, action, chord, replace=False):
+        """
+        綁定組合鍵（空字串表示取消綁定）。
+        replace=True 時先解除其他動作對同一組合鍵的綁定，否則衝突時拋出 BindingConflictError。
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"未知的動作: {action}")
+        chord = normalize_chord(chord)
+        if not chord:
+            self.unbind(action)
+            return
+        existing = self.conflict(action, chord)
+        if existing is not None:
+            if not replace:
+                raise BindingConflictError(chord, action, existing)
+            self.unbind(existing)
+        self.unbind(action)
+        self.bindings[action] = chord
+        self._by_chord[chord] = action
+
+    def unbind(self, action):
+        chord = self.bindings.pop(action, None)
+        if chord is not None:
+            self._by_chord.pop(chord, None)
@@ -0,0 +1,167 @@
+"""
+命令列模式 - 不載入 PySide6 與 keyboard，只使用防火牆層與設定讀取
+
+有執行中的 GUI 執行個體時，命令透過 IPC 轉送給它後立即結束；
+否則直接操作防火牆（--block 會自行等待自動恢復後再結束）；
+沒有系統管理員權限時透過特權代理程式操作。
+
+    main.py --block [--ports "4950-4955, 3074"] [--for 20]
+    main.py --unblock
+    main.py --status [--json]
+"""
+
+import argparse
+import json
+import signal
+import sys
+import time
+
+from loguru import logger
+
+from src.settings import load_settings
+from src.ipc import send_command
+
+CLI_FLAGS = ('--block', '--unblock', '--status')
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def is_cli_invocation(argv):
+    """命令列參數中是否包含命令列模式的動作"""
+    return any(arg in CLI_FLAGS for arg in argv)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="WarframePairBlockTool",
+        description="Warframe 配對阻斷器命令列模式"
+    )
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--block", action="store_true", help="阻斷配對埠")
+    action.add_argument("--unblock", action="store_true", help="解除阻斷")
+    action.add_argument("--status", action="store_true", help="顯示目前狀態")
+    parser.add_argument("--ports", help="要阻斷的埠（預設使用設定檔中的選擇），例如 \"4950-4955, 3074\"")
+    parser.add_argument(
+        "--for", dest="duration", type=float, metavar="N",
+        help="阻斷 N 秒後自動解除並結束（預設依設定檔的自動恢復設定，0 表示不自動解除）"
+    )
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    parser.add_argument("--verbose", action="store_true", help="在 stderr 輸出除錯訊息")
+    return parser
+
+
+def _report(args, ok, status, message, **extra):
+    if args.json:
+        print(json.dumps(dict(ok=ok, status=status, message=message, **extra), ensure_ascii=False))
+    else:
+        print(message)
+
+
+def _recover_after(firewall, seconds):
+    """等待指定秒數後解除阻斷；收到 Ctrl+C / SIGTERM 時提早解除"""
+    deadline = time.monotonic() + seconds
+    interrupted = []
+
+    def on_signal(signum, frame):
+        interrupted.append(signum)
+
+    previous = signal.signal(signal.SIGTERM, on_signal)
+    try:
+        while not interrupted and time.monotonic() < deadline:
+            time.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
+    except KeyboardInterrupt:
+        logger.info("收到中斷，提早解除阻斷")
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    firewall.unblock()
+
+
+def _forward(args):
+    """轉送給執行中的執行個體，沒有執行個體時回傳 None"""
+    if args.status:
+        return send_command("status")
+    if args.unblock:
+        return send_command("unblock")
+    options = {}
+    if args.ports:
+        options["ports"] = args.ports
+    if args.duration is not None:
+        options["for"] = args.duration
+    return send_command("block", **options)
+
+
+def main(argv=None):
+    """執行命令列模式，回傳結束代碼"""
+    args = build_parser().parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING")
+
+    response = _forward(args)
+    if response is not None:
+        message = response.get("message") or f"已轉送給執行中的程式，目前狀態: {response.get('status')}"
+        _report(
+            args, response.get("ok", False), response.get("status"), message,
+            ports=response.get("ports"), forwarded=True
+        )
+        return EXIT_OK if response.get("ok") else EXIT_FAILED
+    return _run_local(args)
+
+
+def _run_local(args):
+    """沒有執行中的執行個體時直接操作防火牆"""
+    # 防火牆層只在需要時載入，轉送命令時不必付出匯入成本
+    from src.controller import FirewallController, FirewallError, PortSet
+    from src.controller.broker import BrokerBackend, needs_broker
+
+    settings = load_settings()
+    backend = settings.firewall_backend
+    if needs_broker(backend):
+        # 一般權限執行時透過常駐的特權代理程式操作
+        backend = BrokerBackend(remote=backend)
+    firewall = FirewallController(backend=backend)
+    try:
+        if args.status:
+            status = firewall.get_rule_status()
+            rule = firewall.cached_rule()
+            _report(
+                args, status != firewall.STATUS_UNKNOWN, status, f"目前狀態: {status}",
+                ports=rule["ports"] if rule else None, backend=firewall.backend.name
+            )
+            return EXIT_OK if status != firewall.STATUS_UNKNOWN else EXIT_FAILED
+
+        if args.unblock:
+            firewall.unblock()
+            _report(args, True, firewall.STATUS_NORMAL, "已解除阻斷")
+            return EXIT_OK
+
+        try:
+            ports = PortSet.parse(args.ports or settings.selected_ports())
+        except ValueError as e:
+            _report(args, False, None, f"埠設定格式錯誤: {e}")
+            return EXIT_USAGE
+
+        duration = args.duration
+        if duration is None and settings.auto_recover:
+            duration = settings.recover_time
+
+        firewall.block(ports)
+        if not duration:
+            _report(args, True, firewall.STATUS_BLOCKED, f"已阻斷 UDP {ports}", ports=str(ports))
+            return EXIT_OK
+
+        if not args.json:
+            print(f"已阻斷 UDP {ports}，{duration:g} 秒後自動解除…", flush=True)
+        _recover_after(firewall, duration)
+        _report(
+            args, True, firewall.STATUS_NORMAL, "已自動解除阻斷",
+            ports=str(ports), duration=duration
+        )
+        return EXIT_OK
+    except FirewallError as e:
+        _report(args, False, firewall.cached_status(), f"防火牆操作失敗: {e}")
+        return EXIT_FAILED
+    finally:
+        firewall.close()
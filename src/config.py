@@ -0,0 +1,61 @@
+"""
+設定與路徑 - 不依賴 PySide6，供 GUI 與命令列模式共用
+"""
+
+import configparser
+import locale
+import os
+import sys
+
+APP_NAME = "WarframePairBlockTool"
+
+# 下拉選單的預設埠組合
+UDP_PRESETS = [
+    "4950 & 4955", "4960 & 4965", "4970 & 4975",
+    "4980 & 4985", "4990 & 4995", "3074 & 3080"
+]
+
+
+def get_base_dir():
+    # 如果是 PyInstaller 打包後的執行環境
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    # 開發環境下使用專案根目錄（src 的上一層）
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_resource_path(relative_path):
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.join(get_base_dir(), relative_path)
+
+
+def get_app_data_dir():
+    """取得應用程式資料目錄 (AppData/Roaming)"""
+    app_data = os.path.join(os.getenv('APPDATA') or os.path.expanduser('~'), APP_NAME)
+    # 確保目錄存在
+    if not os.path.exists(app_data):
+        os.makedirs(app_data)
+    return app_data
+
+
+BASE_DIR = get_base_dir()
+APP_DATA_DIR = get_app_data_dir()
+CONFIG_PATH = os.path.join(APP_DATA_DIR, f"{APP_NAME}.ini")
+LOG_PATH = os.path.join(APP_DATA_DIR, f"{APP_NAME}.log")
+ICON_PATH = get_resource_path("assets/logo.ico")
+BLOCKED_ICON_PATH = get_resource_path("assets/logo_blocked.ico")
+
+
+def read_ini(path):
+    """
+    讀取 INI（不存在時回傳空的 ConfigParser）。
+    舊版以系統預設編碼寫入設定檔，無法以 UTF-8 解碼時改用系統預設編碼讀取。
+    """
+    config = configparser.ConfigParser()
+    try:
+        config.read(path, encoding="utf-8")
+    except UnicodeDecodeError:
+        config = configparser.ConfigParser()
+        config.read(path, encoding=locale.getpreferredencoding(False))
+    return config
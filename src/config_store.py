@@ -0,0 +1,213 @@
+"""
+設定儲存 - 不依賴 PySide6，設定在記憶體中修改，由背景執行緒延遲寫入
+
+- 修改設定只更新記憶體中的值並標記為已變更（dirty），不做任何磁碟 I/O；
+  值沒有實際改變時不會標記
+- 最後一次修改後 delay 秒內沒有新的修改才寫入，連續修改合併成一次寫入
+- 寫入時先寫到同目錄的暫存檔再以 os.replace 取代，不會留下寫到一半的設定檔
+- 結束時以 close() 把尚未寫入的變更寫入；沒有變更時完全不寫檔
+
+    store = ConfigStore(CONFIG_PATH)
+    store.load()
+    store.update({"udp_index": "2"})      # 立即返回
+    with store.edit() as s:               # 一次修改多個欄位
+        s["udp_index"] = "0"
+        s["udp_ports"] = "3074"
+    ...
+    store.close()
+
+欄位的型別、預設值與驗證由 src.settings 負責，本模組只處理字串與檔案。
+"""
+
+import configparser
+import io
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from src.config import read_ini
+
+SECTION = "Settings"
+DEFAULT_DELAY = 1.0
+
+
+class ConfigStore:
+    """
+    單一 INI 區段（Settings）的記憶體內設定。
+
+    - get(key) / values()：讀取（values() 回傳複本）
+    - update(values) / edit() / replace(values)：修改並排程延遲寫入
+    - flush()：立即寫入尚未寫入的變更（在呼叫端的執行緒）
+    - close()：寫入尚未寫入的變更並停止背景執行緒
+    """
+
+    def __init__(self, path, delay=DEFAULT_DELAY):
+        self.path = path
+        self.delay = delay
+        self.writes = 0  # 實際寫檔次數
+        self._parser = configparser.ConfigParser()
+        self._values = {}
+        self._version = 0  # 每次實際變更 +1
+        self._written = 0  # 已寫入檔案的版本
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # 背景寫入與 flush() 不會同時寫檔
+
+    @property
+    def dirty(self):
+        with self._cond:
+            return self._version != self._written
+
+    def load(self):
+        """
+        讀取設定檔（UI 線程，啟動時），回傳設定檔是否已存在。
+        設定檔不存在時不會立即建立，之後的第一次修改才會寫入。
+        """
+        exists = os.path.exists(self.path)
+        parser = read_ini(self.path) if exists else configparser.ConfigParser()
+        values = dict(parser[SECTION]) if parser.has_section(SECTION) else {}
+        with self._cond:
+            self._parser = parser
+            self._values = values
+            self._written = self._version
+        return exists
+
+    def get(self, key, fallback=None):
+        with self._cond:
+            return self._values.get(key, fallback)
+
+    def values(self):
+        with self._cond:
+            return dict(self._values)
+
+    @contextmanager
+    def edit(self):
+        """修改設定的 context manager；離開時值有改變才標記並排程寫入"""
+        with self._cond:
+            before = dict(self._values)
+            yield self._values
+            if self._values != before:
+                self._changed_locked()
+
+    def update(self, values):
+        with self.edit() as s:
+            for key, value in values.items():
+                s[key] = str(value)
+
+    def replace(self, values):
+        """以 values 取代所有設定（例如清除設定）"""
+        with self.edit() as s:
+            s.clear()
+            s.update({key: str(value) for key, value in values.items()})
+
+    def _changed_locked(self):
+        self._version += 1
+        self._deadline = time.monotonic() + self.delay
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _run(self):
+        """背景寫入執行緒：等到最後一次修改後 delay 秒才寫入"""
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._deadline is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._deadline = None
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def _serialize_locked(self):
+        self._parser[SECTION] = self._values
+        buffer = io.StringIO()
+        self._parser.write(buffer)
+        return buffer.getvalue()
+
+    def flush(self):
+        """立即寫入尚未寫入的變更；沒有變更時不寫檔。回傳是否成功（或不需要寫入）"""
+        with self._write_lock:
+            with self._cond:
+                if self._version == self._written:
+                    return True
+                version = self._version
+                text = self._serialize_locked()
+            try:
+                self._write_atomic(text)
+            except OSError as e:
+                logger.error(f"保存設定檔時發生錯誤: {e}")
+                return False
+            with self._cond:
+                self._written = max(self._written, version)
+            self.writes += 1
+            logger.info("設定已保存")
+            return True
+
+    def _write_atomic(self, text):
+        directory = os.path.dirname(self.path) or "."
+        fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def close(self, timeout=5.0):
+        """停止背景執行緒並寫入尚未寫入的變更，回傳是否已全部寫入"""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("設定寫入執行緒未在時限內結束")
+        return self.flush()
+
+
+if __name__ == "__main__":
+    # 連續修改只寫入一次、沒有變更時不寫檔：python -m src.config_store
+    import sys
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settings.ini")
+        store = ConfigStore(path, delay=0.2)
+        store.load()
+        for i in range(1000):
+            store.update({"udp_index": str(i % 6), "recover_time": "20"})
+        start = time.perf_counter()
+        store.update({"udp_index": "3"})
+        per_update = (time.perf_counter() - start) * 1e6
+        time.sleep(0.5)
+        print(f"1000 次修改後寫檔 {store.writes} 次，單次修改 {per_update:.1f} µs")
+        assert store.writes == 1 and not store.dirty
+        store.update({"udp_index": "3"})
+        assert not store.dirty, "值沒有改變時不應標記"
+        store.update({"recover_time": "30"})
+        assert store.close() and store.writes == 2
+        assert read_ini(path)[SECTION]["recover_time"] == "30"
+        assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+        print("OK")
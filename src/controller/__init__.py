@@ -8,10 +8,55 @@ from .firewall import (
     RuleCreationError,
     RuleDeletionError
 )
+from .errors import (
+    BackendUnavailableError,
+    CommandExecutionError,
+    CommandTimeoutError,
+    RuleUpdateError
+)
+from .backends import (
+    FirewallBackend,
+    NetshBackend,
+    ComBackend,
+    FakeBackend,
+    create_backend
+)
+from .nftables import NftablesBackend
+from .broker import BrokerBackend, LocalBroker
+from .session import CommandSession, SessionError, SessionInterruptedError, SessionTimeoutError
+from .retry import RetryPolicy
+from .reconciler import RuleTarget
+from .ports import PortSet
+from .inspection import RuleRecord, RuleSnapshot
+from .registry import RuleRegistry, WinRegistrySource, DictRegistrySource
 
 __all__ = [
     'FirewallController',
     'FirewallError',
     'RuleCreationError',
-    'RuleDeletionError'
+    'RuleDeletionError',
+    'RuleUpdateError',
+    'CommandExecutionError',
+    'CommandTimeoutError',
+    'BackendUnavailableError',
+    'FirewallBackend',
+    'NetshBackend',
+    'ComBackend',
+    'FakeBackend',
+    'NftablesBackend',
+    'BrokerBackend',
+    'LocalBroker',
+    'create_backend',
+    'CommandSession',
+    'SessionError',
+    'SessionInterruptedError',
+    'SessionTimeoutError',
+    'RetryPolicy',
+    'RuleTarget',
+    'PortSet',
+    'RuleRecord',
+    'RuleSnapshot',
+    'RuleRegistry',
+    'WinRegistrySource',
+    'DictRegistrySource'
 ]
@@ -0,0 +1,481 @@
+import os
+import subprocess
+import sys
+import threading
+
+from loguru import logger
+
+from .errors import (
+    BackendUnavailableError,
+    CommandExecutionError,
+    CommandTimeoutError,
+    RuleCreationError,
+    RuleDeletionError,
+    RuleUpdateError
+)
+from .inspection import RuleRecord, RuleSnapshot, parse_netsh_rules
+from .retry import RetryPolicy
+from .session import (
+    CommandSession,
+    SessionError,
+    SessionInterruptedError,
+    SessionTimeoutError,
+    kill_process_tree,
+    popen_options
+)
+
+
+class FirewallBackend:
+    """
+    防火牆後端介面。
+
+    所有後端都以規則名稱操作單一條「阻斷 UDP 輸出」規則：
+    - rule_exists: 回傳 True / False，無法判斷時回傳 None
+    - get_rule: 回傳 {"ports", "enabled", "count"}，規則不存在時回傳 None，
+      無法解析的欄位為 None
+    - add_rule: 建立規則，local_ports 為 netsh 的 localport 格式（例如 "4950-4955"）
+    - set_rule_enabled: 啟用或停用既有規則
+    - update_rule: 原地修改既有規則的埠與啟用狀態（單次操作）
+    - delete_rule: 刪除規則
+    - snapshot: 一次查詢所有規則，回傳 RuleSnapshot（owned 可限制只保留工具建立的規則）
+
+    fallback 為後端無法使用（BackendUnavailableError）時改用的後端名稱，None 表示不退回。
+    """
+    name = 'base'
+    fallback = None
+
+    def start(self):
+        """預先初始化後端（可選）"""
+        pass
+
+    def close(self):
+        """釋放後端資源"""
+        pass
+
+    def is_ready(self):
+        """是否可以立即操作（不需要先啟動其他行程或等待使用者確認）"""
+        return True
+
+    def rule_exists(self, name):
+        raise NotImplementedError
+
+    def get_rule(self, name):
+        raise NotImplementedError
+
+    def add_rule(self, name, local_ports, enabled=True):
+        raise NotImplementedError
+
+    def set_rule_enabled(self, name, enabled):
+        raise NotImplementedError
+
+    def update_rule(self, name, local_ports, enabled):
+        raise NotImplementedError
+
+    def delete_rule(self, name):
+        raise NotImplementedError
+
+    def snapshot(self, owned=None):
+        raise NotImplementedError
+
+
+class NetshBackend(FirewallBackend):
+    """
+    透過長駐命令 session 執行 netsh 的後端。
+
+    每個命令都有時限（timeout 秒），超時會結束整個行程樹並拋出 CommandTimeoutError；
+    查詢與啟用/停用等可重複執行的命令依 retry 策略退避重試，
+    建立規則不重試（避免產生重複規則），失敗後由上層重新查詢再決定。
+    """
+    name = 'netsh'
+    RULE_BASE = 'netsh advfirewall firewall'
+
+    # netsh 正常在 1 秒內完成；防火牆服務重新啟動時可能卡住
+    COMMAND_TIMEOUT = 4.0
+    DEFAULT_RETRY = RetryPolicy(attempts=3, backoff=0.25, max_backoff=1.0, deadline=6.0)
+
+    def __init__(self, session=None, timeout=COMMAND_TIMEOUT, retry=DEFAULT_RETRY):
+        # 長駐命令 session，避免每次操作都啟動 cmd.exe
+        self.session = session if session is not None else CommandSession.default()
+        self.timeout = timeout
+        self.retry = retry
+        self.last_error = None
+        logger.debug(f"netsh 單一操作最壞延遲: {retry.worst_case(timeout):.1f} 秒")
+
+    def start(self):
+        """預先啟動命令 session，讓第一次切換不必等待直譯器啟動"""
+        try:
+            self.session.start()
+        except SessionError as e:
+            self.last_error = str(e)
+
+    def close(self):
+        self.session.close()
+
+    def run_command(self, command, retry=True):
+        """執行命令並回傳 (結束代碼, stdout, stderr)；retry=False 時失敗不重試"""
+        policy = self.retry if retry else RetryPolicy.none()
+        try:
+            return policy.run(self._run_once, command, describe=f"命令 {command}")
+        except CommandExecutionError as e:
+            self.last_error = str(e)
+            raise
+
+    def _run_once(self, command):
+        try:
+            code, output = self.session.execute(command, timeout=self.timeout)
+            return code, output, output if code != 0 else ''
+        except SessionTimeoutError as e:
+            raise CommandTimeoutError(str(e), command, self.timeout)
+        except SessionInterruptedError as e:
+            # 命令可能已經執行，不在此重送；可重複執行的命令由 retry 策略重試
+            raise CommandExecutionError(str(e))
+        except SessionError as e:
+            # session 無法使用（命令沒有送達）時退回單次執行
+            self.last_error = str(e)
+            return self._run_oneshot(command)
+
+    def _run_oneshot(self, command):
+        try:
+            process = subprocess.Popen(
+                command,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',  # 明確指定 UTF-8 編碼
+                errors='replace',  # 處理無法解碼的字元
+                **popen_options()
+            )
+        except Exception as e:
+            raise CommandExecutionError(f"執行命令時發生錯誤：{e}")
+        try:
+            stdout, stderr = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            process.communicate()
+            raise CommandTimeoutError(f"命令超過 {self.timeout} 秒未完成：{command}", command, self.timeout)
+        return process.returncode, stdout, stderr
+
+    def rule_exists(self, name):
+        code, _, _ = self.run_command(f'{self.RULE_BASE} show rule name={name} dir=out')
+        if code == 0:
+            return True
+        elif code == 1:
+            return False
+        return None
+
+    def get_rule(self, name):
+        code, stdout, _ = self.run_command(f'{self.RULE_BASE} show rule name={name} dir=out verbose')
+        if code == 1:
+            return None
+        elif code != 0:
+            raise CommandExecutionError(f"查詢防火牆規則失敗：{stdout}")
+        rule = RuleSnapshot(parse_netsh_rules(stdout)).summary(name)
+        # 輸出無法解析（例如未知語系）時仍視為存在
+        return rule or {"ports": None, "enabled": None, "count": 1}
+
+    def snapshot(self, owned=None):
+        code, stdout, _ = self.run_command(f'{self.RULE_BASE} show rule name=all dir=out verbose')
+        if code == 1:
+            return RuleSnapshot()
+        elif code != 0:
+            raise CommandExecutionError(f"查詢防火牆規則失敗：{stdout}")
+        return RuleSnapshot(parse_netsh_rules(stdout, owned))
+
+    def add_rule(self, name, local_ports, enabled=True):
+        enable = 'yes' if enabled else 'no'
+        command = (
+            f"{self.RULE_BASE} add rule name={name} protocol=UDP dir=out "
+            f"localport={local_ports} action=block enable={enable}"
+        )
+        try:
+            code, _, stderr = self.run_command(command, retry=False)
+        except CommandTimeoutError:
+            raise
+        except CommandExecutionError as e:
+            raise RuleCreationError(f"建立防火牆規則失敗：{e}")
+        if code != 0:
+            self.last_error = stderr
+            raise RuleCreationError(f"建立防火牆規則失敗：{stderr}")
+
+    def set_rule_enabled(self, name, enabled):
+        enable = 'yes' if enabled else 'no'
+        try:
+            code, _, stderr = self.run_command(f'{self.RULE_BASE} set rule name={name} new enable={enable}')
+        except CommandTimeoutError:
+            raise
+        except CommandExecutionError as e:
+            raise RuleUpdateError(f"修改防火牆規則失敗：{e}")
+        if code != 0:
+            self.last_error = stderr
+            raise RuleUpdateError(f"修改防火牆規則失敗：{stderr}")
+
+    def update_rule(self, name, local_ports, enabled):
+        enable = 'yes' if enabled else 'no'
+        command = (
+            f"{self.RULE_BASE} set rule name={name} new protocol=UDP "
+            f"localport={local_ports} enable={enable}"
+        )
+        try:
+            code, _, stderr = self.run_command(command)
+        except CommandTimeoutError:
+            raise
+        except CommandExecutionError as e:
+            raise RuleUpdateError(f"修改防火牆規則失敗：{e}")
+        if code != 0:
+            self.last_error = stderr
+            raise RuleUpdateError(f"修改防火牆規則失敗：{stderr}")
+
+    def delete_rule(self, name):
+        try:
+            code, _, stderr = self.run_command(f'{self.RULE_BASE} delete rule name={name}')
+        except CommandTimeoutError:
+            raise
+        except CommandExecutionError as e:
+            raise RuleDeletionError(f"刪除防火牆規則失敗：{e}")
+        if code != 0:
+            self.last_error = stderr
+            raise RuleDeletionError(f"刪除防火牆規則失敗：{stderr}")
+
+
+class ComBackend(FirewallBackend):
+    """
+    透過 HNetCfg.FwPolicy2 COM 介面在行程內操作規則，不啟動任何外部程式。
+    COM 物件綁定於建立它的執行緒，因此每個執行緒各自初始化一份 policy。
+    所有 COM 錯誤都轉成 BackendUnavailableError，讓上層自動退回 netsh。
+    """
+    name = 'com'
+    fallback = 'netsh'
+
+    NET_FW_IP_PROTOCOL_UDP = 17
+    NET_FW_RULE_DIR_OUT = 2
+    NET_FW_ACTION_BLOCK = 0
+    NET_FW_PROFILE2_ALL = 0x7FFFFFFF
+
+    def __init__(self):
+        try:
+            import pythoncom
+            import win32com.client
+        except ImportError as e:
+            raise BackendUnavailableError(f"無法載入 pywin32 COM 模組：{e}")
+        self._pythoncom = pythoncom
+        self._client = win32com.client
+        self._local = threading.local()
+
+    def start(self):
+        self._policy()
+
+    def _policy(self):
+        policy = getattr(self._local, 'policy', None)
+        if policy is None:
+            try:
+                self._pythoncom.CoInitialize()
+                policy = self._client.Dispatch('HNetCfg.FwPolicy2')
+            except self._pythoncom.com_error as e:
+                raise BackendUnavailableError(f"無法初始化防火牆 COM 介面：{e}")
+            self._local.policy = policy
+        return policy
+
+    def _find(self, name):
+        rules = self._policy().Rules
+        try:
+            return rules.Item(name)
+        except self._pythoncom.com_error:
+            return None
+
+    def rule_exists(self, name):
+        try:
+            return self._find(name) is not None
+        except BackendUnavailableError:
+            return None
+
+    def get_rule(self, name):
+        rule = self._find(name)
+        if rule is None:
+            return None
+        try:
+            return {"ports": rule.LocalPorts, "enabled": bool(rule.Enabled), "count": 1}
+        except self._pythoncom.com_error as e:
+            raise BackendUnavailableError(f"COM 讀取規則失敗：{e}")
+
+    def snapshot(self, owned=None):
+        records = []
+        try:
+            for rule in self._policy().Rules:
+                # 先只讀名稱，其他屬性只對需要的規則讀取，減少 COM 呼叫
+                name = rule.Name
+                if owned is not None and not owned(name):
+                    continue
+                if rule.Direction != self.NET_FW_RULE_DIR_OUT:
+                    continue
+                protocol = rule.Protocol
+                records.append(RuleRecord(
+                    name,
+                    enabled=bool(rule.Enabled),
+                    outbound=True,
+                    block=rule.Action == self.NET_FW_ACTION_BLOCK,
+                    protocol='UDP' if protocol == self.NET_FW_IP_PROTOCOL_UDP else str(protocol),
+                    ports=rule.LocalPorts
+                ))
+        except self._pythoncom.com_error as e:
+            raise BackendUnavailableError(f"COM 讀取規則失敗：{e}")
+        return RuleSnapshot(records)
+
+    def add_rule(self, name, local_ports, enabled=True):
+        # 先確保此執行緒已 CoInitialize；初始化失敗才算後端無法使用，個別規則失敗不切換後端
+        policy = self._policy()
+        try:
+            rule = self._client.Dispatch('HNetCfg.FWRule')
+            rule.Name = name
+            rule.Protocol = self.NET_FW_IP_PROTOCOL_UDP
+            rule.LocalPorts = local_ports
+            rule.Direction = self.NET_FW_RULE_DIR_OUT
+            rule.Action = self.NET_FW_ACTION_BLOCK
+            rule.Profiles = self.NET_FW_PROFILE2_ALL
+            rule.Enabled = bool(enabled)
+            policy.Rules.Add(rule)
+        except self._pythoncom.com_error as e:
+            raise RuleCreationError(f"COM 建立規則失敗：{e}")
+
+    def set_rule_enabled(self, name, enabled):
+        rule = self._find(name)
+        if rule is None:
+            raise RuleUpdateError(f"找不到防火牆規則：{name}")
+        try:
+            rule.Enabled = bool(enabled)
+        except self._pythoncom.com_error as e:
+            raise RuleUpdateError(f"COM 修改規則失敗：{e}")
+
+    def update_rule(self, name, local_ports, enabled):
+        rule = self._find(name)
+        if rule is None:
+            raise RuleUpdateError(f"找不到防火牆規則：{name}")
+        try:
+            rule.LocalPorts = local_ports
+            rule.Enabled = bool(enabled)
+        except self._pythoncom.com_error as e:
+            raise RuleUpdateError(f"COM 修改規則失敗：{e}")
+
+    def delete_rule(self, name):
+        if self._find(name) is None:
+            raise RuleDeletionError(f"找不到防火牆規則：{name}")
+        try:
+            rules = self._policy().Rules
+            # Remove 一次只移除一條同名規則：依開始時的同名規則數移除，
+            # Remove 沒有移除任何規則時也不會無限重試
+            count = sum(1 for rule in rules if rule.Name == name)
+            for _ in range(max(count, 1)):
+                rules.Remove(name)
+                if self._find(name) is None:
+                    return
+        except self._pythoncom.com_error as e:
+            raise RuleDeletionError(f"COM 刪除規則失敗：{e}")
+        raise RuleDeletionError(f"COM 刪除規則後仍有殘留：{name}")
+
+
+class FakeBackend(FirewallBackend):
+    """
+    記憶體內的假後端，供測試與無防火牆環境使用。
+    rules 保存 {名稱: {"ports": ..., "enabled": ...}}，calls 記錄每次呼叫。
+    fail_on 可放入方法名稱，讓該操作拋出對應錯誤。
+    """
+    name = 'fake'
+
+    def __init__(self):
+        self.rules = {}
+        self.calls = []
+        self.fail_on = set()
+
+    def _record(self, method, *args):
+        self.calls.append((method,) + args)
+        return method in self.fail_on
+
+    def rule_exists(self, name):
+        self._record('rule_exists', name)
+        return name in self.rules
+
+    def get_rule(self, name):
+        self._record('get_rule', name)
+        rule = self.rules.get(name)
+        if rule is None:
+            return None
+        return dict(rule, count=1)
+
+    def add_rule(self, name, local_ports, enabled=True):
+        if self._record('add_rule', name, local_ports, enabled):
+            raise RuleCreationError("建立防火牆規則失敗：模擬錯誤")
+        self.rules[name] = {"ports": local_ports, "enabled": bool(enabled)}
+
+    def set_rule_enabled(self, name, enabled):
+        if self._record('set_rule_enabled', name, enabled) or name not in self.rules:
+            raise RuleUpdateError(f"找不到防火牆規則：{name}")
+        self.rules[name]["enabled"] = bool(enabled)
+
+    def update_rule(self, name, local_ports, enabled):
+        if self._record('update_rule', name, local_ports, enabled) or name not in self.rules:
+            raise RuleUpdateError(f"找不到防火牆規則：{name}")
+        self.rules[name] = {"ports": local_ports, "enabled": bool(enabled)}
+
+    def delete_rule(self, name):
+        if self._record('delete_rule', name) or name not in self.rules:
+            raise RuleDeletionError(f"找不到防火牆規則：{name}")
+        del self.rules[name]
+
+    def snapshot(self, owned=None):
+        self._record('snapshot')
+        return RuleSnapshot(
+            RuleRecord(name, rule["enabled"], True, True, 'UDP', rule["ports"])
+            for name, rule in self.rules.items()
+            if owned is None or owned(name)
+        )
+
+
+BACKENDS = {
+    'netsh': NetshBackend,
+    'com': ComBackend,
+    'fake': FakeBackend,
+    # nftables 後端位於獨立模組，建立時才載入
+    'nft': None,
+}
+
+
+def create_backend(name='auto', session=None):
+    """
+    依名稱建立後端。auto 在 Windows 上優先使用 COM，
+    COM 無法使用時自動退回 netsh；在 Linux 上使用 nftables。
+    Windows 以外沒有 netsh：nftables 無法使用（或沒有支援的後端）時改用 fake 並記錄錯誤，規則不會生效。
+    """
+    name = (name or 'auto').lower()
+    if name == 'auto':
+        if os.name == 'nt':
+            name = 'com'
+        elif sys.platform.startswith('linux'):
+            name = 'nft'
+        else:
+            logger.error(f"{sys.platform} 沒有支援的防火牆後端，改用 fake 後端（規則不會生效）")
+            name = 'fake'
+    if name not in BACKENDS:
+        logger.warning(f"未知的防火牆後端: {name}，改用 netsh")
+        name = 'netsh'
+
+    if name == 'com':
+        try:
+            return ComBackend()
+        except BackendUnavailableError as e:
+            logger.warning(f"COM 後端無法使用，改用 netsh: {e}")
+            name = 'netsh'
+
+    if name == 'nft':
+        from .nftables import NftablesBackend
+        try:
+            return NftablesBackend()
+        except BackendUnavailableError as e:
+            if os.name == 'nt':
+                logger.warning(f"nftables 後端無法使用，改用 netsh: {e}")
+                name = 'netsh'
+            else:
+                logger.error(f"nftables 後端無法使用，改用 fake 後端（規則不會生效）: {e}")
+                name = 'fake'
+    if name == 'netsh':
+        return NetshBackend(session)
+    return BACKENDS[name]()
@@ -0,0 +1,708 @@
+"""
+特權代理程式 - 只負責承載防火牆後端的行程
+
+UI 以一般權限執行，需要修改防火牆時才啟動（提升權限的）代理程式，
+之後透過本機連線以精簡的請求/回應協定呼叫後端。
+訊息以 send_bytes / recv_bytes 傳送 UTF-8 JSON（不使用 pickle，連線的另一端不能讓代理程式執行任意程式碼）：
+- 請求：[方法名稱, [參數...]]，只接受 BROKER_METHODS 中的方法，參數個數與型別必須完全符合，
+  且只能操作本工具的規則（名稱以 FirewallController.OWNED_PREFIX 開頭）
+- 回應：["ok", 結果, logs] 或 ["error", 例外類別名稱, 訊息, logs]
+
+連線使用 multiprocessing.connection（HMAC 雙向驗證）並只綁定 127.0.0.1：
+- 啟動：UI 在隨機埠等待，authkey 為每次啟動代理程式時產生的一次性金鑰，只交給新啟動的代理程式，由代理程式連回 UI
+- 常駐：代理程式另外以自己產生的金鑰在隨機埠等待，經由連回的連線告知 UI；
+  UI 把埠與金鑰寫入使用者的應用程式資料目錄（SESSION_FILE，只有該使用者與系統管理員可以讀取），
+  之後重新開啟的 UI 以此連線到同一個代理程式，不必再次確認 UAC
+代理程式不寫入任何檔案（使用者可寫入的目錄可能被以連結導向其他檔案），它的 log 隨回應送回 UI 記錄；
+代理程式常駐到收到 shutdown 為止。
+
+後端由代理程式中的 FirewallController 承載，COM 無法使用時在代理程式內退回 netsh（與直接執行時相同）。
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from loguru import logger
+
+from . import errors
+from .backends import FakeBackend, FirewallBackend
+from .errors import BackendUnavailableError, CommandExecutionError, FirewallError
+from .firewall import FirewallController
+from .inspection import RuleRecord, RuleSnapshot
+from .ports import PortSet
+
+# 允許透過代理程式呼叫的後端方法與各參數的型別（第一個 str 參數為規則名稱）
+BROKER_METHODS = {
+    'start': (),
+    'rule_exists': (str,),
+    'get_rule': (str,),
+    'add_rule': (str, str, bool),
+    'set_rule_enabled': (str, bool),
+    'update_rule': (str, str, bool),
+    'delete_rule': (str,),
+    'snapshot': (),
+}
+# 代理程式本身的控制命令
+CONTROL_METHODS = ('ping', 'shutdown')
+# 規則名稱也會被放進 netsh 參數與 nft 批次中，只允許本工具的前綴加上英數字
+RULE_NAME_PATTERN = re.compile(re.escape(FirewallController.OWNED_PREFIX) + r'[A-Za-z0-9_]*')
+HOST = '127.0.0.1'
+# 單一訊息的大小上限（快照也遠小於此）
+MAX_MESSAGE = 1 << 20
+# 常駐代理程式的連線資訊檔名（埠與金鑰，由一般權限的 UI 寫入）
+SESSION_FILE = 'broker.session'
+
+
+def is_elevated():
+    """目前行程是否有修改防火牆所需的權限"""
+    if os.name == 'nt':
+        try:
+            import ctypes
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+    return os.geteuid() == 0
+
+
+def needs_broker(backend_name):
+    """以一般權限執行且後端需要特權時，改透過代理程式操作"""
+    return backend_name != 'fake' and not is_elevated()
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False).encode('utf-8')
+
+
+def decode(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def parse_request(data):
+    """解析並驗證請求，回傳 (方法名稱, 參數 list)；不合法時拋出 FirewallError"""
+    try:
+        request = decode(data)
+    except ValueError:
+        raise FirewallError("無法解析的請求")
+    if not (isinstance(request, list) and len(request) == 2
+            and isinstance(request[0], str) and isinstance(request[1], list)):
+        raise FirewallError("無法解析的請求")
+    method, args = request
+    if method in CONTROL_METHODS:
+        signature = ()
+    elif method in BROKER_METHODS:
+        signature = BROKER_METHODS[method]
+    else:
+        raise FirewallError(f"不允許的方法: {method[:64]}")
+    # bool 是 int 的子類別，以 type() 比對避免 1 / True 混用
+    if len(args) != len(signature) or any(type(arg) is not kind for arg, kind in zip(args, signature)):
+        raise FirewallError(f"{method} 的參數不合法")
+    if signature and not RULE_NAME_PATTERN.fullmatch(args[0]):
+        raise FirewallError(f"不允許操作此規則: {args[0][:64]}")
+    if method in ('add_rule', 'update_rule'):
+        try:
+            PortSet.parse(args[1])
+        except ValueError as e:
+            raise FirewallError(f"埠設定不合法: {e}")
+    return method, args
+
+
+def snapshot_to_json(snapshot):
+    return [
+        [record.name, record.enabled, record.outbound, record.block, record.protocol, record.ports]
+        for record in snapshot
+    ]
+
+
+def snapshot_from_json(items):
+    return RuleSnapshot(RuleRecord(*item) for item in items)
+
+
+class BrokerServer:
+    """
+    在代理程式中處理 UI 的請求，收到 shutdown 時結束。
+    run() 先服務啟動它的 UI 連回的連線，並在 127.0.0.1 的隨機埠常駐等待之後的 UI（例如重新開啟的 UI）連線；
+    每條連線一個執行緒，請求依序交給後端執行。
+    backend（名稱或 FirewallBackend 實例）由 FirewallController 承載，後端無法使用時退回其備援後端。
+    代理程式的 log 暫存在記憶體中，隨下一個回應送回 UI。
+    """
+
+    MAX_LOGS = 200
+
+    def __init__(self, backend):
+        self.controller = FirewallController(backend, registry='none')
+        self.stopped = threading.Event()
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self._logs = deque(maxlen=self.MAX_LOGS)
+        self._listener = None
+
+    def log_sink(self, message):
+        """loguru sink：暫存 log（含例外的 traceback），隨下一個回應送回 UI"""
+        self._logs.append([message.record['level'].name, str(message).rstrip()])
+
+    def _take_logs(self):
+        logs = []
+        while True:
+            try:
+                logs.append(self._logs.popleft())
+            except IndexError:
+                return logs
+
+    def listen(self):
+        """開始接受之後的 UI 連線，回傳 (埠, 這次執行產生的金鑰)"""
+        authkey = os.urandom(32)
+        self._listener = Listener((HOST, 0), authkey=authkey)
+        threading.Thread(target=self._accept_loop, name="broker-accept", daemon=True).start()
+        return self._listener.address[1], authkey
+
+    def _accept_loop(self):
+        while not self.stopped.is_set():
+            try:
+                connection = self._listener.accept()
+            except (AuthenticationError, EOFError):
+                if not self.stopped.is_set():
+                    logger.warning("拒絕未通過驗證的連線")
+                continue
+            except OSError:
+                break
+            if self.stopped.is_set():
+                connection.close()
+                break
+            threading.Thread(target=self.serve, args=(connection,), name="broker-serve", daemon=True).start()
+
+    def run(self, connection):
+        """
+        代理程式的主迴圈：經由啟動時的連線告知常駐的埠與金鑰，
+        之後同時服務這條連線與新的連線，直到收到 shutdown。
+        """
+        port, authkey = self.listen()
+        try:
+            with self._lock:
+                connection.send_bytes(encode(['hello', port, authkey.hex()]))
+        except (EOFError, OSError):
+            connection.close()
+            self.stop()
+            return
+        threading.Thread(target=self.serve, args=(connection,), name="broker-serve", daemon=True).start()
+        self.stopped.wait()
+        logger.info("防火牆代理程式已停止")
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        if self._listener is not None:
+            port = self._listener.address[1]
+            # 以一個空連線喚醒阻塞中的 accept()
+            try:
+                socket.create_connection((HOST, port), timeout=1).close()
+            except OSError:
+                pass
+            self._listener.close()
+
+    def serve(self, connection):
+        """處理一條連線的請求直到連線關閉或收到 shutdown"""
+        logger.info(f"防火牆代理程式已連線 (後端: {self.controller.backend_name})")
+        with connection:
+            while not self.stopped.is_set():
+                try:
+                    data = connection.recv_bytes(MAX_MESSAGE)
+                    with self._lock:
+                        reply = self.dispatch(data)
+                        logs = self._take_logs()
+                    connection.send_bytes(encode(reply + [logs]))
+                except (EOFError, OSError):
+                    break
+                if self._shutdown:
+                    # 送出回應之後才停止，避免行程先結束
+                    self.stop()
+
+    def dispatch(self, data):
+        """處理一個請求（JSON bytes），回傳回應"""
+        try:
+            method, args = parse_request(data)
+        except FirewallError as e:
+            logger.warning(f"拒絕代理程式請求: {e}")
+            return ['error', 'FirewallError', str(e)]
+        if method == 'ping':
+            return ['ok', self.controller.backend.name]
+        if method == 'shutdown':
+            self._shutdown = True
+            return ['ok', None]
+        if method == 'snapshot':
+            # 只回傳本工具的規則
+            args = [self.controller.is_owned]
+        try:
+            # 與直接執行時相同的備援：例如 COM 無法使用時改用 netsh 並重試
+            result = self.controller._call(method, *args)
+        except FirewallError as e:
+            return ['error', type(e).__name__, str(e)]
+        except Exception as e:
+            logger.error(f"代理程式執行 {method} 時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+            return ['error', 'CommandExecutionError', str(e)]
+        if method == 'snapshot':
+            result = snapshot_to_json(result)
+        return ['ok', result]
+
+
+def broker_argv(remote, port):
+    """啟動代理程式的命令列（打包後為 exe 本身，開發環境為 main.py），不含一次性金鑰"""
+    if getattr(sys, 'frozen', False):
+        argv = [sys.executable, '--broker']
+    else:
+        from src.config import BASE_DIR
+        argv = [sys.executable, os.path.join(BASE_DIR, 'main.py'), '--broker']
+    return argv + ['--backend', remote, '--port', str(port)]
+
+
+def _spawn(argv, authkey):
+    """啟動代理程式並經由標準輸入傳遞一次性金鑰（命令列在 /proc 中其他使用者也讀得到）"""
+    try:
+        process = subprocess.Popen(argv + ['--authkey', '-'], start_new_session=True, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        raise BackendUnavailableError(f"無法啟動防火牆代理程式：{e}")
+    try:
+        process.stdin.write(authkey.hex().encode('ascii') + b'\n')
+        process.stdin.close()
+    except OSError:
+        pass
+    return process
+
+
+def launch_elevated(argv, authkey):
+    """
+    以提升的權限啟動代理程式（Windows 為 UAC，Linux 為 pkexec）。
+    回傳代理程式的 Popen，無法追蹤行程時（Windows）回傳 None。
+    """
+    if os.name == 'nt':
+        import ctypes
+        # ShellExecuteW 無法傳遞標準輸入，一次性金鑰放在命令列；一般權限的行程無法讀取提升權限行程的命令列
+        params = subprocess.list2cmdline(argv[1:] + ['--authkey', authkey.hex()])
+        # SW_HIDE：代理程式沒有視窗
+        result = ctypes.windll.shell32.ShellExecuteW(None, "runas", argv[0], params, None, 0)
+        if result <= 32:
+            raise BackendUnavailableError(f"無法以系統管理員權限啟動防火牆代理程式 (代碼: {result})")
+        return None
+    if not is_elevated():
+        argv = ['pkexec'] + argv
+    return _spawn(argv, authkey)
+
+
+def launch_unprivileged(argv, authkey):
+    """不提升權限直接啟動代理程式（搭配 fake 後端做測試時使用）"""
+    return _spawn(argv, authkey)
+
+
+def default_session_path():
+    """常駐代理程式的連線資訊檔（每個使用者的應用程式資料目錄，只有該使用者與系統管理員可以讀取）"""
+    from src.config import APP_DATA_DIR
+    return os.path.join(APP_DATA_DIR, SESSION_FILE)
+
+
+def write_session(path, port, authkey):
+    """
+    由一般權限的 UI 寫入常駐代理程式的埠與金鑰（代理程式本身不寫入任何檔案）。
+    以 mkstemp（僅擁有者可讀寫）建立暫存檔後取代，不會沿著既有的連結寫入。
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=SESSION_FILE, dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'port': port, 'authkey': authkey.hex()}, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"無法寫入代理程式連線資訊: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def read_session(path):
+    """讀取常駐代理程式的 (埠, 金鑰)，檔案不存在或格式不符時回傳 None"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        port, authkey = data['port'], bytes.fromhex(data['authkey'])
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(port, int) or not 0 < port < 65536 or len(authkey) != 32:
+        return None
+    return port, authkey
+
+
+def remove_session(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class BrokerBackend(FirewallBackend):
+    """
+    透過代理程式操作防火牆的後端（供一般權限的 UI 與命令列使用）。
+
+    - remote: 代理程式中實際使用的後端名稱
+    - launcher: 啟動代理程式的函式 launcher(argv, authkey)，None 表示不自動啟動
+    - session_path: 常駐代理程式的連線資訊檔，預設為 default_session_path()
+    先連線到連線資訊檔記錄的常駐代理程式（例如上次開啟 UI 時啟動的）；沒有時，第一次需要操作防火牆時才啟動代理程式：
+    在 127.0.0.1 的隨機埠等待，只接受以這次產生的一次性金鑰通過驗證的連線，再把代理程式告知的常駐埠與金鑰寫入連線資訊檔。
+    start() 不會啟動代理程式；close() 只關閉連線，代理程式繼續常駐，shutdown_broker() 才會結束它。
+    """
+    name = 'broker'
+
+    # 包含使用者確認 UAC 的時間
+    LAUNCH_TIMEOUT = 60.0
+    CONNECT_POLL = 0.1
+    # 連線到常駐代理程式的時限（連線資訊過期時該埠可能已被其他程式使用）
+    CONNECT_TIMEOUT = 5.0
+
+    def __init__(self, remote='auto', launcher=launch_elevated, session_path=None):
+        self.remote = remote
+        self.launcher = launcher
+        self.session_path = session_path or default_session_path()
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def is_ready(self):
+        return self._connection is not None
+
+    def _ensure(self, launch=True):
+        if self._connection is None:
+            self._connection = self._attach()
+        if self._connection is not None or not launch:
+            return self._connection
+        if self.launcher is None:
+            raise BackendUnavailableError("防火牆代理程式未在執行")
+        logger.info(f"啟動防火牆代理程式 (後端: {self.remote})")
+        self._connection = self._launch()
+        return self._connection
+
+    def _attach(self):
+        """連線到常駐的代理程式，沒有（或連線資訊已失效）時回傳 None"""
+        session = read_session(self.session_path)
+        if session is None:
+            return None
+        port, authkey = session
+        result = []
+
+        def connect():
+            try:
+                result.append(Client((HOST, port), authkey=authkey))
+            except (OSError, AuthenticationError, EOFError) as e:
+                result.append(e)
+
+        thread = threading.Thread(target=connect, name="broker-connect", daemon=True)
+        thread.start()
+        thread.join(self.CONNECT_TIMEOUT)
+        if not result:
+            logger.warning("連線到常駐的防火牆代理程式逾時")
+            return None
+        if isinstance(result[0], Exception):
+            # 代理程式已結束：移除過期的連線資訊
+            logger.debug(f"常駐的防火牆代理程式無法連線: {result[0]}")
+            remove_session(self.session_path)
+            return None
+        logger.info("已連線到常駐的防火牆代理程式")
+        return result[0]
+
+    def _launch(self):
+        """啟動代理程式並等待它連回，代理程式未在時限內連回（或提前結束）時拋出 BackendUnavailableError"""
+        authkey = os.urandom(32)
+        listener = Listener((HOST, 0), authkey=authkey)
+        port = listener.address[1]
+        accepted = []
+        expired = threading.Event()
+
+        def accept():
+            while not expired.is_set():
+                try:
+                    accepted.append(listener.accept())
+                    return
+                except (AuthenticationError, EOFError):
+                    if not expired.is_set():
+                        logger.warning("拒絕未通過驗證的代理程式連線")
+                except OSError:
+                    return
+
+        thread = threading.Thread(target=accept, name="broker-accept", daemon=True)
+        thread.start()
+        exited = False
+        try:
+            process = self.launcher(broker_argv(self.remote, port), authkey)
+            deadline = time.monotonic() + self.LAUNCH_TIMEOUT
+            while thread.is_alive() and time.monotonic() < deadline:
+                thread.join(self.CONNECT_POLL)
+                if process is not None and process.poll() is not None:
+                    # 代理程式已結束（例如取消 pkexec 驗證），不必等到逾時
+                    thread.join(self.CONNECT_POLL)
+                    exited = True
+                    break
+        finally:
+            expired.set()
+            if thread.is_alive():
+                # 以一個空連線喚醒阻塞中的 accept()
+                try:
+                    socket.create_connection((HOST, port), timeout=1).close()
+                except OSError:
+                    pass
+                thread.join(1)
+            listener.close()
+        if not accepted:
+            if exited:
+                raise BackendUnavailableError(f"防火牆代理程式未連線就已結束 (代碼: {process.returncode})")
+            raise BackendUnavailableError("等待防火牆代理程式啟動逾時")
+        connection = accepted[0]
+        # 代理程式連回後先告知常駐的埠與金鑰，供之後的 UI 連線
+        try:
+            if not connection.poll(self.LAUNCH_TIMEOUT):
+                raise BackendUnavailableError("等待防火牆代理程式回應逾時")
+            kind, broker_port, broker_key = decode(connection.recv_bytes(MAX_MESSAGE))
+            if kind != 'hello' or not isinstance(broker_port, int):
+                raise ValueError(kind)
+            broker_key = bytes.fromhex(broker_key)
+        except (EOFError, OSError, ValueError, TypeError) as e:
+            connection.close()
+            raise BackendUnavailableError(f"防火牆代理程式的回應無效：{e}")
+        except BackendUnavailableError:
+            connection.close()
+            raise
+        write_session(self.session_path, broker_port, broker_key)
+        return connection
+
+    def request(self, method, *args, launch=True):
+        """送出一個請求並回傳結果，後端錯誤會以相同類型的 FirewallError 拋出"""
+        with self._lock:
+            for attempt in range(2):
+                connection = self._ensure(launch)
+                if connection is None:
+                    return None
+                try:
+                    connection.send_bytes(encode([method, list(args)]))
+                    reply = decode(connection.recv_bytes(MAX_MESSAGE))
+                    break
+                except (EOFError, OSError) as e:
+                    # 代理程式已結束（例如被關閉），重新連線或啟動後再試一次
+                    self._drop()
+                    if attempt:
+                        raise CommandExecutionError(f"與防火牆代理程式的連線中斷：{e}")
+        *reply, logs = reply
+        for level, message in logs:
+            logger.log(level, f"[代理程式] {message}")
+        if reply[0] == 'ok':
+            return reply[1]
+        _, error_name, message = reply
+        error_class = getattr(errors, error_name, FirewallError)
+        if not (isinstance(error_class, type) and issubclass(error_class, FirewallError)):
+            error_class = FirewallError
+        raise error_class(message)
+
+    def _drop(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def start(self):
+        # 只沿用已連線的代理程式，不在啟動時觸發 UAC
+        try:
+            self.request('start', launch=False)
+        except FirewallError as e:
+            logger.warning(f"防火牆代理程式初始化失敗: {e}")
+
+    def close(self):
+        # 只關閉連線，代理程式繼續常駐供下次開啟的 UI 使用
+        with self._lock:
+            self._drop()
+
+    def shutdown_broker(self):
+        """要求常駐的代理程式結束"""
+        self.request('shutdown', launch=False)
+        self.close()
+        remove_session(self.session_path)
+
+    def rule_exists(self, name):
+        return self.request('rule_exists', name)
+
+    def get_rule(self, name):
+        return self.request('get_rule', name)
+
+    def add_rule(self, name, local_ports, enabled=True):
+        return self.request('add_rule', name, local_ports, enabled)
+
+    def set_rule_enabled(self, name, enabled):
+        return self.request('set_rule_enabled', name, enabled)
+
+    def update_rule(self, name, local_ports, enabled):
+        return self.request('update_rule', name, local_ports, enabled)
+
+    def delete_rule(self, name):
+        return self.request('delete_rule', name)
+
+    def snapshot(self, owned=None):
+        # 判斷函式無法傳給代理程式，取得全部規則後在本機篩選
+        snapshot = snapshot_from_json(self.request('snapshot'))
+        if owned is None:
+            return snapshot
+        return RuleSnapshot(record for record in snapshot if owned(record.name))
+
+
+class LocalBroker:
+    """
+    在目前行程的背景執行緒中執行的代理程式（預設使用 FakeBackend），供測試使用。
+    client() 回傳的 BrokerBackend 需要代理程式時由 launch() 在背景執行緒中連回，不會啟動任何外部行程；
+    連線資訊寫在暫存目錄中，之後的 client(launch=False) 會沿用同一個代理程式。
+    """
+
+    def __init__(self, backend=None, session_path=None):
+        self.backend = backend or FakeBackend()
+        self.server = BrokerServer(self.backend)
+        self._directory = None
+        if session_path is None:
+            self._directory = tempfile.TemporaryDirectory(prefix='broker-')
+            session_path = os.path.join(self._directory.name, SESSION_FILE)
+        self.session_path = session_path
+        self._thread = None
+
+    def launch(self, argv, authkey):
+        port = int(argv[argv.index('--port') + 1])
+
+        def run():
+            try:
+                connection = Client((HOST, port), authkey=authkey)
+            except (OSError, AuthenticationError, EOFError) as e:
+                logger.error(f"本機代理程式無法連線: {e}")
+                return
+            self.server.run(connection)
+
+        self._thread = threading.Thread(target=run, name="local-broker", daemon=True)
+        self._thread.start()
+        return None
+
+    def client(self, launch=True):
+        return BrokerBackend('fake', launcher=self.launch if launch else None, session_path=self.session_path)
+
+    def stop(self):
+        """停止代理程式並等待它結束"""
+        self.server.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._directory is not None:
+            self._directory.cleanup()
+
+
+def _read_authkey(value):
+    if value == '-':
+        value = sys.stdin.readline()
+    return bytes.fromhex(value.strip())
+
+
+def main(argv=None):
+    """代理程式進入點（main.py --broker），回傳結束代碼"""
+    parser = argparse.ArgumentParser(prog="WarframePairBlockTool --broker")
+    parser.add_argument('--broker', action='store_true')
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--authkey', required=True, help="一次性金鑰（hex），- 表示由標準輸入讀取")
+    args = parser.parse_args(argv)
+
+    # 不寫 log 檔：log 隨回應送回 UI（開發時另外輸出到 stderr）
+    logger.remove()
+    if sys.stderr:
+        logger.add(sys.stderr, level="DEBUG")
+
+    try:
+        authkey = _read_authkey(args.authkey)
+    except (AttributeError, OSError, ValueError):
+        logger.error("無法讀取代理程式的一次性金鑰")
+        return 2
+    try:
+        connection = Client((HOST, args.port), authkey=authkey)
+    except (OSError, AuthenticationError, EOFError) as e:
+        logger.error(f"無法連線到 UI: {e}")
+        return 1
+
+    server = BrokerServer(args.backend)
+    logger.add(server.log_sink, level="INFO", format="{message}")
+    if not server.controller.start():
+        logger.warning(f"防火牆後端初始化失敗: {server.controller.last_error}")
+    try:
+        server.run(connection)
+    finally:
+        server.controller.close()
+    return 0
+
+
+if __name__ == "__main__":
+    # 以本機代理程式示範：所有操作都經過連線，由代理程式中的 FakeBackend 執行
+    broker = LocalBroker()
+    backend = broker.client()
+    backend.add_rule('WarframePairBlockPort', '4950-4955', False)
+    backend.set_rule_enabled('WarframePairBlockPort', True)
+    print("規則:", backend.get_rule('WarframePairBlockPort'))
+    print("快照:", list(backend.snapshot(lambda name: name.startswith('Warframe'))))
+    try:
+        backend.delete_rule('WarframePairBlockMissing')
+    except FirewallError as e:
+        print("錯誤類型:", type(e).__name__, e)
+    start = time.perf_counter()
+    for _ in range(200):
+        backend.get_rule('WarframePairBlockPort')
+    print(f"往返延遲: {(time.perf_counter() - start) / 200 * 1000:.3f} ms")
+    for request in (b'\x80\x04cos\nsystem\n', encode(['close', []]), encode(['add_rule', ['Other', '1', True]]),
+                    encode(['set_rule_enabled', ['WarframePairBlockPort', 1]])):
+        reply = broker.server.dispatch(request)
+        assert reply[0] == 'error', reply
+        print("拒絕:", reply[2])
+    print("代理程式端呼叫:", broker.backend.calls[:3])
+    backend.close()
+    # 重新開啟的 UI（不自動啟動）經由連線資訊沿用常駐的代理程式
+    reopened = broker.client(launch=False)
+    reopened.start()
+    assert reopened.is_ready()
+    print("沿用常駐代理程式:", reopened.get_rule('WarframePairBlockPort'))
+    reopened.close()
+    broker.stop()
+
+    # 後端無法使用時在代理程式中退回備援後端（模擬 COM → netsh）
+    class UnavailableBackend(FakeBackend):
+        name = 'unavailable'
+        fallback = 'fake'
+
+        def add_rule(self, name, local_ports, enabled=True):
+            raise BackendUnavailableError("模擬 COM 無法使用")
+
+    broker = LocalBroker(UnavailableBackend())
+    backend = broker.client()
+    backend.add_rule('WarframePairBlockPort', '4950-4955', False)
+    print("備援後端:", backend.request('ping'), backend.get_rule('WarframePairBlockPort'))
+    assert backend.request('ping') == 'fake'
+    backend.close()
+    broker.stop()
+
+    # 實際啟動代理程式行程（不提升權限、fake 後端）：一次性金鑰經由標準輸入傳遞，
+    # 關閉連線後代理程式常駐，下一個 client 沿用它，shutdown_broker() 才結束
+    with tempfile.TemporaryDirectory() as directory:
+        session_path = os.path.join(directory, SESSION_FILE)
+        remote = BrokerBackend('fake', launcher=launch_unprivileged, session_path=session_path)
+        remote.add_rule('WarframePairBlockPort', '3074', True)
+        print("代理程式行程:", remote.request('ping'), remote.get_rule('WarframePairBlockPort'))
+        remote.close()
+        remote = BrokerBackend('fake', launcher=None, session_path=session_path)
+        print("重新連線:", remote.get_rule('WarframePairBlockPort'))
+        remote.shutdown_broker()
+        assert not os.path.exists(session_path)
@@ -0,0 +1,30 @@
+class FirewallError(Exception):
+    """防火牆操作錯誤基類"""
+    pass
+
+class CommandExecutionError(FirewallError):
+    """執行命令時發生錯誤"""
+    pass
+
+class CommandTimeoutError(CommandExecutionError):
+    """命令超過時限未完成（已強制結束整個行程樹）"""
+    def __init__(self, message, command=None, timeout=None):
+        super().__init__(message)
+        self.command = command
+        self.timeout = timeout
+
+class RuleCreationError(FirewallError):
+    """建立規則時發生錯誤"""
+    pass
+
+class RuleDeletionError(FirewallError):
+    """刪除規則時發生錯誤"""
+    pass
+
+class RuleUpdateError(FirewallError):
+    """修改規則（啟用/停用）時發生錯誤"""
+    pass
+
+class BackendUnavailableError(FirewallError):
+    """防火牆後端無法使用（例如 COM 初始化失敗）"""
+    pass
@@ -1,102 +1,319 @@
 import subprocess
 import os
+import threading
 
-class FirewallError(Exception):
-    """防火牆操作錯誤基類"""
-    pass
+from loguru import logger
 
-class CommandExecutionError(FirewallError):
-    """執行命令時發生錯誤"""
-    pass
-
-class RuleCreationError(FirewallError):
-    """建立規則時發生錯誤"""
-    pass
-
-class RuleDeletionError(FirewallError):
-    """刪除規則時發生錯誤"""
-    pass
+from .backends import FirewallBackend, create_backend
+from .ports import PortSet, same_ports
+from .registry import create_registry
+from .reconciler import RuleTarget, apply_plan, expected_state, plan
+from .errors import (
+    BackendUnavailableError,
+    CommandExecutionError,
+    FirewallError,
+    RuleCreationError,
+    RuleDeletionError,
+    RuleUpdateError
+)
 
 class FirewallController:
     RULE_NAME = 'WarframePairBlockPort'
-    RULE_BASE = 'netsh advfirewall firewall'
+    # 本工具建立的規則名稱前綴，一次快照只保留這些規則
+    OWNED_PREFIX = 'WarframePairBlock'
     MMC_COMMAND = 'mmc wf.msc'
 
     STATUS_BLOCKED = 'blocked'
     STATUS_NORMAL = 'normal'
     STATUS_UNKNOWN = 'unknown'
 
-    def __init__(self):
+    # 快取尚未有任何結果時的標記
+    _CACHE_EMPTY = object()
+
+    def __init__(self, backend='auto', session=None, registry='auto'):
+        """
+        - backend: 後端名稱（auto / com / netsh / nft / fake）或 FirewallBackend 實例
+        - session: 提供給 netsh 後端使用的命令 session
+        - registry: 唯讀的登錄快速路徑（auto / none 或 RuleRegistry 實例），
+          auto 只在 Windows 上啟用
+        """
         self.rule_name = self.RULE_NAME
         self.last_error = None
+        self._session = session
+        self._backend = None
+        self.backend_name = 'auto'
+        # 規則狀態快取：由自身操作的結果更新，背景檢查只負責偵測外部變更
+        # 內容為 get_rule 的結果（None 表示規則不存在）
+        self._cache_lock = threading.Lock()
+        self._rule_cache = self._CACHE_EMPTY
+        self._generation = 0
+        self.snapshot = None
+        self._registry_spec = registry
+        self._registry = None
+        self.set_backend(backend)
+
+    @property
+    def backend(self):
+        """目前使用中的後端（第一次使用時才建立）"""
+        if self._backend is None:
+            self._backend = create_backend(self.backend_name, self._session)
+            logger.info(f"使用防火牆後端: {self._backend.name}")
+        return self._backend
+
+    @property
+    def registry(self):
+        """登錄快速路徑（第一次使用時才建立），無法使用時為 None"""
+        if self._registry_spec is not None:
+            self._registry = create_registry(self._registry_spec)
+            self._registry_spec = None
+        return self._registry
+
+    def set_backend(self, backend):
+        """切換後端，可傳入名稱或 FirewallBackend 實例"""
+        if isinstance(backend, FirewallBackend):
+            new_backend, name = backend, backend.name
+        else:
+            new_backend, name = None, backend or 'auto'
+            if self._backend is not None and name == self.backend_name:
+                return
+        if self._backend is not None and self._backend is not new_backend:
+            self._backend.close()
+        self._backend = new_backend
+        self.backend_name = name
 
-    def run_command(self, command):
+    def start(self):
+        """預先初始化後端，讓第一次切換不必等待初始化"""
         try:
-            # 使用 UTF-8 編碼和環境設定
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                
-            process = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True,
-                encoding='utf-8',  # 明確指定 UTF-8 編碼
-                errors='replace',  # 處理無法解碼的字元
-                startupinfo=startupinfo
-            )
-            return process.returncode, process.stdout, process.stderr
-        except Exception as e:
+            self._call('start')
+            return True
+        except FirewallError as e:
             self.last_error = str(e)
-            raise CommandExecutionError(f"執行命令時發生錯誤：{e}")
+            return False
 
-    def get_rule_status(self):
-        command = f'{self.RULE_BASE} show rule name={self.rule_name} dir=out'
+    def close(self):
+        """釋放後端資源"""
+        if self._backend is not None:
+            self._backend.close()
+        if self._registry is not None:
+            self._registry.close()
+
+    def _call(self, method, *args):
+        """呼叫後端方法，後端無法使用時退回其備援後端（例如 COM 退回 netsh）並重試"""
+        backend = self.backend
         try:
-            code, _, _ = self.run_command(command)
-            if code == 0:
-                return self.STATUS_BLOCKED
-            elif code == 1:
-                return self.STATUS_NORMAL
+            return getattr(backend, method)(*args)
+        except BackendUnavailableError as e:
+            self.last_error = str(e)
+            if backend.fallback is None:
+                raise CommandExecutionError(str(e))
+            logger.warning(f"{backend.name} 後端操作失敗，改用 {backend.fallback}: {e}")
+            backend.close()
+            self._backend = create_backend(backend.fallback, self._session)
+            return getattr(self._backend, method)(*args)
+
+    def _remember(self, rule):
+        """以自身操作的結果更新快取"""
+        with self._cache_lock:
+            self._generation += 1
+            self._rule_cache = rule
+
+    def _status_of(self, rule):
+        if rule is self._CACHE_EMPTY:
             return self.STATUS_UNKNOWN
+        # 預建的規則為停用狀態，只有啟用時才算阻斷中
+        if rule is None or rule["enabled"] is False:
+            return self.STATUS_NORMAL
+        return self.STATUS_BLOCKED
+
+    def cached_status(self):
+        """從快取取得規則狀態，不會執行任何後端操作"""
+        return self._status_of(self._rule_cache)
+
+    def is_owned(self, name):
+        return name.startswith(self.OWNED_PREFIX)
+
+    def inspect(self):
+        """
+        以單次查詢取得所有本工具建立的規則（RuleSnapshot），並更新快取。
+        啟動檢查、重複規則偵測與狀態顯示都由這份快照回答。
+        """
+        snapshot = self._call('snapshot', self.is_owned)
+        for name, count in snapshot.duplicates().items():
+            logger.warning(f"偵測到 {count} 條重複的防火牆規則: {name}")
+        self.snapshot = snapshot
+        rule = snapshot.summary(self.rule_name)
+        self._remember(rule)
+        return rule
+
+    def _read_rule(self, launch=True):
+        """
+        查詢規則目前狀態：優先讀取登錄機碼的單一值（不啟動任何行程），
+        快速路徑無法使用時才透過後端查詢。
+        launch=False 時後端尚未就緒（例如代理程式還沒啟動，啟動需要確認 UAC）就不查詢，拋出 BackendUnavailableError。
+        """
+        registry = self.registry
+        if registry is not None:
+            try:
+                return registry.find(self.rule_name)
+            except Exception as e:
+                logger.warning(f"讀取登錄機碼失敗，改用後端查詢: {e}")
+        if not launch and not self.backend.is_ready():
+            raise BackendUnavailableError(f"{self.backend_name} 後端尚未就緒")
+        return self._call('get_rule', self.rule_name)
+
+    def get_rule_status(self):
+        try:
+            if self.registry is not None:
+                rule = self._read_rule()
+                self._remember(rule)
+            else:
+                rule = self.inspect()
         except Exception as e:
             self.last_error = str(e)
             return self.STATUS_UNKNOWN
+        return self._status_of(rule)
+
+    def refresh_status(self):
+        """
+        重新查詢規則並更新快取（供背景檢查偵測外部變更）。
+        背景檢查不是使用者的操作，後端尚未就緒時（代理程式未啟動）不為此啟動它，直接回傳快取的狀態。
+        查詢期間若有自身操作完成，查詢結果可能已過期，直接捨棄。
+        回傳 (狀態是否改變, 目前狀態)。
+        """
+        with self._cache_lock:
+            generation = self._generation
+        try:
+            rule = self._read_rule(launch=False)
+        except BackendUnavailableError:
+            return False, self.cached_status()
+        except FirewallError as e:
+            self.last_error = str(e)
+            return False, self.cached_status()
+
+        with self._cache_lock:
+            if generation != self._generation:
+                return False, self._status_of(self._rule_cache)
+            previous = self._status_of(self._rule_cache)
+            self._rule_cache = rule
+            current = self._status_of(rule)
+        return current != previous, current
+
+    def cached_rule(self):
+        """從快取取得規則內容（不存在或尚未查詢時回傳 None），不會執行任何後端操作"""
+        cached = self._rule_cache
+        return cached if isinstance(cached, dict) else None
+
+    def known_rule(self):
+        """取得目前已知的規則狀態：優先使用快取，快取為空時才以單次快照查詢後端"""
+        cached = self._rule_cache
+        if cached is self._CACHE_EMPTY:
+            cached = self.inspect()
+        return cached
+
+    def apply_target(self, target):
+        """
+        把規則調整到目標狀態（RuleTarget）：依已知狀態計算最少的後端操作並一次套用，
+        中途失敗會復原已完成的操作。快取過期導致失敗時，重新查詢後再試一次。
+        已到期的阻斷目標會改為解除阻斷。
+        回傳套用後規則是否為啟用（阻斷中）。
+        """
+        if target.enabled and target.is_expired():
+            logger.info("阻斷目標已到期，改為解除阻斷")
+            target = RuleTarget(target.ports, False)
+
+        current = self.known_rule()
+        operations = plan(self.rule_name, target, current)
+        if not operations:
+            logger.debug(f"規則已符合目標，不需要操作: {target}")
+            return target.enabled
+
+        logger.debug(f"套用目標 {target}: {operations}")
+        try:
+            try:
+                apply_plan(self._call, operations)
+            except FirewallError as e:
+                # 快取可能已過期（例如規則被外部刪除），重新查詢後再試一次
+                logger.warning(f"套用目標失敗，重新查詢規則後重試: {e}")
+                current = self._call('get_rule', self.rule_name)
+                self._remember(current)
+                operations = plan(self.rule_name, target, current)
+                apply_plan(self._call, operations)
+        except FirewallError as e:
+            self.last_error = str(e)
+            self._remember(current)
+            raise
+
+        self._remember(expected_state(target))
+        return target.enabled
+
+    def stage_rule(self, ports):
+        """
+        預先建立停用狀態的規則，之後阻斷/解除只需切換啟用旗標。
+        ports 可為 PortSet 或埠設定字串，所有區間合併在同一條規則中。
+        既有規則的埠範圍不符或有重複時一次重建，並保留原本的啟用狀態。
+        快取已確認相符時不會查詢後端。
+        回傳規則目前是否為啟用（阻斷中）。
+        """
+        ports = PortSet.parse(ports)
+        current = self.known_rule()
+        enabled = bool(current and current["enabled"])
+        if current is None or not same_ports(current["ports"], ports.to_localport()):
+            logger.info(f"預先建立規則: UDP {ports} ({'啟用' if enabled else '停用'})")
+        return self.apply_target(RuleTarget(ports, enabled))
+
+    def block(self, ports, until=None):
+        """阻斷指定的埠集合（單一規則、單次後端操作）；規則已預建時只需啟用"""
+        try:
+            self.apply_target(RuleTarget(PortSet.parse(ports), True, until))
+        except RuleCreationError:
+            raise
+        except FirewallError as e:
+            raise RuleCreationError(f"阻斷失敗：{e}")
+
+    def unblock(self):
+        """解除阻斷：停用規則但保留預建狀態（規則不存在時不做任何事）"""
+        try:
+            current = self.known_rule()
+            if current is None:
+                return
+            self.apply_target(RuleTarget(current["ports"], False))
+        except RuleDeletionError:
+            raise
+        except FirewallError as e:
+            raise RuleDeletionError(f"解除阻斷失敗：{e}")
 
     def create_rule(self, port_start: str, port_end: str):
-        command = f"{self.RULE_BASE} add rule name={self.rule_name} protocol=UDP dir=out localport={port_start}-{port_end} action=block"
         try:
-            code, _, stderr = self.run_command(command)
-            if code != 0:
-                self.last_error = stderr
-                raise RuleCreationError(f"建立防火牆規則失敗：{stderr}")
-            return code
-        except CommandExecutionError as e:
+            self._call('add_rule', self.rule_name, f"{port_start}-{port_end}")
+            self._remember({"ports": f"{port_start}-{port_end}", "enabled": True, "count": 1})
+            return 0
+        except RuleCreationError as e:
+            self.last_error = str(e)
+            raise
+        except FirewallError as e:
             self.last_error = str(e)
             raise RuleCreationError(f"建立防火牆規則失敗：{e}")
 
     def enable_rule(self):
-        command = f'{self.RULE_BASE} set rule name={self.rule_name} new enable=yes'
         try:
-            code, _, stderr = self.run_command(command)
-            if code != 0:
-                self.last_error = stderr
-            return code
+            self._call('set_rule_enabled', self.rule_name, True)
+            cached = self._rule_cache
+            if isinstance(cached, dict):
+                self._remember(dict(cached, enabled=True))
+            return 0
         except Exception as e:
             self.last_error = str(e)
             return -1
 
     def delete_rule(self):
-        command = f'{self.RULE_BASE} delete rule name={self.rule_name}'
         try:
-            code, _, stderr = self.run_command(command)
-            if code != 0:
-                self.last_error = stderr
-                raise RuleDeletionError(f"刪除防火牆規則失敗：{stderr}")
-            return code
-        except CommandExecutionError as e:
+            self._call('delete_rule', self.rule_name)
+            self._remember(None)
+            return 0
+        except RuleDeletionError as e:
+            self.last_error = str(e)
+            raise
+        except FirewallError as e:
             self.last_error = str(e)
             raise RuleDeletionError(f"刪除防火牆規則失敗：{e}")
 
@@ -129,22 +346,31 @@ if __name__ == "__main__":
     import sys
     import time
 
+    # --fake：使用記憶體內假後端，不需要管理員權限也不會動到防火牆
+    use_fake = "--fake" in sys.argv
+
     def is_admin():
         try:
             return ctypes.windll.shell32.IsUserAnAdmin()
         except:
             return False
 
-    if not is_admin():
+    if not use_fake and not is_admin():
         ctypes.windll.shell32.ShellExecuteW(
             None, "runas", sys.executable, __file__, None, 1
         )
         sys.exit()
 
     print("🧪 啟動 FirewallController 測試...")
-    fw = FirewallController()
+    fw = FirewallController(backend="fake" if use_fake else "auto")
+    print("🔧 使用後端:", fw.backend.name)
 
     print("🔍 檢查規則狀態:", fw.get_rule_status())
+    if fw.snapshot is not None:
+        print("📋 規則快照:", list(fw.snapshot))
+    else:
+        # 登錄快速路徑只讀取單一規則，不會取得快照
+        print("📋 規則（登錄）:", fw.cached_rule())
 
     print("➕ 建立封鎖規則...")
     code = fw.create_rule("4950", "4955")
@@ -161,5 +387,8 @@ if __name__ == "__main__":
     code = fw.delete_rule()
     print("delete_rule:", "成功" if code == 0 else "失敗", "(代碼:", code, ")")
 
-    print("📂 嘗試開啟防火牆 MMC（視窗應彈出）...")
-    fw.open_firewall_ui()
+    if use_fake:
+        print("📜 後端呼叫紀錄:", fw.backend.calls)
+    else:
+        print("📂 嘗試開啟防火牆 MMC（視窗應彈出）...")
+        fw.open_firewall_ui()
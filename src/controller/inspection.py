@@ -0,0 +1,169 @@
+from bisect import bisect_right
+
+from .ports import PortSet
+
+
+class RuleRecord:
+    """
+    單一防火牆規則的精簡紀錄。
+
+    - name: 規則名稱
+    - enabled: 是否啟用（無法判斷時為 None）
+    - outbound / block: 是否為輸出方向 / 封鎖動作（無法判斷時為 None）
+    - protocol: 通訊協定字串（例如 "UDP"）
+    - ports: localport 字串（例如 "4950-4955,5000"，Any 時為 "Any"）
+    """
+    __slots__ = ('name', 'enabled', 'outbound', 'block', 'protocol', 'ports')
+
+    def __init__(self, name, enabled=None, outbound=None, block=None, protocol=None, ports=None):
+        self.name = name
+        self.enabled = enabled
+        self.outbound = outbound
+        self.block = block
+        self.protocol = protocol
+        self.ports = ports
+
+    def port_set(self):
+        """規則涵蓋的 PortSet，Any 或無法解析時回傳 None"""
+        try:
+            return PortSet.parse(self.ports)
+        except ValueError:
+            return None
+
+    def __repr__(self):
+        return (f"RuleRecord({self.name!r}, enabled={self.enabled}, "
+                f"protocol={self.protocol!r}, ports={self.ports!r})")
+
+
+class RuleSnapshot:
+    """
+    單次查詢得到的規則快照，依名稱與埠建立索引。
+    啟動檢查、重複規則偵測與狀態顯示都從同一份快照回答，不必再個別查詢。
+    """
+    __slots__ = ('records', '_by_name', '_starts', '_intervals')
+
+    def __init__(self, records=()):
+        self.records = tuple(records)
+        self._by_name = {}
+        intervals = []
+        for record in self.records:
+            self._by_name.setdefault(record.name, []).append(record)
+            ports = record.port_set()
+            if ports is not None:
+                intervals.extend((start, end, record) for start, end in ports)
+        intervals.sort(key=lambda item: item[0])
+        self._intervals = intervals
+        self._starts = [start for start, _, _ in intervals]
+
+    def named(self, name):
+        """同名的所有規則紀錄"""
+        return list(self._by_name.get(name, ()))
+
+    def covering(self, port):
+        """所有 localport 涵蓋指定埠的規則紀錄"""
+        end_index = bisect_right(self._starts, port)
+        return [record for start, end, record in self._intervals[:end_index] if port <= end]
+
+    def duplicates(self):
+        """有重複同名規則的名稱與數量"""
+        return {name: len(records) for name, records in self._by_name.items() if len(records) > 1}
+
+    def summary(self, name):
+        """
+        轉成後端 get_rule 的格式：{"ports", "enabled", "count"}，規則不存在時回傳 None。
+        有重複規則時 ports / enabled 只在所有紀錄一致時才有值。
+        """
+        records = self._by_name.get(name)
+        if not records:
+            return None
+        first = records[0]
+        same = all(r.ports == first.ports and r.enabled == first.enabled for r in records)
+        return {
+            "ports": first.ports if same else None,
+            "enabled": first.enabled if same else None,
+            "count": len(records)
+        }
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+# netsh show rule verbose 的欄位名稱與值會依系統語系而不同
+RULE_NAME_KEYS = ('Rule Name', '規則名稱', '规则名称')
+ENABLED_KEYS = ('Enabled', '已啟用', '已启用')
+DIRECTION_KEYS = ('Direction', '方向')
+ACTION_KEYS = ('Action', '動作', '操作')
+PROTOCOL_KEYS = ('Protocol', '通訊協定', '协议')
+LOCAL_PORT_KEYS = ('LocalPort', '本機連接埠', '本地端口')
+YES_VALUES = ('Yes', '是')
+OUT_VALUES = ('Out', '輸出', '出')
+BLOCK_VALUES = ('Block', '封鎖', '阻止')
+
+
+def parse_netsh_rules(text, owned=None):
+    """
+    解析 netsh advfirewall firewall show rule ... verbose 的輸出。
+    owned 為名稱判斷函式，只保留回傳 True 的規則（None 表示全部保留）。
+    """
+    records = []
+    record = None
+    for line in text.splitlines():
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        key, value = key.strip(), value.strip()
+        if key in RULE_NAME_KEYS:
+            record = RuleRecord(value)
+            if owned is None or owned(value):
+                records.append(record)
+        elif record is None:
+            continue
+        elif key in ENABLED_KEYS:
+            record.enabled = value in YES_VALUES
+        elif key in DIRECTION_KEYS:
+            record.outbound = value in OUT_VALUES
+        elif key in ACTION_KEYS:
+            record.block = value in BLOCK_VALUES
+        elif key in PROTOCOL_KEYS:
+            record.protocol = value
+        elif key in LOCAL_PORT_KEYS:
+            record.ports = value
+    return records
+
+
+if __name__ == "__main__":
+    sample = """
+Rule Name:                            WarframePairBlockPort
+----------------------------------------------------------------------
+Enabled:                              No
+Direction:                            Out
+Protocol:                             UDP
+LocalPort:                            4950-4955,5000
+Action:                               Block
+
+規則名稱:                             WarframePairBlockPort
+----------------------------------------------------------------------
+已啟用:                               是
+方向:                                 輸出
+通訊協定:                             UDP
+本機連接埠:                           4950-4955,5000
+動作:                                 封鎖
+
+Rule Name:                            Other
+----------------------------------------------------------------------
+Enabled:                              Yes
+Protocol:                             TCP
+LocalPort:                            4953
+Action:                               Allow
+Ok.
+"""
+    snapshot = RuleSnapshot(parse_netsh_rules(sample))
+    print("規則:", list(snapshot))
+    print("重複:", snapshot.duplicates())
+    print("涵蓋 4953:", [r.name for r in snapshot.covering(4953)])
+    print("摘要:", snapshot.summary("WarframePairBlockPort"))
+    owned = RuleSnapshot(parse_netsh_rules(sample, owned=lambda n: n.startswith("Warframe")))
+    print("工具規則數:", len(owned))
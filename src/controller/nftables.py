@@ -0,0 +1,235 @@
+import json
+import shutil
+import subprocess
+
+from loguru import logger
+
+from .backends import FirewallBackend
+from .errors import (
+    BackendUnavailableError,
+    CommandExecutionError,
+    CommandTimeoutError,
+    RuleCreationError,
+    RuleDeletionError,
+    RuleUpdateError
+)
+from .inspection import RuleRecord, RuleSnapshot
+from .ports import PortSet
+
+
+class NftablesBackend(FirewallBackend):
+    """
+    Linux（例如透過 Proton 執行遊戲）使用的 nftables 後端。
+
+    所有規則放在專用的 table 中，每條規則對應：
+    - set <name>_staged：規則涵蓋的埠（停用時仍保留，相當於預建的規則）
+    - set <name>：目前阻斷中的埠，啟用 = 放入元素，停用 = 清空元素
+    - chain <name>：掛在 output hook，只有一條 "udp sport @<name> drop"
+
+    阻斷/解除只新增或移除 set 元素，不重建規則；
+    每個操作都是單一 nft -f 批次，由核心以單一交易套用。
+    需要 CAP_NET_ADMIN，可在無特權的 user + network namespace 中執行（unshare -rn）。
+    """
+    name = 'nft'
+
+    NFT = 'nft'
+    TABLE = 'warframe_pair_block'
+    FAMILY = 'inet'
+    COMMAND_TIMEOUT = 4.0
+
+    def __init__(self, nft=None, timeout=COMMAND_TIMEOUT):
+        self.nft = nft or shutil.which(self.NFT)
+        if self.nft is None:
+            raise BackendUnavailableError("找不到 nft 指令，請安裝 nftables")
+        self.timeout = timeout
+        self.last_error = None
+        # 規則涵蓋的埠，啟用時不必再查詢 staged set
+        self._ports = {}
+
+    # ----- 命令執行 -----
+
+    def _run(self, args, batch=None):
+        try:
+            process = subprocess.run(
+                [self.nft] + args,
+                input=batch,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise CommandTimeoutError(f"nft 超過 {self.timeout} 秒未完成", args, self.timeout)
+        except OSError as e:
+            raise CommandExecutionError(f"執行 nft 時發生錯誤：{e}")
+        if process.returncode != 0:
+            self.last_error = process.stderr.strip()
+        return process.returncode, process.stdout, process.stderr.strip()
+
+    def apply_batch(self, lines, error=CommandExecutionError):
+        """以單一 nft -f 交易套用多行命令，任一行失敗則全部不生效"""
+        batch = '\n'.join(lines) + '\n'
+        logger.debug(f"nft 批次:\n{batch}")
+        try:
+            code, _, stderr = self._run(['-f', '-'], batch)
+        except CommandTimeoutError:
+            raise
+        except CommandExecutionError as e:
+            raise error(str(e))
+        if code != 0:
+            raise error(f"nft 批次套用失敗：{stderr}")
+
+    def _target(self, kind, name):
+        return f"{kind} {self.FAMILY} {self.TABLE} {name}"
+
+    @staticmethod
+    def _elements(ports):
+        """localport 字串轉成 nft 元素清單，例如 "{ 4950-4955, 5000 }" """
+        return '{ ' + ', '.join(
+            str(start) if start == end else f"{start}-{end}"
+            for start, end in PortSet.parse(ports)
+        ) + ' }'
+
+    def _fill(self, name, ports, enabled):
+        lines = [f"add element {self.FAMILY} {self.TABLE} {name}_staged {self._elements(ports)}"]
+        if enabled:
+            lines.append(f"add element {self.FAMILY} {self.TABLE} {name} {self._elements(ports)}")
+        return lines
+
+    # ----- 查詢 -----
+
+    def _list_table(self):
+        code, stdout, stderr = self._run(['-j', 'list', 'table', self.FAMILY, self.TABLE])
+        if code != 0:
+            if 'No such file or directory' in stderr:
+                return None
+            raise CommandExecutionError(f"查詢 nftables 失敗：{stderr}")
+        try:
+            return json.loads(stdout).get('nftables', [])
+        except ValueError as e:
+            raise CommandExecutionError(f"無法解析 nft 輸出：{e}")
+
+    @staticmethod
+    def _ranges(elements):
+        ranges = []
+        for element in elements or ():
+            if isinstance(element, dict) and 'elem' in element:
+                element = element['elem'].get('val')
+            if isinstance(element, int):
+                ranges.append((element, element))
+            elif isinstance(element, dict) and 'range' in element:
+                start, end = element['range']
+                ranges.append((int(start), int(end)))
+        return PortSet(ranges)
+
+    def snapshot(self, owned=None):
+        objects = self._list_table()
+        if not objects:
+            return RuleSnapshot()
+        sets = {}
+        chains = set()
+        for item in objects:
+            if 'set' in item:
+                sets[item['set']['name']] = self._ranges(item['set'].get('elem'))
+            elif 'chain' in item:
+                chains.add(item['chain']['name'])
+
+        records = []
+        for name in sorted(chains):
+            staged = sets.get(f"{name}_staged")
+            if staged is None or (owned is not None and not owned(name)):
+                continue
+            ports = staged.to_localport() if len(staged) else None
+            self._ports[name] = ports
+            records.append(RuleRecord(
+                name,
+                enabled=len(sets.get(name, ())) > 0,
+                outbound=True,
+                block=True,
+                protocol='UDP',
+                ports=ports
+            ))
+        return RuleSnapshot(records)
+
+    def rule_exists(self, name):
+        try:
+            return self.get_rule(name) is not None
+        except CommandExecutionError:
+            return None
+
+    def get_rule(self, name):
+        return self.snapshot().summary(name)
+
+    # ----- 修改 -----
+
+    def add_rule(self, name, local_ports, enabled=True):
+        # add table/set/chain 已存在時不會失敗，但 add rule 與 add element 會累加；
+        # 先清空 chain 與 set 再重建，重複呼叫（例如重建殘留的規則）結果相同
+        lines = [
+            f"add table {self.FAMILY} {self.TABLE}",
+            f"add {self._target('set', name + '_staged')} {{ type inet_service; flags interval; }}",
+            f"add {self._target('set', name)} {{ type inet_service; flags interval; }}",
+            f"add {self._target('chain', name)} {{ type filter hook output priority 0; policy accept; }}",
+            f"flush {self._target('chain', name)}",
+            f"flush {self._target('set', name + '_staged')}",
+            f"flush {self._target('set', name)}",
+            f"add rule {self.FAMILY} {self.TABLE} {name} udp sport @{name} drop",
+        ] + self._fill(name, local_ports, enabled)
+        self.apply_batch(lines, RuleCreationError)
+        self._ports[name] = local_ports
+
+    def set_rule_enabled(self, name, enabled):
+        if enabled:
+            ports = self._ports.get(name)
+            if ports is None:
+                rule = self.get_rule(name)
+                if rule is None or rule["ports"] is None:
+                    raise RuleUpdateError(f"找不到防火牆規則：{name}")
+                ports = rule["ports"]
+            lines = [f"add element {self.FAMILY} {self.TABLE} {name} {self._elements(ports)}"]
+        else:
+            lines = [f"flush {self._target('set', name)}"]
+        self.apply_batch(lines, RuleUpdateError)
+
+    def update_rule(self, name, local_ports, enabled):
+        lines = [
+            f"flush {self._target('set', name + '_staged')}",
+            f"flush {self._target('set', name)}",
+        ] + self._fill(name, local_ports, enabled)
+        self.apply_batch(lines, RuleUpdateError)
+        self._ports[name] = local_ports
+
+    def delete_rule(self, name):
+        self.apply_batch([
+            f"flush {self._target('chain', name)}",
+            f"delete {self._target('chain', name)}",
+            f"delete {self._target('set', name)}",
+            f"delete {self._target('set', name + '_staged')}",
+        ], RuleDeletionError)
+        self._ports.pop(name, None)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    # 非 root 時在無特權的 user + network namespace 中重新執行，不會影響主機防火牆
+    if os.geteuid() != 0 and 'NFT_DEMO_NS' not in os.environ:
+        os.environ['NFT_DEMO_NS'] = '1'
+        os.execvp('unshare', ['unshare', '--user', '--map-root-user', '--net',
+                              sys.executable, '-m', 'src.controller.nftables'])
+
+    backend = NftablesBackend()
+    name = 'WarframePairBlockPort'
+    backend.add_rule(name, '4950-4955,5000', enabled=False)
+    backend.add_rule(name, '4950-4955,5000', enabled=False)
+    print("預建:", backend.get_rule(name))
+    rules = [item for item in backend._list_table() if 'rule' in item]
+    assert len(rules) == 1, "重複 add_rule 不應累加規則"
+    backend.set_rule_enabled(name, True)
+    print("阻斷:", backend.get_rule(name))
+    backend.set_rule_enabled(name, False)
+    print("解除:", backend.get_rule(name))
+    backend.update_rule(name, '3074-3080', True)
+    print("修改:", backend.get_rule(name))
+    backend.delete_rule(name)
+    print("刪除:", backend.get_rule(name))
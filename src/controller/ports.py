@@ -0,0 +1,112 @@
+import re
+
+
+class PortSet:
+    """
+    UDP 埠的區間集合。
+
+    建立時即正規化：排序並合併重疊或相鄰的區間，
+    因此任何選擇都能以單一條規則的 localport 清單表示。
+
+    可解析的格式（可用逗號或分號分隔多段）：
+    - "4950-4955"、"5000"
+    - "4950 & 4955"（舊版下拉選單格式，代表 4950-4955 的範圍）
+    """
+    __slots__ = ('ranges',)
+
+    MIN_PORT = 1
+    MAX_PORT = 65535
+
+    _SEPARATORS = re.compile(r'[,;，]')
+    _RANGE = re.compile(r'^(\d+)\s*(?:[-&~]\s*(\d+))?$')
+
+    def __init__(self, ranges=()):
+        self.ranges = self._normalize(ranges)
+
+    @classmethod
+    def parse(cls, text):
+        """解析使用者輸入或 localport 字串，格式錯誤時拋出 ValueError"""
+        if isinstance(text, PortSet):
+            return text
+        ranges = []
+        for part in cls._SEPARATORS.split(text or ''):
+            part = part.strip()
+            if not part:
+                continue
+            match = cls._RANGE.match(part)
+            if not match:
+                raise ValueError(f"無法解析的埠設定: {part}")
+            start = int(match.group(1))
+            end = int(match.group(2) or start)
+            ranges.append((start, end))
+        if not ranges:
+            raise ValueError("未指定任何埠")
+        return cls(ranges)
+
+    @classmethod
+    def _normalize(cls, ranges):
+        items = []
+        for start, end in ranges:
+            if start > end:
+                start, end = end, start
+            if start < cls.MIN_PORT or end > cls.MAX_PORT:
+                raise ValueError(f"埠號超出範圍 ({cls.MIN_PORT}-{cls.MAX_PORT}): {start}-{end}")
+            items.append((start, end))
+        items.sort()
+
+        merged = []
+        for start, end in items:
+            # 與上一段重疊或相鄰（例如 4950-4955 與 4956）時合併
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return tuple(merged)
+
+    def union(self, other):
+        return PortSet(self.ranges + PortSet.parse(other).ranges)
+
+    def to_localport(self):
+        """輸出 netsh / COM 使用的最短 localport 清單，例如 "4950-4955,5000" """
+        return ','.join(str(s) if s == e else f"{s}-{e}" for s, e in self.ranges)
+
+    def __contains__(self, port):
+        return any(start <= port <= end for start, end in self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __eq__(self, other):
+        if isinstance(other, PortSet):
+            return self.ranges == other.ranges
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __str__(self):
+        return self.to_localport()
+
+    def __repr__(self):
+        return f"PortSet({self.to_localport()!r})"
+
+
+def same_ports(a, b):
+    """比較兩個 localport 字串是否代表相同的埠集合（無法解析時退回字串比較）"""
+    if a is None or b is None:
+        return a == b
+    try:
+        return PortSet.parse(a) == PortSet.parse(b)
+    except ValueError:
+        return a == b
+
+
+if __name__ == "__main__":
+    for text in ["4950 & 4955", "4950-4955, 4956, 4960-4965", "5000, 4990-5001; 3074 & 3080", "80-70"]:
+        ports = PortSet.parse(text)
+        print(f"{text!r:40} -> {ports.to_localport()}")
+    print(4957 in PortSet.parse("4950-4960"), same_ports("4950-4955,4956", "4950-4956"))
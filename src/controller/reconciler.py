@@ -0,0 +1,126 @@
+import time
+
+from loguru import logger
+
+from .ports import PortSet, same_ports
+
+
+class RuleTarget:
+    """
+    期望的規則狀態。
+
+    - ports: 規則涵蓋的埠（PortSet 或 localport 字串，例如 "4950-4955,5000"），
+      None 表示不需要規則
+    - enabled: 規則是否啟用（阻斷中）
+    - until: 阻斷到期的 time.monotonic() 時間，None 表示不會自動解除
+    """
+    __slots__ = ('ports', 'enabled', 'until')
+
+    def __init__(self, ports, enabled, until=None):
+        if isinstance(ports, PortSet):
+            ports = ports.to_localport()
+        self.ports = ports
+        self.enabled = bool(enabled)
+        self.until = until
+
+    def is_expired(self, now=None):
+        if self.until is None:
+            return False
+        return (time.monotonic() if now is None else now) >= self.until
+
+    def remaining(self, now=None):
+        """距離到期的秒數，沒有期限時回傳 None"""
+        if self.until is None:
+            return None
+        return max(self.until - (time.monotonic() if now is None else now), 0.0)
+
+    def __repr__(self):
+        return f"RuleTarget(ports={self.ports!r}, enabled={self.enabled}, until={self.until})"
+
+
+class Operation:
+    """單一後端操作與對應的復原操作"""
+    __slots__ = ('method', 'args', 'undo')
+
+    def __init__(self, method, args, undo=None):
+        self.method = method
+        self.args = args
+        self.undo = undo
+
+    def __repr__(self):
+        return f"{self.method}{self.args}"
+
+
+def plan(name, target, current):
+    """
+    計算從目前規則狀態（get_rule 的結果，None 表示不存在）到目標所需的最少後端操作。
+    建立規則時直接帶入啟用狀態，不會再多一次 set_rule_enabled。
+    """
+    if target.ports is None:
+        if current is None:
+            return []
+        return [Operation('delete_rule', (name,), _restore(name, current))]
+
+    if current is None:
+        return [Operation('add_rule', (name, target.ports, target.enabled),
+                          Operation('delete_rule', (name,)))]
+
+    if current["count"] == 1 and not same_ports(current["ports"], target.ports):
+        # 單一規則只是埠不同時原地修改，一次操作完成
+        undo = None
+        if current["ports"] is not None and current["enabled"] is not None:
+            undo = Operation('update_rule', (name, current["ports"], current["enabled"]))
+        return [Operation('update_rule', (name, target.ports, target.enabled), undo)]
+
+    if current["count"] != 1:
+        # 有重複的同名規則時整組重建
+        return [
+            Operation('delete_rule', (name,), _restore(name, current)),
+            Operation('add_rule', (name, target.ports, target.enabled),
+                      Operation('delete_rule', (name,)))
+        ]
+
+    if current["enabled"] != target.enabled:
+        undo = None
+        if current["enabled"] is not None:
+            undo = Operation('set_rule_enabled', (name, current["enabled"]))
+        return [Operation('set_rule_enabled', (name, target.enabled), undo)]
+
+    return []
+
+
+def _restore(name, current):
+    # 重複規則無法精確還原，只還原能確定內容的單一規則
+    if current["count"] != 1 or current["ports"] is None:
+        return None
+    return Operation('add_rule', (name, current["ports"], bool(current["enabled"])))
+
+
+def expected_state(target):
+    """目標套用成功後的規則狀態"""
+    if target.ports is None:
+        return None
+    return {"ports": target.ports, "enabled": target.enabled, "count": 1}
+
+
+def apply_plan(call, operations):
+    """
+    以 call(method, *args) 依序執行操作；中途失敗時反向執行已完成操作的復原，
+    再拋出原本的錯誤。
+    """
+    done = []
+    for operation in operations:
+        try:
+            call(operation.method, *operation.args)
+        except Exception:
+            if done:
+                logger.warning(f"操作 {operation} 失敗，復原已完成的 {len(done)} 個操作")
+            for finished in reversed(done):
+                if finished.undo is None:
+                    continue
+                try:
+                    call(finished.undo.method, *finished.undo.args)
+                except Exception as e:
+                    logger.error(f"復原操作 {finished.undo} 失敗: {e}")
+            raise
+        done.append(operation)
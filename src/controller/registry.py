@@ -0,0 +1,285 @@
+import os
+import threading
+
+from loguru import logger
+
+from .errors import BackendUnavailableError
+from .inspection import RuleRecord
+
+
+class RegistrySource:
+    """
+    防火牆規則登錄機碼（FirewallPolicy\\FirewallRules）的唯讀存取介面。
+    每條規則是一個值：值名稱為規則 ID，內容為 "v2.30|Action=Block|Active=TRUE|...|Name=...|"。
+
+    - read_values: 列舉所有值，回傳 {值名稱: 內容}
+    - read_value: 讀取單一值，不存在時回傳 None
+    - wait_for_change: 等待機碼內容變更，timeout 秒內有變更回傳 True
+    """
+
+    def read_values(self):
+        raise NotImplementedError
+
+    def read_value(self, value_name):
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WinRegistrySource(RegistrySource):
+    """透過 pywin32 讀取登錄機碼，並以 RegNotifyChangeKeyValue 接收變更通知"""
+
+    RULES_KEY = r'SYSTEM\CurrentControlSet\Services\SharedAccess\Parameters\FirewallPolicy\FirewallRules'
+
+    def __init__(self):
+        try:
+            import pywintypes
+            import win32api
+            import win32con
+            import win32event
+        except ImportError as e:
+            raise BackendUnavailableError(f"無法載入 pywin32 登錄模組：{e}")
+        self._error = pywintypes.error
+        self._api = win32api
+        self._con = win32con
+        self._event_api = win32event
+        try:
+            self._key = win32api.RegOpenKeyEx(
+                win32con.HKEY_LOCAL_MACHINE, self.RULES_KEY, 0,
+                win32con.KEY_READ | win32con.KEY_NOTIFY
+            )
+        except self._error as e:
+            raise BackendUnavailableError(f"無法開啟防火牆規則登錄機碼：{e}")
+        self._event = win32event.CreateEvent(None, False, False, None)
+        self._armed = False
+
+    def read_values(self):
+        values = {}
+        index = 0
+        while True:
+            try:
+                name, data, _ = self._api.RegEnumValue(self._key, index)
+            except self._error:
+                # ERROR_NO_MORE_ITEMS
+                return values
+            if isinstance(data, str):
+                values[name] = data
+            index += 1
+
+    def read_value(self, value_name):
+        try:
+            data, _ = self._api.RegQueryValueEx(self._key, value_name)
+        except self._error:
+            return None
+        return data if isinstance(data, str) else None
+
+    def wait_for_change(self, timeout):
+        # 通知只觸發一次，每次等待前重新登記
+        if not self._armed:
+            self._api.RegNotifyChangeKeyValue(
+                self._key, False, self._con.REG_NOTIFY_CHANGE_LAST_SET | self._con.REG_NOTIFY_CHANGE_NAME,
+                self._event, True
+            )
+            self._armed = True
+        result = self._event_api.WaitForSingleObject(self._event, int(timeout * 1000))
+        if result == self._event_api.WAIT_OBJECT_0:
+            self._armed = False
+            return True
+        return False
+
+    def close(self):
+        try:
+            self._api.RegCloseKey(self._key)
+        except self._error:
+            pass
+
+
+class DictRegistrySource(RegistrySource):
+    """以字典模擬的登錄機碼，供測試與非 Windows 環境使用"""
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.reads = 0
+        self._changed = threading.Event()
+
+    def set_value(self, value_name, data):
+        self.values[value_name] = data
+        self._changed.set()
+
+    def delete_value(self, value_name):
+        self.values.pop(value_name, None)
+        self._changed.set()
+
+    def read_values(self):
+        self.reads += len(self.values)
+        return dict(self.values)
+
+    def read_value(self, value_name):
+        self.reads += 1
+        return self.values.get(value_name)
+
+    def wait_for_change(self, timeout):
+        if self._changed.wait(timeout):
+            self._changed.clear()
+            return True
+        return False
+
+
+def parse_registry_rule(data):
+    """把登錄值內容解析成 RuleRecord，格式不符時回傳 None"""
+    fields = {}
+    ports = []
+    for part in data.split('|')[1:]:
+        key, sep, value = part.partition('=')
+        if not sep:
+            continue
+        if key == 'LPort':
+            ports.append(value)
+        else:
+            fields[key] = value
+    if 'Name' not in fields:
+        return None
+    protocol = fields.get('Protocol')
+    return RuleRecord(
+        fields['Name'],
+        enabled=fields.get('Active') == 'TRUE',
+        outbound=fields.get('Dir') == 'Out',
+        block=fields.get('Action') == 'Block',
+        protocol='UDP' if protocol == '17' else protocol,
+        ports=','.join(ports) if ports else 'Any'
+    )
+
+
+class RuleRegistry:
+    """
+    從登錄機碼快速回答規則是否存在與是否啟用。
+
+    第一次查詢時列舉一次找出規則的值名稱（規則 ID），
+    之後每次只讀取該單一值；值消失或名稱不符（規則被重建）時才重新列舉。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._ids = {}
+
+    def find(self, name):
+        """回傳 {"ports", "enabled", "count"}，規則不存在時回傳 None"""
+        value_name = self._ids.get(name)
+        if value_name is not None:
+            data = self.source.read_value(value_name)
+            record = parse_registry_rule(data) if data else None
+            if record is not None and record.name == name:
+                return {"ports": record.ports, "enabled": record.enabled, "count": 1}
+            del self._ids[name]
+        return self._scan(name)
+
+    def _scan(self, name):
+        marker = f'|Name={name}|'
+        records = []
+        for value_name, data in self.source.read_values().items():
+            if marker not in data:
+                continue
+            record = parse_registry_rule(data)
+            if record is not None and record.name == name:
+                self._ids[name] = value_name
+                records.append(record)
+        if not records:
+            return None
+        first = records[0]
+        same = all(r.ports == first.ports and r.enabled == first.enabled for r in records)
+        return {
+            "ports": first.ports if same else None,
+            "enabled": first.enabled if same else None,
+            "count": len(records)
+        }
+
+    def wait_for_change(self, timeout):
+        return self.source.wait_for_change(timeout)
+
+    def close(self):
+        self.source.close()
+
+
+def create_registry(name='auto'):
+    """
+    建立登錄快速路徑：auto 只在 Windows 上嘗試使用 pywin32，
+    無法使用時回傳 None（由後端查詢代替）。
+    """
+    if isinstance(name, RuleRegistry):
+        return name
+    if name in (None, 'none') or (name == 'auto' and os.name != 'nt'):
+        return None
+    try:
+        return RuleRegistry(WinRegistrySource())
+    except BackendUnavailableError as e:
+        logger.warning(f"登錄快速路徑無法使用，改用後端查詢: {e}")
+        return None
+
+
+class RegistryWatcher:
+    """
+    在背景執行緒等待登錄機碼變更，有變更時呼叫 callback（於背景執行緒）。
+    外部修改規則時主動通知，不必輪詢。
+    """
+
+    WAIT_SLICE = 1.0
+
+    def __init__(self, registry, callback):
+        self.registry = registry
+        self.callback = callback
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="registry-watcher", daemon=True)
+        self._thread.start()
+        logger.debug("已開始監看防火牆規則登錄機碼")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                changed = self.registry.wait_for_change(self.WAIT_SLICE)
+            except Exception as e:
+                logger.error(f"監看防火牆規則登錄機碼時發生錯誤: {e}")
+                logger.exception("詳細錯誤")
+                return
+            if changed and not self._stop.is_set():
+                try:
+                    self.callback()
+                except Exception as e:
+                    logger.error(f"處理登錄變更通知時發生錯誤: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.WAIT_SLICE * 2)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    import time
+
+    source = DictRegistrySource({
+        '{A1}': 'v2.30|Action=Allow|Active=TRUE|Dir=In|Protocol=6|LPort=80|Name=Web|',
+        '{B2}': 'v2.30|Action=Block|Active=FALSE|Dir=Out|Protocol=17|LPort=4950-4955|LPort=5000|Name=WarframePairBlockPort|',
+    })
+    registry = RuleRegistry(source)
+    print("第一次查詢:", registry.find('WarframePairBlockPort'), "讀取次數:", source.reads)
+    print("第二次查詢:", registry.find('WarframePairBlockPort'), "讀取次數:", source.reads)
+
+    events = []
+    watcher = RegistryWatcher(registry, lambda: events.append(registry.find('WarframePairBlockPort')))
+    watcher.start()
+    source.set_value('{B2}', source.values['{B2}'].replace('Active=FALSE', 'Active=TRUE'))
+    time.sleep(0.1)
+    source.delete_value('{B2}')
+    time.sleep(0.1)
+    watcher.stop()
+    print("變更通知:", events)
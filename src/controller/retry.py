@@ -0,0 +1,82 @@
+import time
+
+from loguru import logger
+
+from .errors import CommandExecutionError
+
+
+class RetryPolicy:
+    """
+    暫時性失敗的重試策略（指數退避）。
+
+    - attempts: 最多嘗試次數（含第一次）
+    - backoff: 第一次重試前的等待秒數，之後每次加倍，最多 max_backoff
+    - deadline: 整個操作（含所有重試與等待）的時限秒數，None 表示只受 attempts 限制
+    - retry_on: 視為暫時性、可以重試的例外類型
+
+    每次嘗試本身的時限由呼叫端（例如命令 session 的 timeout）負責，
+    因此單一操作的最壞延遲為 worst_case(單次時限)。
+    """
+    __slots__ = ('attempts', 'backoff', 'max_backoff', 'deadline', 'retry_on')
+
+    def __init__(self, attempts=3, backoff=0.25, max_backoff=1.0, deadline=None,
+                 retry_on=(CommandExecutionError,)):
+        self.attempts = max(int(attempts), 1)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_on = tuple(retry_on)
+
+    @classmethod
+    def none(cls):
+        """不重試（非冪等的操作使用）"""
+        return cls(attempts=1)
+
+    def delays(self):
+        """各次重試前的等待秒數"""
+        delay = self.backoff
+        for _ in range(self.attempts - 1):
+            yield min(delay, self.max_backoff)
+            delay *= 2
+
+    def worst_case(self, attempt_timeout):
+        """單次嘗試時限為 attempt_timeout 時，整個操作的最壞延遲（秒）"""
+        total = attempt_timeout * self.attempts + sum(self.delays())
+        if self.deadline is not None:
+            # 截止前已開始的最後一次嘗試仍可能用滿單次時限
+            total = min(total, self.deadline + attempt_timeout)
+        return total
+
+    def run(self, func, *args, describe=None):
+        """執行 func(*args)，遇到 retry_on 中的例外時退避後重試"""
+        start = time.monotonic()
+        delays = self.delays()
+        attempt = 1
+        while True:
+            try:
+                return func(*args)
+            except self.retry_on as e:
+                delay = next(delays, None)
+                elapsed = time.monotonic() - start
+                if delay is None or (self.deadline is not None and elapsed + delay >= self.deadline):
+                    if attempt > 1:
+                        logger.error(f"{describe or func} 重試 {attempt} 次後仍失敗 ({elapsed:.2f} 秒): {e}")
+                    raise
+                logger.warning(f"{describe or func} 第 {attempt} 次失敗，{delay:.2f} 秒後重試: {e}")
+                time.sleep(delay)
+                attempt += 1
+
+
+if __name__ == "__main__":
+    from .errors import CommandTimeoutError
+
+    failures = [CommandTimeoutError("模擬逾時"), CommandExecutionError("模擬錯誤")]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    policy = RetryPolicy(attempts=3, backoff=0.1, deadline=2.0)
+    print("結果:", policy.run(flaky, describe="flaky"))
+    print("最壞延遲 (單次 5 秒):", policy.worst_case(5.0))
@@ -0,0 +1,295 @@
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+import uuid
+
+from loguru import logger
+
+
+class SessionError(Exception):
+    """命令 session 無法啟動或已中斷"""
+    pass
+
+
+class SessionTimeoutError(SessionError):
+    """命令超過時限未完成，session 已被強制結束"""
+    pass
+
+
+class SessionInterruptedError(SessionError):
+    """命令已送出，但 session 在回傳結果前中斷（命令可能已經執行）"""
+    pass
+
+
+def kill_process_tree(process):
+    """強制結束行程與其所有子行程（例如 PowerShell 底下卡住的 netsh）"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(
+                ['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                capture_output=True,
+                timeout=5,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+        else:
+            # 以 start_new_session 啟動的行程自成一個行程群組
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"無法結束行程樹 (PID: {process.pid}): {e}")
+    try:
+        process.kill()
+        process.wait(timeout=1)
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+
+def popen_options():
+    """背景命令共用的 Popen 參數：不顯示視窗，並讓行程樹可以整組結束"""
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return {'startupinfo': startupinfo, 'creationflags': subprocess.CREATE_NO_WINDOW}
+    return {'start_new_session': True}
+
+
+class CommandSession:
+    """
+    長駐的命令直譯器 session。
+
+    啟動一次直譯器（預設為 PowerShell），之後所有命令都透過 stdin 送入，
+    每個命令後面接一個唯一標記與結束代碼，依標記切出該命令的輸出。
+    直譯器意外結束時會在下一個命令自動重新啟動。
+
+    - argv: 直譯器啟動參數
+    - frame: 將命令包裝成單行的樣板，需包含 {command} 與 {marker}，
+      直譯器必須輸出「{marker} <結束代碼>」一行作為結尾
+    - init_commands: 啟動後先執行的命令（例如設定輸出編碼）
+    - timeout: 每個命令的預設時限（秒），None 表示不限制；
+      超時會結束整個直譯器行程樹並拋出 SessionTimeoutError，下一個命令再重新啟動
+    """
+
+    POWERSHELL_ARGV = [
+        'powershell', '-NoLogo', '-NoProfile', '-NonInteractive',
+        '-ExecutionPolicy', 'Bypass', '-Command', '-'
+    ]
+    POWERSHELL_FRAME = '{command} 2>&1 | Out-String -Stream; Write-Output "{marker} $LASTEXITCODE"'
+    POWERSHELL_INIT = ['[Console]::OutputEncoding = [System.Text.Encoding]::UTF8']
+
+    SH_ARGV = ['sh']
+    SH_FRAME = '{command} 2>&1; echo "{marker} $?"'
+
+    def __init__(self, argv, frame, init_commands=None, encoding='utf-8', timeout=None):
+        self.argv = list(argv)
+        self.frame = frame
+        self.init_commands = list(init_commands or [])
+        self.encoding = encoding
+        self.timeout = timeout
+        self._process = None
+        self._lines = None
+        self._lock = threading.Lock()
+        self._marker_prefix = f'__WFPB_{uuid.uuid4().hex[:8]}'
+        self._seq = 0
+        self.restart_count = 0
+
+    @classmethod
+    def default(cls):
+        """依作業系統建立預設 session（Windows 用 PowerShell，其餘用 sh）"""
+        if os.name == 'nt':
+            return cls(cls.POWERSHELL_ARGV, cls.POWERSHELL_FRAME, cls.POWERSHELL_INIT)
+        return cls(cls.SH_ARGV, cls.SH_FRAME)
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """啟動直譯器（已在執行中則不動作）"""
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self.is_alive():
+            return
+        if self._process is not None:
+            self.restart_count += 1
+            logger.warning(f"命令 session 已中斷，重新啟動 (第 {self.restart_count} 次)")
+            self._discard_process()
+
+        try:
+            self._process = subprocess.Popen(
+                self.argv,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding=self.encoding,
+                errors='replace',
+                bufsize=1,
+                **popen_options()
+            )
+        except OSError as e:
+            self._process = None
+            raise SessionError(f"無法啟動命令 session：{e}")
+
+        # 由讀取執行緒轉送輸出，讓等待結果時可以設定時限
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._pump, args=(self._process.stdout, self._lines),
+            name="session-reader", daemon=True
+        ).start()
+
+        logger.debug(f"命令 session 已啟動: {self.argv[0]} (PID: {self._process.pid})")
+        for command in self.init_commands:
+            self._execute_locked(command)
+
+    @staticmethod
+    def _pump(stream, lines):
+        try:
+            for raw in stream:
+                lines.put(raw)
+        except (OSError, ValueError):
+            pass
+        lines.put('')
+
+    def execute(self, command, timeout=None):
+        """
+        在 session 中執行命令，回傳 (結束代碼, 輸出)。
+        寫入失敗（直譯器已結束，命令確定沒有送達）時會重啟並重試一次；
+        命令送出後才中斷或超時則拋出 SessionInterruptedError / SessionTimeoutError 而不重送，
+        命令可能已經執行，是否重試由呼叫端決定（例如建立規則不可重複執行）。
+        """
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_started()
+                try:
+                    marker = self._send(command)
+                    break
+                except SessionError:
+                    if attempt:
+                        raise
+                    self._discard_process()
+                    self.restart_count += 1
+                    logger.warning("無法寫入命令 session，重新啟動後重試")
+            return self._receive(command, marker, timeout)
+
+    def _execute_locked(self, command, timeout=None):
+        return self._receive(command, self._send(command), timeout)
+
+    def _send(self, command):
+        """寫入命令，回傳其結尾標記；寫入失敗時拋出 SessionError（命令沒有送達直譯器）"""
+        self._seq += 1
+        marker = f'{self._marker_prefix}_{self._seq}__'
+        line = self.frame.format(command=command, marker=marker)
+        try:
+            self._process.stdin.write(line + '\n')
+            self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise SessionError(f"無法寫入命令 session：{e}")
+        return marker
+
+    def _receive(self, command, marker, timeout=None):
+        """讀取命令的輸出直到結尾標記"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                if deadline is None:
+                    raw = self._lines.get()
+                else:
+                    raw = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                logger.warning(f"命令超過 {timeout} 秒未完成，結束命令 session: {command}")
+                kill_process_tree(self._process)
+                self._discard_process()
+                raise SessionTimeoutError(f"命令超過 {timeout} 秒未完成：{command}")
+            if raw == '':
+                self._discard_process()
+                raise SessionInterruptedError("命令 session 在回傳結果前結束")
+            text = raw.rstrip('\r\n')
+            if text.startswith(marker):
+                code_text = text[len(marker):].strip()
+                try:
+                    code = int(code_text)
+                except ValueError:
+                    # 直譯器未提供結束代碼（例如 cmdlet 而非外部程式），視為成功
+                    code = 0
+                return code, '\n'.join(output)
+            output.append(text)
+
+    def _discard_process(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        kill_process_tree(process)
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+
+    def close(self):
+        """結束直譯器"""
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=2)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+            self._discard_process()
+            logger.debug("命令 session 已關閉")
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import textwrap
+
+    # 以假的 netsh 直譯器腳本測試 session（可在 Linux 執行）
+    fake_netsh = textwrap.dedent('''
+        import sys
+        rules = set()
+        for line in sys.stdin:
+            command, _, marker = line.rstrip("\\n").partition(" ;; ")
+            words = dict(w.split("=", 1) for w in command.split() if "=" in w)
+            name = words.get("name")
+            if " add rule " in command:
+                rules.add(name); code = 0; print("Ok.")
+            elif " delete rule " in command:
+                code = 0 if name in rules else 1
+                rules.discard(name)
+                print("Ok." if code == 0 else "No rules match the specified criteria.")
+            elif " show rule " in command:
+                code = 0 if name in rules else 1
+                print(f"Rule Name: {name}" if code == 0 else "No rules match the specified criteria.")
+            elif command == "exit":
+                break
+            else:
+                code = 1; print(f"The following command was not found: {command}.")
+            print(f"{marker} {code}", flush=True)
+    ''')
+
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as f:
+        f.write(fake_netsh)
+        script = f.name
+
+    session = CommandSession([sys.executable, '-u', script], '{command} ;; {marker}')
+    base = 'netsh advfirewall firewall'
+    print(session.execute(f'{base} show rule name=Test'))
+    print(session.execute(f'{base} add rule name=Test protocol=UDP'))
+    print(session.execute(f'{base} show rule name=Test'))
+
+    # 模擬直譯器意外結束，下一個命令應自動重啟
+    session._process.kill()
+    session._process.wait()
+    print(session.execute(f'{base} show rule name=Test'), "restarts:", session.restart_count)
+
+    # 超時與結束行程樹的檢查見 tests/test_session.py
+    session.close()
+    os.unlink(script)
@@ -0,0 +1,126 @@
+"""
+匯入時間預算檢查 - 不依賴 PySide6 的開發工具
+
+以 python -X importtime 在子行程中匯入 main（GUI 啟動路徑）與 src.cli（命令列模式），
+確認總匯入時間沒有超出預算，且延遲載入的模組沒有在啟動時被拉進來。
+單次量測受磁碟快取與系統負載影響很大，每個模組量測多次，以最小值（最接近實際成本）和預算比較。
+
+    python -m src.import_budget [--budget 400] [--runs 5] [--top 15]
+
+超出預算或載入了不該載入的模組時以結束代碼 1 結束，可放在打包前的檢查步驟中。
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from src.config import BASE_DIR
+
+# 預設預算（毫秒）；目前 GUI 啟動路徑約 250ms，保留餘裕給較慢的機器
+DEFAULT_BUDGET_MS = 400
+# 每個模組的量測次數（取最小值）
+DEFAULT_RUNS = 5
+
+# import main 時不應載入：設定視窗與 keyboard 第一次使用時才載入，
+# 主視窗（含 SVG 元件）與 Tray 在 AppController 建立它們時才載入
+GUI_FORBIDDEN = ('keyboard', 'PySide6.QtSvgWidgets', 'src.ui.settings', 'src.ui.main', 'src.ui.tray')
+
+# 命令列模式完全不應載入 Qt 與 keyboard
+CLI_FORBIDDEN = ('PySide6', 'keyboard')
+
+
+def measure(module):
+    """
+    在乾淨的子行程中匯入模組，回傳 {模組名稱: 累計微秒}（累計包含其子模組）。
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"匯入 {module} 失敗:\n{result.stderr.strip()}")
+    return parse_importtime(result.stderr)
+
+
+def measure_best(module, runs=DEFAULT_RUNS):
+    """
+    量測 runs 次，回傳 (最快一次的 timings, 每次的總時間 list)；
+    最快的一次受其他負載干擾最少，用來和預算比較及列出耗時最長的模組。
+    """
+    samples = [measure(module) for _ in range(max(runs, 1))]
+    totals = [timings.get(module, 0) for timings in samples]
+    return samples[totals.index(min(totals))], totals
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def parse_importtime(text):
+    """
+    解析 -X importtime 的輸出，每行格式為
+    import time: self [us] | cumulative | imported package
+    """
+    timings = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            cumulative = int(fields[1].strip())
+        except ValueError:
+            continue  # 標題列
+        timings[fields[2].strip()] = cumulative
+    return timings
+
+
+def loaded(timings, forbidden):
+    """回傳 timings 中屬於 forbidden（含其子模組）的模組"""
+    return sorted(
+        name for name in timings
+        if any(name == prefix or name.startswith(prefix + '.') for prefix in forbidden)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="import_budget", description="檢查啟動時的匯入時間預算")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="GUI 啟動路徑的預算（毫秒）")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="每個模組的量測次數（取最小值）")
+    parser.add_argument("--top", type=int, default=15, help="列出累計時間最長的 N 個模組")
+    args = parser.parse_args(argv)
+
+    failures = []
+
+    gui, totals = measure_best('main', args.runs)
+    total_ms = min(totals) / 1000
+    print(
+        f"import main: 最小 {total_ms:.1f} ms，中位數 {median(totals) / 1000:.1f} ms"
+        f"（{len(totals)} 次，預算 {args.budget:g} ms）"
+    )
+    for name, us in sorted(gui.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    if total_ms > args.budget:
+        failures.append(f"GUI 啟動匯入時間 {total_ms:.1f} ms 超出預算 {args.budget:g} ms")
+    extra = loaded(gui, GUI_FORBIDDEN)
+    if extra:
+        failures.append(f"GUI 啟動時載入了應延遲載入的模組: {', '.join(extra)}")
+
+    cli, totals = measure_best('src.cli', args.runs)
+    print(f"import src.cli: 最小 {min(totals) / 1000:.1f} ms，中位數 {median(totals) / 1000:.1f} ms")
+    extra = loaded(cli, CLI_FORBIDDEN)
+    if extra:
+        failures.append(f"命令列模式載入了 GUI 模組: {', '.join(extra)}")
+
+    for failure in failures:
+        print(f"失敗: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+單一執行個體 IPC - 不依賴 PySide6 的用戶端與通訊協定
+
+第一個執行個體以 QLocalServer 監聽（Windows 為具名管道，Linux 為 Unix socket），
+之後的啟動（包含命令列模式）把命令轉送給它後立即結束。
+通訊協定：每個連線送出一行 JSON 請求 {"command": ..., "args": {...}}，
+伺服器回傳一行 JSON 回應後關閉連線。
+"""
+
+import getpass
+import json
+import os
+import socket
+import tempfile
+import threading
+
+from src.config import APP_NAME
+
+COMMANDS = ('ping', 'show', 'toggle', 'block', 'unblock', 'status')
+DEFAULT_TIMEOUT = 1.0
+
+
+def server_name():
+    """伺服器名稱，依使用者區分，避免不同使用者的執行個體互相干擾"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'user'
+    return f"{APP_NAME}-{user}"
+
+
+def server_address():
+    """
+    QLocalServer.listen 使用的位址：
+    Windows 為管道名稱（Qt 會轉成 \\\\.\\pipe\\名稱），其他系統為 socket 的完整路徑
+    """
+    if os.name == 'nt':
+        return server_name()
+    return os.path.join(tempfile.gettempdir(), f"{server_name()}.sock")
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def decode(data):
+    return json.loads(data.decode('utf-8').strip())
+
+
+def _exchange_socket(payload, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(server_address())
+        client.sendall(payload)
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+
+def _exchange_pipe(payload, timeout):
+    # 具名管道的讀取無法設定時限，改在背景執行緒中等待
+    result = {}
+
+    def run():
+        try:
+            with open(r'\\.\pipe\{}'.format(server_name()), 'r+b', buffering=0) as pipe:
+                pipe.write(payload)
+                data = b''
+                while not data.endswith(b'\n'):
+                    chunk = pipe.read(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+                result['data'] = data
+        except OSError as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run, name="ipc-client", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if 'error' in result:
+        raise result['error']
+    if 'data' not in result:
+        raise TimeoutError("執行中的程式沒有回應")
+    return result['data']
+
+
+def send_command(command, timeout=DEFAULT_TIMEOUT, **args):
+    """
+    把命令送給執行中的執行個體，回傳回應 dict；
+    沒有執行中的執行個體（或沒有回應）時回傳 None。
+    """
+    payload = encode({"command": command, "args": args})
+    try:
+        if os.name == 'nt':
+            data = _exchange_pipe(payload, timeout)
+        else:
+            data = _exchange_socket(payload, timeout)
+    except (OSError, TimeoutError):
+        return None
+    if not data:
+        return None
+    try:
+        return decode(data)
+    except ValueError:
+        return None
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 例：python -m src.ipc toggle
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    print(send_command(command))
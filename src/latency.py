@@ -0,0 +1,173 @@
+"""
+快捷鍵延遲統計 - 不依賴 PySide6，記錄從按下快捷鍵到規則實際生效的各階段耗時
+
+每次按下快捷鍵建立一個 LatencyTrace，沿著處理路徑（掛鉤執行緒 → UI 線程 → 防火牆工作執行緒 → UI 線程）
+依序以 time.perf_counter() 標記各階段結束的時間點；完成時把相鄰標記的差值記入各階段的滾動視窗，
+可隨時取得每個階段最近 N 筆的 p50 / p95 / p99，讓任何一段的退化都看得出來。
+
+    from src.latency import latency
+
+    trace = latency.begin("toggle")   # 掛鉤回呼
+    trace.mark("emit")
+    ...
+    trace.finish()
+    logger.info("\\n".join(latency.summary_lines()))
+
+同一個 trace 只會依序在一個執行緒上被標記（執行緒之間以 Qt 訊號或工作佇列交接），因此標記本身不加鎖；
+只有寫入共用的統計時才加鎖。
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+# 各階段（依處理順序）；每個階段的耗時為上一個標記到該標記的時間
+STAGES = {
+    "emit": "掛鉤回呼",          # 後端偵測到組合鍵 → 送出訊號前
+    "signal": "訊號送達",        # 跨執行緒送達 UI 線程
+    "coalesce": "合併等待",      # 合併器收斂連續切換後交給工作執行緒
+    "queue": "工作佇列",         # 等待防火牆工作執行緒開始執行
+    "backend": "後端呼叫",       # 防火牆後端實際建立 / 移除規則
+    "completion": "結果回傳",    # 結果送回 UI 線程
+    "window": "主視窗更新",      # set_toggle_state
+    "tray": "Tray更新",          # tray.update_status
+}
+TOTAL = "total"
+
+DEFAULT_WINDOW = 256
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """最近排名法的百分位數（sorted_values 需已排序且非空）"""
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class LatencyTrace:
+    """單次快捷鍵操作的各階段時間點"""
+
+    __slots__ = ("recorder", "action", "start", "marks", "done")
+
+    def __init__(self, recorder, action, start=None):
+        self.recorder = recorder
+        self.action = action
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []
+        self.done = False
+
+    def mark(self, stage):
+        if not self.done:
+            self.marks.append((stage, time.perf_counter()))
+
+    def timed(self, before, after, func):
+        """包裝 func：開始執行時標記 before，結束（含拋出例外）時標記 after"""
+        def call(*args, **kwargs):
+            self.mark(before)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.mark(after)
+        return call
+
+    def durations(self):
+        """{階段: 秒}，依標記順序"""
+        result = {}
+        previous = self.start
+        for stage, at in self.marks:
+            result[stage] = at - previous
+            previous = at
+        return result
+
+    def finish(self):
+        """操作完成（最後一個階段已標記），把耗時記入統計"""
+        if not self.done:
+            self.done = True
+            self.recorder.add(self)
+
+    def discard(self, reason):
+        """操作沒有走完整條路徑（被合併、互相抵銷、失敗），不記入各階段統計"""
+        if not self.done:
+            self.done = True
+            self.recorder.count_discarded(reason)
+
+
+class LatencyRecorder:
+    """
+    各階段的滾動延遲統計。
+
+    - begin(action)：建立新的 LatencyTrace（起點為呼叫當下）
+    - stats()：{階段: {count, p50, p95, p99, max}}（毫秒）
+    - summary_lines()：適合寫入 log 或顯示的文字
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.completed = 0
+        self.discarded = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def begin(self, action):
+        return LatencyTrace(self, action)
+
+    def add(self, trace):
+        durations = trace.durations()
+        if trace.marks:
+            durations[TOTAL] = trace.marks[-1][1] - trace.start
+        with self._lock:
+            self.completed += 1
+            for stage, seconds in durations.items():
+                samples = self._samples.get(stage)
+                if samples is None:
+                    samples = self._samples[stage] = deque(maxlen=self.window)
+                samples.append(seconds)
+
+    def count_discarded(self, reason):
+        with self._lock:
+            self.discarded[reason] = self.discarded.get(reason, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.completed = 0
+            self.discarded.clear()
+            self._samples.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+        order = [stage for stage in STAGES if stage in snapshot]
+        order += sorted(stage for stage in snapshot if stage not in STAGES and stage != TOTAL)
+        if TOTAL in snapshot:
+            order.append(TOTAL)
+        result = {}
+        for stage in order:
+            values = snapshot[stage]
+            entry = {"count": len(values)}
+            for pct in PERCENTILES:
+                entry[f"p{pct}"] = round(percentile(values, pct) * 1000, 3)
+            entry["max"] = round(values[-1] * 1000, 3)
+            result[stage] = entry
+        return result
+
+    def summary_lines(self):
+        stats = self.stats()
+        if not stats:
+            return ["快捷鍵延遲：尚無紀錄"]
+        dropped = "、".join(f"{reason} {count}" for reason, count in sorted(self.discarded.items()))
+        lines = [
+            f"快捷鍵延遲（最近 {self.window} 次，毫秒）：完成 {self.completed} 次"
+            + (f"，未完成 {dropped}" if dropped else "")
+        ]
+        for stage, entry in stats.items():
+            label = "總計" if stage == TOTAL else STAGES.get(stage, stage)
+            lines.append(
+                f"  {label:<6} p50 {entry['p50']:8.2f}  p95 {entry['p95']:8.2f}  "
+                f"p99 {entry['p99']:8.2f}  max {entry['max']:8.2f}  (n={entry['count']})"
+            )
+        return lines
+
+
+# 整個程式共用的統計
+latency = LatencyRecorder()
@@ -0,0 +1,346 @@
+"""
+設定模型 - 不依賴 PySide6 的型別化設定，啟動時解析一次，之後直接讀取屬性
+
+所有欄位的預設值、型別與允許範圍都定義在 FIELDS；設定檔的字串只在載入時解析、
+在寫入時格式化，程式其他地方一律讀取 Settings 的屬性（例如 settings.recover_time 為 int）。
+
+- 指定屬性時即驗證（超出範圍或格式錯誤時拋出 SettingsError，原值不變），
+  值有改變時依序通知 subscribe() 註冊的監聽者 callback(name, old, new)
+- 設定檔含有 version 欄位；舊版設定檔載入時依 MIGRATIONS 逐版轉換，
+  比程式新的設定檔不會被寫回，未知的欄位寫回時原樣保留
+
+    settings, changed = Settings.from_strings(raw)
+    settings.subscribe(lambda name, old, new: ..., "notifications")
+    settings.recover_time = 30
+"""
+
+from loguru import logger
+
+from src.bindings import ACTIONS, MODIFIERS, SETTING_PREFIX, BindingConflictError, BindingTable, normalize_chord
+from src.config import CONFIG_PATH, UDP_PRESETS, read_ini
+
+SECTION = "Settings"
+
+# 目前的設定檔版本；沒有 version 欄位的設定檔視為第 1 版
+SCHEMA_VERSION = 2
+
+# 可選的後端名稱（不在此載入防火牆 / 快捷鍵模組，避免命令列模式多付匯入成本）
+FIREWALL_BACKENDS = ("auto", "com", "netsh", "nft", "fake")
+HOTKEY_BACKENDS = ("auto", "win32", "keyboard", "fake")
+
+_TRUE = ("1", "yes", "true", "on")
+_FALSE = ("0", "no", "false", "off")
+
+
+class SettingsError(ValueError):
+    """設定值不合法"""
+
+    def __init__(self, name, value, reason):
+        super().__init__(f"設定 {name}={value!r} 不合法: {reason}")
+        self.name = name
+        self.value = value
+        self.reason = reason
+
+
+class Field:
+    """
+    單一設定欄位：convert(value) 接受字串或已轉換的值並回傳驗證過的值（不合法時拋出 ValueError），
+    format(value) 轉成寫入設定檔的字串。
+    """
+
+    __slots__ = ("name", "default", "convert", "format")
+
+    def __init__(self, name, default, convert, format=str):
+        self.name = name
+        self.default = default
+        self.convert = convert
+        self.format = format
+
+
+def _int_field(name, default, low, high):
+    def convert(value):
+        if isinstance(value, bool):
+            raise ValueError("必須是整數")
+        number = int(value.strip()) if isinstance(value, str) else int(value)
+        if not low <= number <= high:
+            raise ValueError(f"必須介於 {low} 與 {high} 之間")
+        return number
+    return Field(name, default, convert)
+
+
+def _bool_field(name, default):
+    def convert(value):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError("必須是 true 或 false")
+    return Field(name, default, convert, lambda value: "true" if value else "false")
+
+
+def _choice_field(name, default, choices):
+    def convert(value):
+        text = str(value).strip().lower()
+        if text not in choices:
+            raise ValueError(f"必須是 {' / '.join(choices)} 之一")
+        return text
+    return Field(name, default, convert)
+
+
+def _text_field(name, default=""):
+    return Field(name, default, lambda value: str(value).strip())
+
+
+def _chord_field(name):
+    def convert(value):
+        chord = normalize_chord(str(value))
+        if chord and all(key in MODIFIERS for key in chord.split("+")):
+            raise ValueError("組合鍵需要一個非修飾鍵")
+        return chord
+    return Field(name, "", convert)
+
+
+FIELDS = {field.name: field for field in (
+    _int_field("version", SCHEMA_VERSION, 1, SCHEMA_VERSION),
+    _int_field("udp_index", 0, 0, len(UDP_PRESETS) - 1),
+    # 自訂的埠設定（可包含多組範圍），優先於下拉選單索引；格式在建立規則時才解析
+    _text_field("udp_ports"),
+    _bool_field("auto_recover", True),
+    _int_field("recover_time", 20, 1, 999),
+    _bool_field("notifications", True),
+    # 快捷鍵綁定（src.bindings.ACTIONS），空字串表示未設定
+    *(_chord_field(SETTING_PREFIX + action) for action in ACTIONS),
+    _int_field("block_for_time", 60, 1, 3600),
+    _choice_field("hotkey_backend", "auto", HOTKEY_BACKENDS),
+    _choice_field("firewall_backend", "auto", FIREWALL_BACKENDS),
+)}
+
+
+def _migrate_v1(values):
+    """第 1 版 → 第 2 版：舊版只有一組切換快捷鍵（hotkey 欄位）"""
+    legacy = values.pop("hotkey", "")
+    if legacy and not values.get(SETTING_PREFIX + "toggle"):
+        values[SETTING_PREFIX + "toggle"] = legacy
+
+
+# 版本 → 轉換到下一版的函式（就地修改字串 dict）
+MIGRATIONS = {
+    1: _migrate_v1,
+}
+
+
+def migrate(values):
+    """把設定檔的字串 dict 就地轉換成目前的版本，回傳原本的版本（不合法的版本視為第 1 版）"""
+    try:
+        version = int(values.get("version", 1))
+    except ValueError:
+        version = 1
+    if version < 1:
+        logger.warning(f"設定檔版本 {version} 不合法，視為第 1 版")
+        version = 1
+    if version > SCHEMA_VERSION:
+        logger.warning(f"設定檔版本 {version} 比程式支援的 {SCHEMA_VERSION} 新，不會寫回設定檔")
+        values["version"] = str(SCHEMA_VERSION)
+        return version
+    for step in range(version, SCHEMA_VERSION):
+        logger.info(f"轉換設定檔: 第 {step} 版 → 第 {step + 1} 版")
+        MIGRATIONS[step](values)
+    values["version"] = str(SCHEMA_VERSION)
+    return version
+
+
+class Settings:
+    """
+    型別化的設定；各欄位為同名屬性，預設值、型別與範圍見 FIELDS。
+
+    - from_strings(values)：由設定檔的字串解析（含版本轉換），不合法的欄位改用預設值
+    - to_strings()：轉成寫入設定檔的字串 dict（含載入時保留的未知欄位）
+    - update(**values)：一次指定多個欄位（全部驗證通過才套用）
+    - subscribe(callback, name=None)：欄位改變時呼叫 callback(name, old, new)；name 為 None 時監聽所有欄位
+    """
+
+    __slots__ = tuple(FIELDS) + ("_listeners", "_extra")
+
+    def __init__(self, **values):
+        object.__setattr__(self, "_listeners", {})
+        # 設定檔中不屬於 FIELDS 的欄位（例如較新版本的欄位），寫回時原樣保留
+        object.__setattr__(self, "_extra", {})
+        for name, field in FIELDS.items():
+            object.__setattr__(self, name, field.default)
+        for name, value in values.items():
+            object.__setattr__(self, name, self._convert(name, value))
+
+    def __setattr__(self, name, value):
+        if name not in FIELDS:
+            raise AttributeError(f"沒有設定欄位 {name}")
+        self._assign({name: self._convert(name, value)})
+
+    def __eq__(self, other):
+        return isinstance(other, Settings) and all(getattr(self, name) == getattr(other, name) for name in FIELDS)
+
+    def __repr__(self):
+        changed = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name, field in FIELDS.items() if getattr(self, name) != field.default
+        )
+        return f"Settings({changed})"
+
+    @staticmethod
+    def _convert(name, value):
+        field = FIELDS.get(name)
+        if field is None:
+            raise AttributeError(f"沒有設定欄位 {name}")
+        try:
+            return field.convert(value)
+        except (TypeError, ValueError) as e:
+            raise SettingsError(name, value, e) from None
+
+    def _assign(self, values):
+        changes = []
+        for name, value in values.items():
+            old = getattr(self, name)
+            if old != value:
+                object.__setattr__(self, name, value)
+                changes.append((name, old, value))
+        for name, old, new in changes:
+            for callback in self._listeners.get(name, ()) + self._listeners.get(None, ()):
+                try:
+                    callback(name, old, new)
+                except Exception as e:
+                    logger.error(f"處理設定 {name} 變更時發生錯誤: {e}")
+                    logger.exception("詳細錯誤")
+        return changes
+
+    def update(self, **values):
+        """一次指定多個欄位，回傳實際改變的欄位 [(name, old, new)]"""
+        converted = {name: self._convert(name, value) for name, value in values.items()}
+        return self._assign(converted)
+
+    def reset(self):
+        """回復所有預設值（會通知改變的欄位）"""
+        return self._assign({name: field.default for name, field in FIELDS.items()})
+
+    def copy(self):
+        settings = Settings(**{name: getattr(self, name) for name in FIELDS})
+        settings._extra.update(self._extra)
+        return settings
+
+    def subscribe(self, callback, name=None):
+        if name is not None and name not in FIELDS:
+            raise AttributeError(f"沒有設定欄位 {name}")
+        self._listeners[name] = self._listeners.get(name, ()) + (callback,)
+
+    def unsubscribe(self, callback, name=None):
+        self._listeners[name] = tuple(cb for cb in self._listeners.get(name, ()) if cb != callback)
+
+    def format(self, name):
+        """欄位寫入設定檔的字串"""
+        return FIELDS[name].format(getattr(self, name))
+
+    def to_strings(self):
+        values = {name: self.format(name) for name in FIELDS}
+        values.update((name, value) for name, value in self._extra.items() if name not in values)
+        return values
+
+    @classmethod
+    def from_strings(cls, values):
+        """
+        由設定檔的字串 dict 解析，回傳 (settings, changed)。
+        changed 為 True 表示經過版本轉換、補上缺少的欄位或以預設值取代了不合法的值，應寫回設定檔；
+        比程式新的設定檔一律不需要寫回（寫回會把它降回目前的版本）。
+        """
+        raw = dict(values)
+        version = migrate(raw)
+        newer = version > SCHEMA_VERSION
+        changed = version != SCHEMA_VERSION
+        settings = cls()
+        for name, field in FIELDS.items():
+            if name not in raw:
+                changed = True
+                continue
+            try:
+                value = cls._convert(name, raw[name])
+            except SettingsError as e:
+                logger.warning(f"{e}，改用預設值 {field.default!r}")
+                changed = True
+                continue
+            object.__setattr__(settings, name, value)
+            if field.format(value) != raw[name]:
+                changed = True
+        unknown = sorted(set(raw) - set(FIELDS))
+        if unknown:
+            logger.warning(f"保留未知的設定欄位: {', '.join(unknown)}")
+            settings._extra.update((name, raw[name]) for name in unknown)
+        return settings, changed and not newer
+
+    def binding_table(self):
+        """快捷鍵綁定的對照表；互相衝突的綁定只保留先出現的"""
+        table = BindingTable()
+        for action in ACTIONS:
+            try:
+                table.bind(action, getattr(self, SETTING_PREFIX + action))
+            except BindingConflictError as e:
+                logger.warning(f"設定檔中的快捷鍵衝突，略過「{ACTIONS[action]}」: {e}")
+        return table
+
+    def set_bindings(self, table):
+        """以對照表取代所有快捷鍵綁定"""
+        return self.update(**{SETTING_PREFIX + action: table.chord_for(action) for action in ACTIONS})
+
+    def selected_ports(self):
+        """目前選擇的埠設定字串：自訂埠優先，其次為下拉選單索引"""
+        return self.udp_ports or UDP_PRESETS[self.udp_index]
+
+
+def load_settings(path=CONFIG_PATH):
+    """讀取設定檔（不存在時不會建立，也不會寫回轉換結果），供命令列模式使用"""
+    config = read_ini(path)
+    settings, _ = Settings.from_strings(config[SECTION] if config.has_section(SECTION) else {})
+    return settings
+
+
+if __name__ == "__main__":
+    # 版本轉換、驗證與變更通知：python -m src.settings
+    import sys
+    import timeit
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    legacy = {"hotkey": "Shift + Ctrl + B", "udp_index": "9", "recover_time": "abc", "auto_recover": "false"}
+    settings, changed = Settings.from_strings(legacy)
+    print(f"第 1 版設定檔: {settings}（需要寫回: {changed}）")
+    assert changed and settings.version == SCHEMA_VERSION
+    assert settings.hotkey_toggle == "ctrl+shift+b" and "hotkey" not in settings.to_strings()
+    assert settings.udp_index == 0 and settings.recover_time == 20 and settings.auto_recover is False
+
+    again, changed = Settings.from_strings(settings.to_strings())
+    assert again == settings and not changed, "寫回後再次載入不應有變更"
+
+    events = []
+    settings.subscribe(lambda name, old, new: events.append((name, old, new)))
+    settings.recover_time = 45
+    settings.recover_time = 45
+    settings.update(udp_index=2, notifications=False)
+    for name, value in (("recover_time", 0), ("hotkey_block", "ctrl+shift"), ("hotkey_backend", "x")):
+        try:
+            setattr(settings, name, value)
+        except SettingsError as e:
+            print(f"拒絕: {e}")
+        else:
+            raise AssertionError(f"{name}={value!r} 應被拒絕")
+    print(f"變更通知: {events}")
+    assert events == [("recover_time", 20, 45), ("udp_index", 0, 2), ("notifications", True, False)]
+
+    newer, changed = Settings.from_strings({"version": "3", "recover_time": "30", "future_option": "x"})
+    assert not changed and newer.recover_time == 30 and newer.to_strings()["future_option"] == "x"
+    broken, changed = Settings.from_strings({"version": "0", "hotkey": "ctrl+b"})
+    assert changed and broken.hotkey_toggle == "ctrl+b"
+
+    raw = settings.to_strings()
+    parsed = timeit.timeit(lambda: int(raw.get("recover_time", 20)), number=100000) * 10
+    attribute = timeit.timeit(lambda: settings.recover_time, number=100000) * 10
+    print(f"讀取 recover_time：解析字串 {parsed:.3f} µs，讀取屬性 {attribute:.3f} µs")
+    print("OK")
@@ -0,0 +1,163 @@
+"""
+啟動時間追蹤 - 不依賴 PySide6，記錄從程式進入點到主視窗第一次繪製的各階段耗時
+
+各階段以 time.perf_counter()（單調時鐘）記錄開始與結束時間，可巢狀；
+啟動完成時由呼叫端把 summary() 的一行摘要寫入 log，加上 --profile-startup 參數時另外輸出詳細的 JSON。
+本模組刻意不匯入任何第三方套件（包括 loguru），讓計時起點盡量接近程式進入點。
+
+    from src.startup_trace import startup
+
+    with startup.phase("QApplication"):
+        app = QApplication(sys.argv)
+    ...
+    startup.finish()
+    logger.info(startup.summary())
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class Phase:
+    __slots__ = ("name", "start", "end", "depth", "parent")
+
+    def __init__(self, name, start, depth, parent):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.depth = depth
+        self.parent = parent
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class StartupTracer:
+    """
+    記錄啟動各階段的時間點。
+
+    - phase(name)：context manager，記錄一個（可巢狀的）階段
+    - record(name, start)：記錄從 start 到現在的階段
+    - mark(name)：記錄單一時間點（例如「第一次繪製」）
+    - finish()：啟動完成；之後的 phase / mark 不再記錄
+    """
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = []
+        self.marks = []
+        self.finished_at = None
+        self._stack = []
+
+    @property
+    def active(self):
+        return self.finished_at is None
+
+    def _ms(self, timestamp):
+        return round((timestamp - self.origin) * 1000, 2)
+
+    @contextmanager
+    def phase(self, name):
+        if not self.active:
+            yield
+            return
+        parent = self._stack[-1] if self._stack else None
+        record = Phase(name, time.perf_counter(), len(self._stack), parent)
+        self.phases.append(record)
+        self._stack.append(record)
+        try:
+            yield
+        finally:
+            record.end = time.perf_counter()
+            self._stack.remove(record)
+
+    def record(self, name, start, end=None):
+        """記錄已經結束的最上層階段（用於無法包在 with 區塊中的程式碼，例如模組匯入）"""
+        if self.active:
+            record = Phase(name, start, 0, None)
+            record.end = end if end is not None else time.perf_counter()
+            self.phases.append(record)
+
+    def mark(self, name):
+        if self.active:
+            self.marks.append((name, time.perf_counter()))
+
+    def finish(self, name="first paint"):
+        """啟動完成（通常在主視窗第一次繪製時），回傳總耗時（毫秒）"""
+        if not self.active:
+            return self._ms(self.finished_at)
+        self.mark(name)
+        self.finished_at = time.perf_counter()
+        return self._ms(self.finished_at)
+
+    def summary(self):
+        """一行摘要：總耗時與最上層各階段（括號內為耗時最長的子階段）"""
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        parts = []
+        for record in self.phases:
+            if record.depth != 0:
+                continue
+            children = sorted(
+                (child for child in self.phases if child.parent is record),
+                key=lambda child: child.duration, reverse=True
+            )[:3]
+            text = f"{record.name} {record.duration * 1000:.0f}"
+            if children:
+                text += " (" + ", ".join(f"{child.name} {child.duration * 1000:.0f}" for child in children) + ")"
+            parts.append(text)
+        return f"啟動耗時 {(end - self.origin) * 1000:.0f}ms：" + " | ".join(parts)
+
+    def to_dict(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return {
+            "total_ms": self._ms(end),
+            "finished": not self.active,
+            "phases": [
+                {
+                    "name": record.name,
+                    "parent": record.parent.name if record.parent else None,
+                    "depth": record.depth,
+                    "start_ms": self._ms(record.start),
+                    "end_ms": self._ms(record.end) if record.end is not None else None,
+                    "duration_ms": round(record.duration * 1000, 2),
+                }
+                for record in self.phases
+            ],
+            "marks": [{"name": name, "at_ms": self._ms(at)} for name, at in self.marks],
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False)),
+        }
+
+    def dump_json(self, path):
+        """把詳細的階段資料寫成 JSON，回傳寫入的路徑"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def profile_output(argv, default_path):
+    """
+    解析 --profile-startup[=路徑]；沒有指定時回傳 None，
+    沒有給路徑時使用 default_path（打包後沒有主控台，因此一律寫檔）。
+    """
+    for arg in argv:
+        if arg == PROFILE_FLAG:
+            return default_path
+        if arg.startswith(PROFILE_FLAG + "="):
+            return arg.split("=", 1)[1] or default_path
+    return None
+
+
+# 程式進入點匯入本模組時即開始計時
+startup = StartupTracer()
@@ -1,13 +1,25 @@
 """
 UI 模塊 - 提供主視窗、設定視窗和系統托盤功能
-"""
 
-from .main import WarframeMainUI
-from .settings import SettingsUI
-from .tray import TrayManager
+各元件在第一次使用時才載入（設定視窗會連帶載入 keyboard，主視窗會載入 SVG 元件），
+避免啟動時付出用不到的匯入成本。
+"""
 
 __all__ = [
     'WarframeMainUI',
     'SettingsUI',
     'TrayManager'
 ]
+
+
+def __getattr__(name):
+    if name == 'WarframeMainUI':
+        from .main import WarframeMainUI
+        return WarframeMainUI
+    if name == 'SettingsUI':
+        from .settings import SettingsUI
+        return SettingsUI
+    if name == 'TrayManager':
+        from .tray import TrayManager
+        return TrayManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
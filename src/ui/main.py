@@ -3,7 +3,6 @@ import sys
 
 from PySide6.QtCore import Qt, QUrl
 from PySide6.QtGui import QFont, QCursor, QDesktopServices, QColor, QPalette
-from PySide6.QtSvgWidgets import QSvgWidget
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QPushButton, QCheckBox, QSpinBox,
@@ -18,28 +17,53 @@ if __name__ == "__main__":
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
+from src.config import UDP_PRESETS
 
-# 可點擊 SVG Icon
-class ClickableSvgWidget(QSvgWidget):
+
+_svg_classes = None
+
+
+def svg_widgets():
     """
-    可點擊的 SVG 圖示元件。
-    - 可設定網址（url）或 callback 函式。
-    - 可選擇設定 tooltip 說明文字。
+    第一次需要 SVG 元件時才載入 QtSvgWidgets，回傳 (QSvgWidget, ClickableSvgWidget)。
     """
-    def __init__(self, path, url=None, callback=None, tooltip=None, parent=None):
-        super().__init__(path, parent)
-        self.url = url
-        self.callback = callback
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        if tooltip:
-            self.setToolTip(tooltip)
+    global _svg_classes
+    if _svg_classes is not None:
+        return _svg_classes
 
-    def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            if self.callback:
-                self.callback()
-            elif self.url:
-                QDesktopServices.openUrl(QUrl(self.url))
+    from PySide6.QtSvgWidgets import QSvgWidget
+
+    # 可點擊 SVG Icon
+    class ClickableSvgWidget(QSvgWidget):
+        """
+        可點擊的 SVG 圖示元件。
+        - 可設定網址（url）或 callback 函式。
+        - 可選擇設定 tooltip 說明文字。
+        """
+        def __init__(self, path, url=None, callback=None, tooltip=None, parent=None):
+            super().__init__(path, parent)
+            self.url = url
+            self.callback = callback
+            self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+            if tooltip:
+                self.setToolTip(tooltip)
+
+        def mousePressEvent(self, event):
+            if event.button() == Qt.MouseButton.LeftButton:
+                if self.callback:
+                    self.callback()
+                elif self.url:
+                    QDesktopServices.openUrl(QUrl(self.url))
+
+    _svg_classes = (QSvgWidget, ClickableSvgWidget)
+    return _svg_classes
+
+
+def __getattr__(name):
+    # 相容舊的 from src.ui.main import ClickableSvgWidget
+    if name == 'ClickableSvgWidget':
+        return svg_widgets()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class WarframeMainUI(QWidget):
@@ -51,6 +75,7 @@ class WarframeMainUI(QWidget):
     - auto_recover_callback: 開關「自動恢復」與設定時間
     - open_firewall_callback: 開啟防火牆介面
     - open_settings_callback: 開啟設定面板
+    - udp_changed_callback: 使用者變更 UDP 埠選擇
     - state_labels: 配對狀態對應字串
     """
     def __init__(
@@ -59,6 +84,7 @@ class WarframeMainUI(QWidget):
         auto_recover_callback=None,
         open_firewall_callback=None,
         open_settings_callback=None,
+        udp_changed_callback=None,
         state_labels=None,
         resolve_path=lambda x: x
     ):
@@ -69,9 +95,13 @@ class WarframeMainUI(QWidget):
         self.auto_recover_callback = auto_recover_callback
         self.open_firewall_callback = open_firewall_callback
         self.open_settings_callback = open_settings_callback
+        self.udp_changed_callback = udp_changed_callback
         self.state_labels = state_labels or {
             "STATE_BLOCKED": "配對已阻斷",
-            "STATE_NORMAL": "配對正常"
+            "STATE_NORMAL": "配對正常",
+            "STATE_BLOCKING": "阻斷中…",
+            "STATE_UNBLOCKING": "恢復中…",
+            "STATE_CHECKING": "檢查中…"
         }
         self.current_state = "STATE_NORMAL"
         self.is_focused = False
@@ -122,6 +152,7 @@ class WarframeMainUI(QWidget):
 
         # Title Bar
         title_bar = QHBoxLayout()
+        QSvgWidget, _ = svg_widgets()
         self.logo = QSvgWidget(self.resolve_path("assets/logo.svg"))
         self.logo.setFixedSize(26, 26)
         title_bar.addWidget(self.logo)
@@ -168,10 +199,11 @@ class WarframeMainUI(QWidget):
 
         self.combo = QComboBox()
         self.combo.setFont(font)
-        self.combo.addItems([
-            "4950 & 4955", "4960 & 4965", "4970 & 4975",
-            "4980 & 4985", "4990 & 4995", "3074 & 3080"
-        ])
+        self.combo.addItems(UDP_PRESETS)
+        # 可直接輸入多組埠或範圍，例如 "4950 & 4955, 4960-4965, 3074"
+        self.combo.setEditable(True)
+        self.combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.combo.setToolTip("可選擇預設組合，或輸入多組埠／範圍（以逗號分隔）\n例如：4950 & 4955, 4960-4965, 3074")
         # 獲取 arrow_down 圖片路徑並處理反斜線
         arrow_down_path = self.resolve_path("assets/arrow_down.svg").replace("\\", "/")
         
@@ -211,6 +243,11 @@ class WarframeMainUI(QWidget):
             }}
         """)
 
+        # 只在使用者選擇時觸發（程式設定索引不會觸發 activated）
+        self.combo.activated.connect(self._on_udp_changed)
+        self.combo.lineEdit().editingFinished.connect(
+            lambda: self._on_udp_changed(self.combo.currentIndex())
+        )
         udp_layout.addWidget(self.combo)
         main_layout.addLayout(udp_layout)
 
@@ -309,6 +346,7 @@ class WarframeMainUI(QWidget):
         footer_layout.setContentsMargins(4, 2, 4, 4)
         footer_layout.setSpacing(6)
 
+        _, ClickableSvgWidget = svg_widgets()
         settings_icon = ClickableSvgWidget(
             self.resolve_path("assets/settings.svg"),
             callback=self._on_settings_clicked,
@@ -344,10 +382,22 @@ class WarframeMainUI(QWidget):
         if self.open_firewall_callback:
             self.open_firewall_callback()
 
-    def get_toggle_style(self, checked):
+    def get_toggle_style(self, checked, pending=False):
         # 狀態切換按鈕使用固定的白色文字，但保留紅綠色調
-        # 紅/綠主色和深淺變體
-        if checked:  # 阻斷狀態 - 紅色
+        # 紅/綠主色和深淺變體；操作進行中使用較淡的目標顏色，狀態未知（checked 為 None）時為灰色
+        if checked is None:  # 檢查中 - 灰色
+            main_color = "#9e9e9e"
+            hover_color = "#aaaaaa"
+            pressed_color = "#8a8a8a"
+        elif pending and checked:  # 阻斷中 - 淡紅色
+            main_color = "#cc6666"
+            hover_color = "#d67a7a"
+            pressed_color = "#b25555"
+        elif pending:  # 恢復中 - 淡綠色
+            main_color = "#81c784"
+            hover_color = "#95d098"
+            pressed_color = "#66bb6a"
+        elif checked:  # 阻斷狀態 - 紅色
             main_color = "#B22222"
             hover_color = "#cc4444" 
             pressed_color = "#a11a1a"
@@ -381,17 +431,26 @@ class WarframeMainUI(QWidget):
         if self.auto_recover_callback:
             self.auto_recover_callback(enabled)
 
+    def _on_udp_changed(self, index):
+        if self.udp_changed_callback:
+            self.udp_changed_callback(index)
+
     def _on_settings_clicked(self):
         if self.open_settings_callback:
             self.open_settings_callback()
 
     def set_toggle_state(self, state_code: str):
         self.current_state = state_code
-        checked = state_code == "STATE_BLOCKED"
+        # 進行中的狀態以目標狀態顯示（樂觀更新）
+        checked = state_code in ("STATE_BLOCKED", "STATE_BLOCKING")
+        pending = state_code in ("STATE_BLOCKING", "STATE_UNBLOCKING", "STATE_CHECKING")
         text = self.state_labels.get(state_code, "未知狀態")
         self.toggle_btn.setChecked(checked)
         self.toggle_btn.setText(text)
-        self.toggle_btn.setStyleSheet(self.get_toggle_style(checked))
+        # 啟動時尚未確認實際狀態：以灰色顯示
+        self.toggle_btn.setStyleSheet(
+            self.get_toggle_style(None if state_code == "STATE_CHECKING" else checked, pending)
+        )
 
     def get_selected_udp_ports(self) -> str:
         return self.combo.currentText()
@@ -399,6 +458,9 @@ class WarframeMainUI(QWidget):
     def set_selected_udp_index(self, index: int):
         self.combo.setCurrentIndex(index)
 
+    def set_selected_udp_ports(self, text: str):
+        self.combo.setEditText(text)
+
     def get_auto_recover_time(self) -> int:
         return self.recover_spinbox.value()
 
@@ -1,70 +1,42 @@
-import threading
-import keyboard
-from PySide6.QtCore import Qt, Signal, QObject, QTimer
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont, QCursor, QColor, QPalette
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QCheckBox,
-    QPushButton, QMessageBox,
+    QPushButton, QMessageBox, QGridLayout, QSpinBox,
     QHBoxLayout, QGraphicsDropShadowEffect, QApplication
 )
 from loguru import logger
 
-class HotkeyCapture(QObject):
-    """專用於快捷鍵捕獲的類別"""
-    hotkey_captured = Signal(str)
-    
-    def start_capture(self):
-        """開始捕獲快捷鍵（在子線程中執行）"""
-        def capture():
-            try:
-                logger.debug("開始捕獲快捷鍵")
-                hotkey = keyboard.read_hotkey(suppress=False)
-                # 標準化快捷鍵格式
-                formatted_hotkey = self._format_hotkey(hotkey)
-                logger.debug(f"捕獲到快捷鍵: {hotkey}, 格式化後: {formatted_hotkey}")
-                self.hotkey_captured.emit(formatted_hotkey)
-            except Exception as e:
-                # 捕獲錯誤但不中斷程式
-                logger.error(f"捕獲快捷鍵時發生錯誤: {e}")
-                self.hotkey_captured.emit("")
-        
-        threading.Thread(target=capture, daemon=True).start()
-    
-    def _format_hotkey(self, hotkey):
-        """標準化快捷鍵格式，讓其更美觀"""
-        if not hotkey:
-            return ""
-            
-        parts = hotkey.split('+')
-        formatted_parts = []
-        
-        for part in parts:
-            part = part.strip()
-            # 特殊按鍵首字母大寫
-            if part.lower() in ['ctrl', 'alt', 'shift', 'win']:
-                formatted_parts.append(part.capitalize())
-            # 單個字母全部大寫
-            elif len(part) == 1 and part.isalpha():
-                formatted_parts.append(part.upper())
-            # 其他按鍵首字母大寫
-            else:
-                formatted_parts.append(part.capitalize())
-                
-        return ' + '.join(formatted_parts)
+from src.bindings import ACTIONS, BindingConflictError, BindingTable, format_chord
 
 class SettingsUI(QWidget):
-    def __init__(self, notify_callback=None, hotkey_callback=None, clear_config_callback=None):
+    """
+    設定視窗。
+
+    - bindings_callback(table)：快捷鍵綁定變更時以新的 BindingTable 呼叫
+    - block_for_callback(seconds)：「阻斷 N 秒」的秒數變更時呼叫
+    - hotkey_manager：捕獲快捷鍵時沿用其掛鉤執行緒（start_capture / cancel_capture / capture_finished）
+    """
+    def __init__(self, notify_callback=None, bindings_callback=None, clear_config_callback=None,
+                 block_for_callback=None, bindings=None, block_for=60, hotkey_manager=None):
         super().__init__()
         logger.debug("初始化設定視窗")
         self.notify_callback = notify_callback
-        self.hotkey_callback = hotkey_callback
+        self.bindings_callback = bindings_callback
+        self.block_for_callback = block_for_callback
         self.clear_config_callback = clear_config_callback
+        self.bindings = bindings.copy() if bindings is not None else BindingTable()
+        self.block_for = block_for
+        self.binding_buttons = {}
+        self._capturing = None  # 正在捕獲快捷鍵的動作
+        self._capture_session = 0  # 進行中捕獲的編號，其他編號的結果一律忽略
         self.drag_position = None
         self.is_focused = False
         
-        # 創建快捷鍵捕獲器並連接信號
-        self.hotkey_capturer = HotkeyCapture()
-        self.hotkey_capturer.hotkey_captured.connect(self._on_hotkey_captured)
+        # 快捷鍵捕獲由快捷鍵管理器的掛鉤執行緒負責，不另外建立執行緒或掛鉤
+        self.hotkey_manager = hotkey_manager
+        if hotkey_manager is not None:
+            hotkey_manager.capture_finished.connect(self._on_hotkey_captured)
         
         self.init_ui()
 
@@ -72,7 +44,7 @@ class SettingsUI(QWidget):
         try:
             self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
             self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-            self.setFixedSize(275, 220)
+            self.setFixedSize(300, 150 + 32 * len(ACTIONS))
             self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)  # 讓視窗可以獲得焦點
 
             # 獲取系統調色板
@@ -153,31 +125,15 @@ class SettingsUI(QWidget):
             
             layout.addWidget(self.notify_checkbox)
 
-            # 快捷鍵區塊
-            layout.addWidget(QLabel("設定快捷鍵（按下按鈕後輸入）", font=font))
-
-            self.hotkey_display = QLabel("目前設定：無")
-            self.hotkey_display.setFont(font)
-            self.hotkey_display.setStyleSheet(f"""
-                QLabel {{
-                    border: 1px solid {input_border_color.name()};
-                    border-radius: 6px;
-                    background-color: {input_bg_color.name()};
-                    padding: 4px 8px;
-                    color: {text_color.name()};
-                }}
-            """)
-            layout.addWidget(self.hotkey_display)
+            # 快捷鍵區塊：每個動作一列（名稱 / 目前組合鍵（點擊設定）/ 清除）
+            layout.addWidget(QLabel("快捷鍵（點擊按鈕後按下組合鍵）", font=font))
 
-            self.hotkey_btn = QPushButton("點此設定快捷鍵")
-            self.hotkey_btn.setFont(font)
-            self.hotkey_btn.setCursor(QCursor(Qt.PointingHandCursor))
-            self.hotkey_btn.setStyleSheet(f"""
+            binding_style = f"""
                 QPushButton {{
                     background-color: {input_bg_color.name()};
                     border: 1px solid {input_border_color.name()};
-                    border-radius: 12px;
-                    padding: 6px;
+                    border-radius: 10px;
+                    padding: 3px 6px;
                     color: {text_color.name()};
                 }}
                 QPushButton:hover {{
@@ -186,9 +142,59 @@ class SettingsUI(QWidget):
                 QPushButton:pressed {{
                     background-color: {button_pressed_bg.name()};
                 }}
-            """)
-            self.hotkey_btn.clicked.connect(self._start_hotkey_capture)
-            layout.addWidget(self.hotkey_btn)
+            """
+            grid = QGridLayout()
+            grid.setHorizontalSpacing(6)
+            grid.setVerticalSpacing(4)
+            for row, (action, label) in enumerate(ACTIONS.items()):
+                if action == "block_for":
+                    # 「阻斷 N 秒」的秒數直接在名稱欄位調整
+                    name = QWidget()
+                    name_layout = QHBoxLayout(name)
+                    name_layout.setContentsMargins(0, 0, 0, 0)
+                    name_layout.setSpacing(2)
+                    name_layout.addWidget(QLabel("阻斷", font=font))
+                    self.block_for_spinbox = QSpinBox()
+                    self.block_for_spinbox.setFont(font)
+                    self.block_for_spinbox.setRange(1, 3600)
+                    self.block_for_spinbox.setValue(self.block_for)
+                    self.block_for_spinbox.valueChanged.connect(self._on_block_for_changed)
+                    name_layout.addWidget(self.block_for_spinbox)
+                    name_layout.addWidget(QLabel("秒", font=font))
+                    name_layout.addStretch()
+                else:
+                    name = QLabel(label, font=font)
+                grid.addWidget(name, row, 0)
+
+                button = QPushButton()
+                button.setFont(font)
+                button.setCursor(QCursor(Qt.PointingHandCursor))
+                button.setStyleSheet(binding_style)
+                button.clicked.connect(lambda checked=False, a=action: self._start_hotkey_capture(a))
+                grid.addWidget(button, row, 1)
+                self.binding_buttons[action] = button
+
+                clear = QPushButton("×")
+                clear.setFixedSize(22, 22)
+                clear.setCursor(QCursor(Qt.PointingHandCursor))
+                clear.setToolTip("清除此快捷鍵")
+                clear.setStyleSheet(f"""
+                    QPushButton {{
+                        background-color: transparent;
+                        border: none;
+                        font-size: 14px;
+                        color: {text_color.name()};
+                    }}
+                    QPushButton:hover {{
+                        background-color: {button_hover_bg.name()};
+                        border-radius: 11px;
+                    }}
+                """)
+                clear.clicked.connect(lambda checked=False, a=action: self._clear_binding(a))
+                grid.addWidget(clear, row, 2)
+            grid.setColumnStretch(1, 1)
+            layout.addLayout(grid)
+            self._refresh_bindings()
 
             # 清除設定按鈕 - 保留紅色警告風格
             danger_main_color = "#B22222"  # 與main.py一致的紅色
@@ -220,42 +226,111 @@ class SettingsUI(QWidget):
             logger.error(f"初始化UI時發生錯誤: {e}")
             logger.exception("詳細錯誤")
 
-    def _start_hotkey_capture(self):
-        """開始捕獲快捷鍵"""
+    def set_bindings(self, bindings, block_for=None):
+        """由外部更新顯示的綁定（例如清除設定後）"""
+        self.bindings = bindings.copy()
+        if block_for is not None:
+            self.block_for = block_for
+            self.block_for_spinbox.blockSignals(True)
+            self.block_for_spinbox.setValue(block_for)
+            self.block_for_spinbox.blockSignals(False)
+        self._refresh_bindings()
+
+    def _refresh_bindings(self):
+        for action, button in self.binding_buttons.items():
+            chord = self.bindings.chord_for(action)
+            button.setText(format_chord(chord) if chord else "未設定")
+
+    def _start_hotkey_capture(self, action):
+        """
+        開始捕獲指定動作的快捷鍵（單獨按 Esc 取消，逾時自動取消）。
+        捕獲中點擊其他動作時改為捕獲該動作。
+        """
         try:
-            logger.debug("開始捕獲快捷鍵")
-            self.hotkey_btn.setText("請按下組合鍵...")
-            self.hotkey_display.setText("目前設定：偵測中...")
-            self.setDisabled(True)
-            
-            # 使用信號來處理跨線程通信
-            self.hotkey_capturer.start_capture()
+            if self.hotkey_manager is None:
+                logger.warning("沒有快捷鍵管理器，無法捕獲快捷鍵")
+                return
+            logger.debug(f"開始捕獲快捷鍵: {action}")
+            self._capturing = action
+            self._refresh_bindings()
+            self.binding_buttons[action].setText("請按下組合鍵…（Esc 取消）")
+            self._capture_session = self.hotkey_manager.start_capture()
+            if not self._capture_session:
+                self._capturing = None
+                self._refresh_bindings()
         except Exception as e:
             logger.error(f"啟動快捷鍵捕獲時發生錯誤: {e}")
-            self.setDisabled(False)
-            self.hotkey_btn.setText("點此設定快捷鍵")
-    
-    def _on_hotkey_captured(self, hotkey):
-        """當快捷鍵被捕獲時處理（在UI線程中執行）"""
+            self._capturing = None
+            self._capture_session = 0
+            self._refresh_bindings()
+
+    def _cancel_hotkey_capture(self):
+        """取消進行中的捕獲"""
+        if self._capturing is None:
+            return
+        logger.debug(f"取消捕獲快捷鍵: {self._capturing}")
+        self._capturing = None
+        self._capture_session = 0
+        self.hotkey_manager.cancel_capture()
+        self._refresh_bindings()
+
+    def _on_hotkey_captured(self, session, hotkey, result):
+        """
+        捕獲結束（在UI線程中執行）；result 為 HotkeyManager.CAPTURED 等結果。
+        不是目前這次捕獲的結果（例如關閉視窗前取消的捕獲）直接忽略。
+        """
+        if session != self._capture_session:
+            logger.debug(f"忽略先前捕獲的結果: #{session} {result}")
+            return
+        action, self._capturing = self._capturing, None
+        self._capture_session = 0
         try:
-            if not hotkey:  # 如果出錯返回空字串
-                logger.warning("快捷鍵捕獲失敗或用戶取消")
-                self.hotkey_display.setText("目前設定：捕獲失敗")
-                self.hotkey_btn.setText("點此設定快捷鍵")
-                self.setDisabled(False)
+            if action is None:
                 return
-                
-            logger.info(f"已捕獲到快捷鍵: {hotkey}")
-            self.hotkey_display.setText(f"目前設定：{hotkey}")
-            self.hotkey_btn.setText("點此設定快捷鍵")
-            self.setDisabled(False)
-            
-            if self.hotkey_callback:
-                self.hotkey_callback(hotkey)
+            if not hotkey:
+                logger.info(f"快捷鍵捕獲未完成: {result}")
+                self._refresh_bindings()
+                return
+
+            logger.info(f"已捕獲到快捷鍵: {hotkey} ({action})")
+            self._bind(action, hotkey)
         except Exception as e:
             logger.error(f"處理捕獲到的快捷鍵時發生錯誤: {e}")
-            self.setDisabled(False)
-            self.hotkey_btn.setText("點此設定快捷鍵")
+            logger.exception("詳細錯誤")
+            self._refresh_bindings()
+
+    def _bind(self, action, hotkey):
+        """綁定快捷鍵；與其他動作衝突時詢問是否改綁"""
+        try:
+            self.bindings.bind(action, hotkey)
+        except BindingConflictError as e:
+            answer = QMessageBox.question(
+                self, "快捷鍵衝突",
+                f"{e}。\n要改為「{ACTIONS[action]}」嗎？（原本的綁定會被清除）"
+            )
+            if answer != QMessageBox.Yes:
+                logger.info(f"快捷鍵衝突，保留原本的綁定: {e}")
+                self._refresh_bindings()
+                return
+            self.bindings.bind(action, hotkey, replace=True)
+        self._refresh_bindings()
+        self._notify_bindings()
+
+    def _clear_binding(self, action):
+        if not self.bindings.chord_for(action):
+            return
+        self.bindings.unbind(action)
+        self._refresh_bindings()
+        self._notify_bindings()
+
+    def _notify_bindings(self):
+        if self.bindings_callback:
+            self.bindings_callback(self.bindings.copy())
+
+    def _on_block_for_changed(self, seconds):
+        self.block_for = seconds
+        if self.block_for_callback:
+            self.block_for_callback(seconds)
 
     def _on_clear_clicked(self):
         try:
@@ -265,7 +340,7 @@ class SettingsUI(QWidget):
                 if self.clear_config_callback:
                     self.clear_config_callback()
                 # 更新UI狀態以反應清除效果
-                self.hotkey_display.setText("目前設定：無")
+                self.set_bindings(BindingTable())
                 self.notify_checkbox.setChecked(True)
                 QMessageBox.information(self, "完成", "設定已清除！")
         except Exception as e:
@@ -313,8 +388,9 @@ class SettingsUI(QWidget):
         event.accept()
     
     def closeEvent(self, event):
-        """窗口關閉事件處理，只隱藏不關閉"""
+        """窗口關閉事件處理，只隱藏不關閉；進行中的快捷鍵捕獲立即取消"""
         try:
+            self._cancel_hotkey_capture()
             # 檢查是否為獨立運行模式
             if __name__ == "__main__":
                 logger.debug("設定視窗關閉事件觸發，關閉程式 (獨立運行模式)")
@@ -335,11 +411,16 @@ if __name__ == "__main__":
     from PySide6.QtWidgets import QApplication
     import sys
 
+    from src.utils.hotkey import HotkeyManager
+
     def notify_changed(enabled):
         print(f"[通知] 狀態改為：{enabled}")
 
-    def hotkey_set(hotkey):
-        print(f"[快捷鍵] 設定為：{hotkey}")
+    def bindings_set(table):
+        print(f"[快捷鍵] 設定為：{table.bindings}")
+
+    def block_for_set(seconds):
+        print(f"[快捷鍵] 阻斷秒數：{seconds}")
 
     def clear_all():
         print("[設定] 已清除")
@@ -347,10 +428,15 @@ if __name__ == "__main__":
     print("測試模式啟動：按X鍵將直接關閉程式")
 
     app = QApplication(sys.argv)
+    hotkey_manager = HotkeyManager()
+    app.aboutToQuit.connect(hotkey_manager.shutdown)
     window = SettingsUI(
         notify_callback=notify_changed,
-        hotkey_callback=hotkey_set,
-        clear_config_callback=clear_all
+        bindings_callback=bindings_set,
+        block_for_callback=block_for_set,
+        clear_config_callback=clear_all,
+        bindings=BindingTable({"toggle": "ctrl+shift+b"}),
+        hotkey_manager=hotkey_manager
     )
     
     window.show()
@@ -15,6 +15,7 @@ class TrayManager(QObject):
     toggle_firewall_signal = Signal(bool)
     open_firewall_signal = Signal()
     open_settings_signal = Signal()
+    show_latency_signal = Signal()
     quit_app_signal = Signal()
     
     def __init__(self, parent=None, resolve_path=lambda x: x):
@@ -128,6 +129,10 @@ class TrayManager(QObject):
             fw_action = QAction("查看防火牆", self.parent_window)
             fw_action.triggered.connect(self.open_firewall_signal.emit)
             menu.addAction(fw_action)
+
+            latency_action = QAction("快捷鍵延遲統計", self.parent_window)
+            latency_action.triggered.connect(self.show_latency_signal.emit)
+            menu.addAction(latency_action)
             
             menu.addSeparator()
             
@@ -155,13 +160,17 @@ class TrayManager(QObject):
         except Exception as e:
             logger.error(f"處理Tray圖示點擊時發生錯誤: {e}")
     
-    def update_status(self, is_blocked):
-        """更新系統Tray狀態（同步更新圖示和選單項目）"""
+    def update_status(self, is_blocked, pending=False):
+        """
+        更新系統Tray狀態（同步更新圖示和選單項目）
+        pending 為 True 時表示切換進行中，is_blocked 為目標狀態；
+        is_blocked 為 None 時表示啟動時仍在確認實際狀態
+        """
         try:
             # 如果不在主執行緒，重新調度到主執行緒
             if QThread.currentThread() != self.thread():
                 logger.debug("從非主執行緒調用 update_status，重新調度至主執行緒")
-                QTimer.singleShot(0, lambda blocked=is_blocked: self.update_status(blocked))
+                QTimer.singleShot(0, lambda blocked=is_blocked, p=pending: self.update_status(blocked, p))
                 return
             
             # 基本檢查
@@ -170,7 +179,15 @@ class TrayManager(QObject):
                 return
                 
             # 更新狀態文字
-            if is_blocked:
+            if is_blocked is None:
+                self.status_action.setText("⏳ 配對狀態：檢查中…")
+                self.toggle_action.setText("切換配對狀態")
+                new_icon = self._icon_normal
+            elif pending:
+                self.status_action.setText("⏳ 配對狀態：阻斷中…" if is_blocked else "⏳ 配對狀態：恢復中…")
+                self.toggle_action.setText("切換為正常配對" if is_blocked else "切換為阻斷配對")
+                new_icon = self._icon_blocked if is_blocked else self._icon_normal
+            elif is_blocked:
                 self.status_action.setText("🔴 配對狀態：已阻斷")
                 self.toggle_action.setText("切換為正常配對")
                 new_icon = self._icon_blocked
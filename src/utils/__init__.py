@@ -1,7 +1,29 @@
 """
 工具模組 - 提供熱鍵管理等實用功能
+
+各元件在第一次使用時才載入（例如 HotkeyManager 會連帶載入 keyboard）。
 """
 
-from .hotkey import HotkeyManager
+__all__ = ['HotkeyManager', 'RuleStateMonitor', 'FirewallWorker', 'ToggleCoalescer', 'IpcServer', 'FirstPaintProbe']
+
 
-__all__ = ['HotkeyManager']
+def __getattr__(name):
+    if name == 'HotkeyManager':
+        from .hotkey import HotkeyManager
+        return HotkeyManager
+    if name == 'RuleStateMonitor':
+        from .rule_monitor import RuleStateMonitor
+        return RuleStateMonitor
+    if name == 'FirewallWorker':
+        from .firewall_worker import FirewallWorker
+        return FirewallWorker
+    if name == 'ToggleCoalescer':
+        from .toggle_coalescer import ToggleCoalescer
+        return ToggleCoalescer
+    if name == 'IpcServer':
+        from .ipc_server import IpcServer
+        return IpcServer
+    if name == 'FirstPaintProbe':
+        from .first_paint import FirstPaintProbe
+        return FirstPaintProbe
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
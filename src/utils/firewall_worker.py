@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+from loguru import logger
+
+
+class FirewallWorker(QObject):
+    """
+    在專用的單一執行緒上依序執行防火牆操作，避免 netsh 等慢速呼叫卡住 UI。
+
+    - operation_started: 操作開始（於工作執行緒發送）
+    - operation_finished / operation_failed: 操作完成或失敗（於 UI 線程發送）
+    submit 可另外指定 on_success / on_error 回呼，一律在 UI 線程執行。
+    """
+    operation_started = Signal(str)
+    operation_finished = Signal(str, object)
+    operation_failed = Signal(str, object)
+
+    # 內部使用：把完成結果帶回 UI 線程
+    _completed = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="firewall")
+        self._completed.connect(self._on_completed)
+
+    def submit(self, name, func, *args, on_success=None, on_error=None):
+        """排入一個操作，回傳 concurrent.futures.Future"""
+        logger.debug(f"排入防火牆操作: {name}")
+        return self._executor.submit(self._run, name, func, args, on_success, on_error)
+
+    def _run(self, name, func, args, on_success, on_error):
+        self.operation_started.emit(name)
+        try:
+            result = func(*args)
+        except Exception as e:
+            logger.error(f"防火牆操作 {name} 失敗: {e}")
+            self._completed.emit((name, False, e, on_error))
+            raise
+        self._completed.emit((name, True, result, on_success))
+        return result
+
+    def _on_completed(self, payload):
+        name, ok, value, callback = payload
+        try:
+            if callback:
+                callback(value)
+        except Exception as e:
+            logger.error(f"處理防火牆操作 {name} 的完成回呼時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+        if ok:
+            self.operation_finished.emit(name, value)
+        else:
+            self.operation_failed.emit(name, value)
+
+    def shutdown(self, wait=True):
+        """停止接受新操作，wait=True 時等待已排入的操作完成"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        logger.debug("防火牆工作執行緒已停止")
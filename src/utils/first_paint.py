@@ -0,0 +1,20 @@
+from PySide6.QtCore import QEvent, QObject, Signal
+
+
+class FirstPaintProbe(QObject):
+    """
+    監看視窗的第一次繪製事件，發送 painted 後自動移除自己。
+    用於記錄啟動時「視窗真正畫到螢幕上」的時間點，而不只是 show() 被呼叫的時間。
+    """
+    painted = Signal()
+
+    def __init__(self, widget):
+        super().__init__(widget)
+        self._widget = widget
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self._widget and event.type() == QEvent.Type.Paint:
+            self._widget.removeEventFilter(self)
+            self.painted.emit()
+        return False
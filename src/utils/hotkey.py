@@ -1,72 +1,228 @@
+import queue
 import threading
-import keyboard
+import time
 from PySide6.QtCore import QObject, Signal
 from loguru import logger
 
+from src.bindings import BindingTable, format_chord, normalize_chord
+from src.latency import latency
+from .hotkey_backends import HotkeyBackend, HotkeyBackendError, create_hotkey_backend
+
+# 掛鉤執行緒的訊息
+_BIND = "bind"
+_STOP = "stop"
+_CAPTURE = "capture"
+_CAPTURED = "captured"
+_CANCEL_CAPTURE = "cancel_capture"
+
+
 class HotkeyManager(QObject):
-    """用於處理跨線程的快捷鍵操作"""
+    """
+    用於處理跨線程的快捷鍵操作。
+
+    實際的按鍵偵測交給快捷鍵後端（hotkey_backends：RegisterHotKey / keyboard / fake），
+    後端偵測到已綁定的組合鍵時透過 action_triggered 把動作送回 UI 線程。
+    套用對照表與停止以訊息排入佇列，由單一常駐的掛鉤執行緒處理，
+    該執行緒閒置時阻塞在後端的等待中（佇列或 Windows 訊息迴圈），沒有任何定時喚醒。
+
+    設定視窗捕獲快捷鍵也是同一條執行緒上的一種模式（start_capture / cancel_capture），
+    不會另外建立執行緒或第二個鍵盤掛鉤；捕獲期間暫停分派已綁定的動作，
+    結果（捕獲編號, 組合鍵, 結果）由 capture_finished 通知，只有捕獲期間才有逾時喚醒；
+    start_capture() 回傳的捕獲編號用來忽略先前（已取消或被取代）的捕獲送來的結果。
+    """
     toggle_signal = Signal(bool)  # 修改為帶參數的信號
-    
-    def __init__(self):
+    action_triggered = Signal(str, object)  # 快捷鍵觸發的動作（src.bindings.ACTIONS）與其 LatencyTrace
+    bindings_applied = Signal(int, bool)  # 掛鉤執行緒套用對照表完成（成功註冊的數量, 是否全部成功）
+    capture_finished = Signal(int, str, str)  # 捕獲結束（捕獲編號, 組合鍵, CAPTURED / CAPTURE_CANCELLED / CAPTURE_TIMEOUT / CAPTURE_FAILED）
+
+    SHUTDOWN_TIMEOUT = 2.0
+    CAPTURE_TIMEOUT = 10.0
+
+    # 捕獲結果
+    CAPTURED = "captured"
+    CAPTURE_CANCELLED = "cancelled"
+    CAPTURE_TIMEOUT_EXPIRED = "timeout"
+    CAPTURE_FAILED = "error"
+
+    def __init__(self, backend='auto'):
+        """backend 可為後端名稱或 HotkeyBackend 實例；以名稱指定時在第一次設定綁定時才建立"""
         super().__init__()
         logger.debug("初始化快捷鍵管理器")
+        self.backend = None
+        self._backend_spec = backend
+        self._queue = queue.Queue()
         self._thread = None
-        self._stop_event = threading.Event()
-    
-    def register_hotkey(self, hotkey, callback):
-        """註冊快捷鍵（在新線程中執行keyboard監聽）"""
-        try:
-            if not hotkey:
-                logger.debug("沒有提供有效的快捷鍵")
+        self._lock = threading.Lock()
+        self._next_session = 0  # 最後一次 start_capture() 配發的捕獲編號
+        # 捕獲狀態（只在掛鉤執行緒上存取）
+        self._capture_session = 0
+        self._capture_deadline = None
+
+    def set_backend(self, backend):
+        """更換快捷鍵後端（只能在掛鉤執行緒啟動前呼叫）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                logger.warning("快捷鍵掛鉤執行緒已啟動，無法更換後端")
                 return False
-                
-            # 若已經有監聽線程，先停止它
-            self.unregister_hotkey()
-            
-            # 重設停止事件
-            self._stop_event.clear()
-            
-            def listener_thread():
-                logger.debug(f"啟動快捷鍵監聽線程: {hotkey}")
-                try:
-                    keyboard.add_hotkey(hotkey, callback, suppress=False)
-                    
-                    # 持續運行直到停止事件被設置
-                    while not self._stop_event.is_set():
-                        self._stop_event.wait(0.1)  # 短暫睡眠以降低CPU使用率
-                        
-                    # 清理
-                    keyboard.remove_hotkey(hotkey)
-                    logger.debug("快捷鍵監聽已停止")
-                except Exception as e:
-                    logger.error(f"快捷鍵監聽發生錯誤: {e}")
-                    logger.exception("詳細錯誤")
-            
-            # 啟動新的監聽線程
-            self._thread = threading.Thread(target=listener_thread, daemon=True)
-            self._thread.start()
-            logger.info(f"已註冊快捷鍵: {hotkey}")
+            self.backend = None
+            self._backend_spec = backend
             return True
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self.backend is None:
+                    if isinstance(self._backend_spec, HotkeyBackend):
+                        self.backend = self._backend_spec
+                        self.backend.dispatch = self._dispatch
+                    else:
+                        self.backend = create_hotkey_backend(self._backend_spec, self._dispatch)
+                    logger.info(f"使用快捷鍵後端: {self.backend.name}")
+                self._thread = threading.Thread(target=self._hook_loop, name="hotkey-hook", daemon=True)
+                self._thread.start()
+
+    def _post(self, message):
+        self._queue.put(message)
+        self.backend.wake()
+
+    def _dispatch(self, action):
+        """（後端的執行緒）已綁定的組合鍵被按下；延遲追蹤從這裡開始"""
+        trace = latency.begin(action)
+        logger.debug(f"快捷鍵觸發動作: {action}")
+        trace.mark("emit")
+        self.action_triggered.emit(action, trace)
+
+    def _hook_loop(self):
+        """掛鉤執行緒：依序處理控制訊息，直到收到停止訊息"""
+        logger.debug("快捷鍵掛鉤執行緒已啟動")
+        backend = self.backend
+        backend.start()
+        while True:
+            timeout = None
+            if self._capture_deadline is not None:
+                timeout = max(self._capture_deadline - time.monotonic(), 0)
+            message = backend.next_message(self._queue, timeout)
+            if message is None:
+                logger.info("捕獲快捷鍵逾時")
+                self._finish_capture(backend, "", self.CAPTURE_TIMEOUT_EXPIRED)
+                continue
+            kind = message[0]
+            try:
+                if kind == _BIND:
+                    table = message[1]
+                    try:
+                        failed = backend.apply(table)
+                    except HotkeyBackendError as e:
+                        logger.error(f"套用快捷鍵失敗: {e}")
+                        self.bindings_applied.emit(0, False)
+                    else:
+                        self.bindings_applied.emit(len(table) - len(failed), not failed)
+                elif kind == _CAPTURE:
+                    self._begin_capture(backend, message[1], message[2])
+                elif kind == _CAPTURED:
+                    session, chord = message[1], message[2]
+                    # 已取消或被新的捕獲取代時忽略
+                    if session == self._capture_session and self._capture_deadline is not None:
+                        self._finish_capture(backend, chord, self.CAPTURED if chord else self.CAPTURE_CANCELLED)
+                elif kind == _CANCEL_CAPTURE:
+                    if self._capture_deadline is not None:
+                        self._finish_capture(backend, "", self.CAPTURE_CANCELLED)
+                elif kind == _STOP:
+                    if self._capture_deadline is not None:
+                        self._finish_capture(backend, "", self.CAPTURE_CANCELLED)
+                    backend.stop()
+                    break
+            except Exception as e:
+                logger.error(f"處理快捷鍵訊息 {kind} 時發生錯誤: {e}")
+                logger.exception("詳細錯誤")
+            finally:
+                self._queue.task_done()
+        logger.debug("快捷鍵掛鉤執行緒已停止")
+
+    def _begin_capture(self, backend, session, timeout):
+        """（掛鉤執行緒）進入捕獲模式；進行中的捕獲直接由新的取代，不另外通知"""
+        self._capture_session = session
+        try:
+            backend.begin_capture(lambda chord: self._post((_CAPTURED, session, chord)))
+        except HotkeyBackendError as e:
+            logger.error(f"無法開始捕獲快捷鍵: {e}")
+            self._capture_deadline = None
+            self.capture_finished.emit(session, "", self.CAPTURE_FAILED)
+            return
+        self._capture_deadline = time.monotonic() + timeout
+        logger.debug(f"開始捕獲快捷鍵（{timeout:g} 秒後逾時）")
+
+    def _finish_capture(self, backend, chord, result):
+        """（掛鉤執行緒）離開捕獲模式並通知結果"""
+        self._capture_deadline = None
+        try:
+            backend.end_capture()
         except Exception as e:
-            logger.error(f"註冊快捷鍵時發生錯誤: {e}")
+            logger.error(f"結束捕獲快捷鍵時發生錯誤: {e}")
             logger.exception("詳細錯誤")
-            return False
-    
-    def unregister_hotkey(self):
-        """取消註冊快捷鍵並停止監聽線程"""
+        logger.debug(f"捕獲快捷鍵結束: #{self._capture_session} {result} {chord}")
+        self.capture_finished.emit(self._capture_session, chord, result)
+
+    def start_capture(self, timeout=CAPTURE_TIMEOUT):
+        """
+        捕獲下一個按下的組合鍵（單獨按 Esc 取消），交由掛鉤執行緒處理。
+        回傳這次捕獲的編號（失敗時為 0），結果由帶有相同編號的 capture_finished 訊號通知。
+        """
         try:
-            if self._thread and self._thread.is_alive():
-                logger.debug("停止現有的快捷鍵監聽線程")
-                self._stop_event.set()
-                self._thread.join(1.0)  # 等待線程結束，最多1秒
-                self._thread = None
-                return True
+            self._ensure_thread()
+            with self._lock:
+                self._next_session += 1
+                session = self._next_session
+            self._post((_CAPTURE, session, timeout))
+            return session
+        except Exception as e:
+            logger.error(f"開始捕獲快捷鍵時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+            return 0
+
+    def cancel_capture(self):
+        """取消進行中的捕獲（沒有進行中的捕獲時不做任何事）"""
+        if self._thread is None or not self._thread.is_alive():
             return False
+        self._post((_CANCEL_CAPTURE,))
+        return True
+
+    def set_bindings(self, table):
+        """
+        套用新的對照表（取代目前的所有綁定），交由掛鉤執行緒處理。
+        回傳 True 只代表已排入，實際結果由 bindings_applied 訊號通知。
+        """
+        try:
+            self._ensure_thread()
+            self._post((_BIND, table.copy()))
+            logger.info(f"已排入快捷鍵設定: {len(table)} 組")
+            return True
         except Exception as e:
-            logger.error(f"取消註冊快捷鍵時發生錯誤: {e}")
+            logger.error(f"設定快捷鍵時發生錯誤: {e}")
             logger.exception("詳細錯誤")
             return False
-    
+
+    def clear_bindings(self):
+        """移除所有綁定（掛鉤執行緒繼續存在，等待下一次設定）"""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        logger.debug("排入移除所有快捷鍵")
+        self._post((_BIND, BindingTable()))
+        return True
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """移除所有綁定並停止掛鉤執行緒，回傳執行緒是否已結束"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return True
+        self._post((_STOP,))
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("快捷鍵掛鉤執行緒未在時限內結束")
+            return False
+        return True
+
     def emit_toggle(self, from_hotkey=True):
         """發送切換信號到UI線程，標記是否來自快捷鍵"""
         try:
@@ -75,26 +231,8 @@ class HotkeyManager(QObject):
         except Exception as e:
             logger.error(f"發送切換信號時發生錯誤: {e}")
             logger.exception("詳細錯誤")
-    
+
     @staticmethod
     def format_hotkey_display(hotkey):
         """格式化快捷鍵顯示"""
-        if not hotkey:
-            return ""
-            
-        parts = hotkey.split('+')
-        formatted_parts = []
-        
-        for part in parts:
-            part = part.strip()
-            # 特殊按鍵首字母大寫
-            if part.lower() in ['ctrl', 'alt', 'shift', 'win']:
-                formatted_parts.append(part.capitalize())
-            # 單個字母全部大寫
-            elif len(part) == 1 and part.isalpha():
-                formatted_parts.append(part.upper())
-            # 其他按鍵首字母大寫
-            else:
-                formatted_parts.append(part.capitalize())
-                
-        return ' + '.join(formatted_parts) 
\ No newline at end of file
+        return format_chord(normalize_chord(hotkey))
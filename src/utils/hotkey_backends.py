@@ -0,0 +1,587 @@
+"""
+快捷鍵後端 - 由 HotkeyManager 的掛鉤執行緒呼叫（不依賴 PySide6）
+
+- win32：RegisterHotKey（pywin32），由系統比對組合鍵，只有按下已註冊的組合鍵時才會喚醒我們；
+  其他按鍵完全不經過 Python，遊戲中的輸入不受 GIL 競爭影響
+- keyboard：keyboard.hook 全域低階掛鉤，每個按鍵都在 Python 中比對（跨平台的備援）
+- fake：不安裝任何掛鉤，press() 模擬按下組合鍵，供測試使用
+
+後端在掛鉤執行緒上使用：apply(table) 套用對照表，next_message(inbox, timeout) 阻塞等待下一個控制訊息
+（同時處理後端自己的事件），wake() 可從其他執行緒呼叫，讓 next_message 立即檢查佇列。
+設定快捷鍵時以 begin_capture() / end_capture() 切換成捕獲模式，沿用同一個掛鉤（或同一條掛鉤執行緒）。
+"""
+
+import os
+import queue
+import time
+
+from loguru import logger
+
+from src.bindings import BindingTable, MODIFIERS, chord_from_keys, normalize_key
+from src.latency import percentile
+
+
+class HotkeyBackendError(Exception):
+    """快捷鍵後端無法使用"""
+
+
+class HotkeyBackend:
+    """快捷鍵後端介面；dispatch(action) 由後端在偵測到已綁定的組合鍵時呼叫"""
+    name = 'base'
+
+    def __init__(self, dispatch=None):
+        self.dispatch = dispatch or (lambda action: None)
+        self.capturing = False
+        self._on_capture = None
+        self._capture_pressed = set()
+
+    def start(self):
+        """在掛鉤執行緒上、處理任何訊息之前呼叫"""
+
+    def apply(self, table):
+        """套用對照表（取代目前的所有綁定），回傳無法註冊的組合鍵清單"""
+        raise NotImplementedError
+
+    def next_message(self, inbox, timeout=None):
+        """阻塞直到 inbox 有控制訊息並回傳它；超過 timeout 秒時回傳 None"""
+        try:
+            return inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wake(self):
+        """（任意執行緒）inbox 有新訊息時呼叫"""
+
+    def stop(self):
+        """移除所有綁定（掛鉤執行緒結束前呼叫）"""
+        self.apply(BindingTable())
+
+    def begin_capture(self, on_capture):
+        """
+        進入捕獲模式（掛鉤執行緒）：暫停分派已綁定的動作，下一個非修飾鍵按下時
+        以 on_capture(組合鍵) 回報一次；單獨按下 Esc 時回報空字串表示取消。
+        """
+        self._capture_pressed = set()
+        self._on_capture = on_capture
+        self.capturing = True
+
+    def end_capture(self):
+        """離開捕獲模式（掛鉤執行緒），恢復分派已綁定的動作"""
+        self.capturing = False
+        self._on_capture = None
+
+    def capture_key(self, key, down):
+        """捕獲模式下的按鍵事件（key 為正規化的按鍵名稱）"""
+        if not self.capturing:
+            return
+        if not down:
+            self._capture_pressed.discard(key)
+            return
+        if key in MODIFIERS:
+            self._capture_pressed.add(key)
+            return
+        modifiers = set(self._capture_pressed)
+        chord = "" if key == "esc" and not modifiers else chord_from_keys(modifiers | {key})
+        on_capture, self._on_capture = self._on_capture, None
+        if on_capture is not None:
+            on_capture(chord)
+
+
+# 按住 Shift 時名稱會改變的按鍵（例如 Shift+1 的事件名稱為 "!"），組合鍵一律使用未按 Shift 時的名稱
+UNSHIFTED_KEYS = tuple(str(d) for d in range(10)) + (";", "=", ",", "-", ".", "/", "`", "[", "\\", "]", "'")
+# keyboard 無法查詢鍵盤配置時（例如 Linux 上沒有 dumpkeys）使用的美式鍵盤掃描碼
+US_SCAN_CODES = {
+    2: "1", 3: "2", 4: "3", 5: "4", 6: "5", 7: "6", 8: "7", 9: "8", 10: "9", 11: "0",
+    12: "-", 13: "=", 26: "[", 27: "]", 39: ";", 40: "'", 41: "`", 43: "\\", 51: ",", 52: ".", 53: "/",
+}
+
+
+class KeyboardHotkeyBackend(HotkeyBackend):
+    """
+    以單一 keyboard.hook 處理所有綁定：每個按鍵事件都在 keyboard 的監聽執行緒中
+    正規化成組合鍵，再以對照表查出動作。
+    數字與標點以掃描碼取得未按 Shift 時的名稱，Shift+1 與設定中的 "shift+1" 一致。
+    """
+    name = 'keyboard'
+
+    def __init__(self, dispatch=None, keyboard_module=None):
+        """keyboard_module 可替換 keyboard 模組（測試用），預設在第一次套用綁定時才載入"""
+        super().__init__(dispatch)
+        self._keyboard = keyboard_module
+        self._hook = None
+        self._table = BindingTable()
+        self._pressed = set()
+        self._unshifted = None  # 掃描碼 → 未按 Shift 時的按鍵名稱（安裝掛鉤時建立）
+
+    def _load_keyboard(self):
+        if self._keyboard is None:
+            # keyboard 載入時會安裝系統鍵盤掛鉤，延後到實際設定快捷鍵時才載入
+            try:
+                import keyboard
+            except ImportError as e:
+                raise HotkeyBackendError(f"無法載入 keyboard：{e}")
+            self._keyboard = keyboard
+        return self._keyboard
+
+    def apply(self, table):
+        # 先替換對照表（單一參照的指派，監聽執行緒不會看到一半的狀態）
+        self._table = table
+        if not len(table) and not self.capturing:
+            self._unhook()
+            return []
+        self._install()
+        return []
+
+    def _scan_code_names(self):
+        """由 keyboard 的鍵盤配置建立掃描碼 → 未按 Shift 時的按鍵名稱，無法查詢時使用美式鍵盤的對照"""
+        table = {}
+        to_scan_codes = getattr(self._keyboard, "key_to_scan_codes", None)
+        if to_scan_codes is not None:
+            try:
+                for name in UNSHIFTED_KEYS:
+                    for code in to_scan_codes(name, error_if_missing=False):
+                        table.setdefault(code, name)
+            except Exception as e:
+                logger.warning(f"無法查詢鍵盤配置，改用美式鍵盤的掃描碼: {e}")
+                table = {}
+        return table or dict(US_SCAN_CODES)
+
+    def _install(self):
+        if self._hook is None:
+            try:
+                keyboard = self._load_keyboard()
+                if self._unshifted is None:
+                    self._unshifted = self._scan_code_names()
+                self._hook = keyboard.hook(self.on_key_event)
+            except HotkeyBackendError:
+                raise
+            except Exception as e:
+                raise HotkeyBackendError(f"安裝鍵盤掛鉤失敗：{e}")
+            logger.debug("已安裝鍵盤掛鉤")
+
+    def _unhook(self):
+        if self._hook is None:
+            return
+        hook, self._hook = self._hook, None
+        try:
+            self._keyboard.unhook(hook)
+            logger.debug("已移除鍵盤掛鉤")
+        except (KeyError, ValueError) as e:
+            logger.warning(f"移除鍵盤掛鉤時發生錯誤: {e}")
+        self._pressed.clear()
+
+    def begin_capture(self, on_capture):
+        # 沒有任何綁定時掛鉤尚未安裝，捕獲期間暫時安裝同一個掛鉤
+        self._install()
+        super().begin_capture(on_capture)
+
+    def end_capture(self):
+        super().end_capture()
+        self._pressed.clear()
+        if not len(self._table):
+            self._unhook()
+
+    def key_name(self, event):
+        """事件的正規化按鍵名稱；數字鍵盤以外的數字與標點依掃描碼取得未按 Shift 時的名稱"""
+        if self._unshifted and not getattr(event, "is_keypad", False):
+            name = self._unshifted.get(getattr(event, "scan_code", None))
+            if name is not None:
+                return name
+        return normalize_key(event.name or "")
+
+    def on_key_event(self, event):
+        """（keyboard 監聽執行緒）追蹤按下的按鍵，並以對照表分派組合鍵"""
+        key = self.key_name(event)
+        if not key:
+            return
+        if self.capturing:
+            self.capture_key(key, event.event_type != "up")
+            return
+        if event.event_type == "up":
+            self._pressed.discard(key)
+            return
+        if key in self._pressed:
+            return  # 按住不放時的自動重複
+        self._pressed.add(key)
+        if key in MODIFIERS:
+            return
+        # 只以目前按住的修飾鍵加上這個按鍵組成組合鍵，避免漏掉放開事件的按鍵影響之後的判斷
+        action = self._table.lookup(chord_from_keys({k for k in self._pressed if k in MODIFIERS} | {key}))
+        if action is not None:
+            self.dispatch(action)
+
+
+# RegisterHotKey 的修飾鍵旗標與虛擬鍵碼
+MOD_FLAGS = {"alt": 0x0001, "ctrl": 0x0002, "shift": 0x0004, "win": 0x0008}
+MOD_NOREPEAT = 0x4000
+WM_HOTKEY = 0x0312
+WM_TIMER = 0x0113
+WM_APP_WAKE = 0x8000 + 1  # WM_APP + 1：通知掛鉤執行緒檢查控制佇列
+WM_KEYDOWN = 0x0100
+WM_SYSKEYDOWN = 0x0104
+WH_KEYBOARD_LL = 13
+
+VIRTUAL_KEYS = {
+    "backspace": 0x08, "tab": 0x09, "enter": 0x0D, "pause": 0x13, "caps lock": 0x14,
+    "esc": 0x1B, "space": 0x20, "page up": 0x21, "page down": 0x22, "end": 0x23,
+    "home": 0x24, "left": 0x25, "up": 0x26, "right": 0x27, "down": 0x28,
+    "print screen": 0x2C, "insert": 0x2D, "delete": 0x2E, "scroll lock": 0x91,
+    ";": 0xBA, "=": 0xBB, ",": 0xBC, "-": 0xBD, ".": 0xBE, "/": 0xBF, "`": 0xC0,
+    "[": 0xDB, "\\": 0xDC, "]": 0xDD, "'": 0xDE,
+}
+VIRTUAL_KEYS.update({chr(c): ord(chr(c).upper()) for c in range(ord("a"), ord("z") + 1)})
+VIRTUAL_KEYS.update({str(d): 0x30 + d for d in range(10)})
+VIRTUAL_KEYS.update({f"f{n}": 0x70 + n - 1 for n in range(1, 25)})
+VIRTUAL_KEYS.update({f"num {d}": 0x60 + d for d in range(10)})
+
+# 捕獲快捷鍵時由虛擬鍵碼反查按鍵名稱（修飾鍵含左右兩側的鍵碼）
+VIRTUAL_KEY_NAMES = {vk: name for name, vk in VIRTUAL_KEYS.items()}
+VIRTUAL_KEY_NAMES.update({
+    0x10: "shift", 0xA0: "shift", 0xA1: "shift",
+    0x11: "ctrl", 0xA2: "ctrl", 0xA3: "ctrl",
+    0x12: "alt", 0xA4: "alt", 0xA5: "alt",
+    0x5B: "win", 0x5C: "win",
+})
+
+
+def chord_to_hotkey(chord):
+    """正規化的組合鍵轉成 RegisterHotKey 的 (修飾鍵旗標, 虛擬鍵碼)；無法表示時拋出 ValueError"""
+    keys = chord.split("+")
+    modifiers = 0
+    others = []
+    for key in keys:
+        if key in MOD_FLAGS:
+            modifiers |= MOD_FLAGS[key]
+        else:
+            others.append(key)
+    if len(others) != 1:
+        raise ValueError(f"RegisterHotKey 只支援一個非修飾鍵: {chord}")
+    if others[0] not in VIRTUAL_KEYS:
+        raise ValueError(f"不支援的按鍵: {others[0]}")
+    return modifiers | MOD_NOREPEAT, VIRTUAL_KEYS[others[0]]
+
+
+class Win32HotkeyBackend(HotkeyBackend):
+    """
+    以 RegisterHotKey 註冊每個綁定，掛鉤執行緒在 GetMessage 中等待：
+    系統只在按下已註冊的組合鍵時送來 WM_HOTKEY，其他按鍵不會喚醒我們；
+    控制訊息以 PostThreadMessage(WM_APP_WAKE) 喚醒，等待逾時以執行緒計時器（WM_TIMER）喚醒。
+    RegisterHotKey 無法得知任意按鍵，捕獲模式期間在同一條執行緒上暫時安裝 WH_KEYBOARD_LL 掛鉤，
+    由 GetMessage 的訊息迴圈驅動，結束捕獲即移除。
+    """
+    name = 'win32'
+
+    def __init__(self, dispatch=None):
+        super().__init__(dispatch)
+        try:
+            import win32api
+            import win32gui
+        except ImportError as e:
+            raise HotkeyBackendError(f"無法載入 pywin32：{e}")
+        self._api = win32api
+        self._gui = win32gui
+        self._thread_id = None
+        self._actions = {}  # 熱鍵 id → 動作
+        self._user32 = None
+        self._capture_hook = None
+        self._capture_proc = None
+
+    def start(self):
+        self._thread_id = self._api.GetCurrentThreadId()
+        # 確保執行緒已有訊息佇列，之後的 PostThreadMessage 才不會遺失
+        self._gui.PeekMessage(None, 0, 0, 0)
+
+    def apply(self, table):
+        for hotkey_id in list(self._actions):
+            try:
+                self._gui.UnregisterHotKey(None, hotkey_id)
+            except Exception as e:
+                logger.warning(f"取消註冊熱鍵 {hotkey_id} 時發生錯誤: {e}")
+        self._actions = {}
+        failed = []
+        for hotkey_id, (action, chord) in enumerate(table, start=1):
+            try:
+                modifiers, vk = chord_to_hotkey(chord)
+                self._gui.RegisterHotKey(None, hotkey_id, modifiers, vk)
+            except Exception as e:
+                # 組合鍵已被其他程式註冊，或無法以 RegisterHotKey 表示
+                logger.error(f"註冊熱鍵 {chord} 失敗: {e}")
+                failed.append(chord)
+                continue
+            self._actions[hotkey_id] = action
+        return failed
+
+    def _load_user32(self):
+        """pywin32 沒有提供低階鍵盤掛鉤與執行緒計時器，以 ctypes 呼叫 user32"""
+        if self._user32 is None:
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.WinDLL("user32", use_last_error=True)
+            self._hook_proc_type = ctypes.WINFUNCTYPE(wintypes.LPARAM, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+            user32.SetWindowsHookExW.argtypes = (ctypes.c_int, self._hook_proc_type, wintypes.HINSTANCE, wintypes.DWORD)
+            user32.SetWindowsHookExW.restype = wintypes.HHOOK
+            user32.CallNextHookEx.argtypes = (wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+            user32.CallNextHookEx.restype = wintypes.LPARAM
+            user32.UnhookWindowsHookEx.argtypes = (wintypes.HHOOK,)
+            user32.SetTimer.argtypes = (wintypes.HWND, ctypes.c_size_t, wintypes.UINT, ctypes.c_void_p)
+            user32.SetTimer.restype = ctypes.c_size_t
+            user32.KillTimer.argtypes = (wintypes.HWND, ctypes.c_size_t)
+            self._ctypes = ctypes
+            self._user32 = user32
+        return self._user32
+
+    def begin_capture(self, on_capture):
+        user32 = self._load_user32()
+        super().begin_capture(on_capture)
+        if self._capture_hook is None:
+            self._capture_proc = self._hook_proc_type(self._low_level_proc)
+            self._capture_hook = user32.SetWindowsHookExW(WH_KEYBOARD_LL, self._capture_proc, None, 0)
+            if not self._capture_hook:
+                super().end_capture()
+                self._capture_proc = None
+                raise HotkeyBackendError(f"安裝捕獲用鍵盤掛鉤失敗 (錯誤碼 {self._ctypes.get_last_error()})")
+            logger.debug("已安裝捕獲用鍵盤掛鉤")
+
+    def end_capture(self):
+        super().end_capture()
+        if self._capture_hook is not None:
+            hook, self._capture_hook = self._capture_hook, None
+            if not self._user32.UnhookWindowsHookEx(hook):
+                logger.warning(f"移除捕獲用鍵盤掛鉤失敗 (錯誤碼 {self._ctypes.get_last_error()})")
+            self._capture_proc = None
+            logger.debug("已移除捕獲用鍵盤掛鉤")
+
+    def _low_level_proc(self, code, wparam, lparam):
+        """（掛鉤執行緒，於 GetMessage 中）低階鍵盤掛鉤；只觀察按鍵，不攔截"""
+        try:
+            if code == 0:
+                # KBDLLHOOKSTRUCT 的第一個欄位為 vkCode
+                vk = self._ctypes.cast(lparam, self._ctypes.POINTER(self._ctypes.c_ulong)).contents.value
+                key = VIRTUAL_KEY_NAMES.get(vk)
+                if key is not None:
+                    self.capture_key(key, wparam in (WM_KEYDOWN, WM_SYSKEYDOWN))
+        except Exception as e:
+            logger.error(f"處理捕獲按鍵時發生錯誤: {e}")
+        return self._user32.CallNextHookEx(None, code, wparam, lparam)
+
+    def handle_message(self, message):
+        """處理一則 Windows 訊息，回傳是否為喚醒訊息"""
+        kind, wparam = message[1], message[2]
+        if kind == WM_HOTKEY:
+            action = self._actions.get(wparam)
+            if action is not None and not self.capturing:
+                self.dispatch(action)
+            return False
+        return kind == WM_APP_WAKE
+
+    def next_message(self, inbox, timeout=None):
+        timer = None
+        if timeout is not None:
+            timer = self._load_user32().SetTimer(None, 0, max(int(timeout * 1000), 1), None)
+        try:
+            while True:
+                try:
+                    return inbox.get_nowait()
+                except queue.Empty:
+                    pass
+                result, message = self._gui.GetMessage(None, 0, 0)
+                if result in (0, -1):
+                    # WM_QUIT 或錯誤：改為直接等待控制訊息
+                    return super().next_message(inbox, timeout)
+                if timer and message[1] == WM_TIMER and message[2] == timer:
+                    return None
+                self.handle_message(message)
+        finally:
+            if timer:
+                self._user32.KillTimer(None, timer)
+
+    def wake(self):
+        if self._thread_id is not None:
+            try:
+                self._api.PostThreadMessage(self._thread_id, WM_APP_WAKE, 0, 0)
+            except Exception as e:
+                logger.warning(f"喚醒快捷鍵執行緒失敗: {e}")
+
+
+class FakeHotkeyBackend(HotkeyBackend):
+    """
+    不安裝任何掛鉤的假後端；press(chord) 模擬按下組合鍵（捕獲模式下依序模擬按下與放開各按鍵），
+    applied 記錄每次套用的綁定
+    """
+    name = 'fake'
+
+    def __init__(self, dispatch=None):
+        super().__init__(dispatch)
+        self._table = BindingTable()
+        self.applied = []
+
+    def apply(self, table):
+        self._table = table
+        self.applied.append(dict(table.bindings))
+        return []
+
+    def press(self, chord):
+        if self.capturing:
+            keys = [normalize_key(key) for key in chord.split("+")]
+            for key in keys:
+                self.capture_key(key, True)
+            for key in reversed(keys):
+                self.capture_key(key, False)
+            return None
+        action = self._table.lookup(chord)
+        if action is not None:
+            self.dispatch(action)
+        return action
+
+
+HOTKEY_BACKENDS = {
+    'win32': Win32HotkeyBackend,
+    'keyboard': KeyboardHotkeyBackend,
+    'fake': FakeHotkeyBackend,
+}
+
+
+def create_hotkey_backend(name='auto', dispatch=None):
+    """依名稱建立快捷鍵後端。auto 在 Windows 上優先使用 RegisterHotKey，無法使用時退回 keyboard。"""
+    name = (name or 'auto').lower()
+    if name == 'auto':
+        name = 'win32' if os.name == 'nt' else 'keyboard'
+    if name not in HOTKEY_BACKENDS:
+        logger.warning(f"未知的快捷鍵後端: {name}，改用 keyboard")
+        name = 'keyboard'
+    if name == 'win32':
+        try:
+            return Win32HotkeyBackend(dispatch)
+        except HotkeyBackendError as e:
+            logger.warning(f"RegisterHotKey 後端無法使用，改用 keyboard: {e}")
+            name = 'keyboard'
+    return HOTKEY_BACKENDS[name](dispatch)
+
+
+def benchmark(keystrokes=20000, contention=True):
+    """
+    量測各後端每次按鍵在本程式中的額外負擔（微秒）：
+    - 一般按鍵：遊戲中的一般輸入（未綁定的按鍵），keyboard 後端每次都要在 Python 中處理
+    - 快捷鍵：按下已綁定的組合鍵時的分派成本
+    contention=True 時另外以背景執行緒持續解碼位元組（模擬解析 netsh 輸出）造成 GIL 競爭，
+    量測每個後端送到本程式的事件從「發生」到處理完成的延遲
+    （keyboard 為一般按鍵，win32 / fake 只會收到已綁定的組合鍵）。
+    無法量測的項目（win32 / fake 不會收到一般按鍵）為 None。
+    """
+    import threading
+    from types import SimpleNamespace
+
+    table = BindingTable({"toggle": "ctrl+shift+b", "block": "ctrl+alt+b"})
+    hits = []
+    hook = KeyboardHotkeyBackend(hits.append, keyboard_module=SimpleNamespace(hook=lambda cb: cb))
+    hook.apply(table)
+
+    def run_keyboard(events):
+        for event in events:
+            hook.on_key_event(event)
+
+    typing = []
+    for key in "wasd" * (keystrokes // 8):
+        typing.append(SimpleNamespace(name=key, event_type="down"))
+        typing.append(SimpleNamespace(name=key, event_type="up"))
+    chord = [SimpleNamespace(name=name, event_type=kind)
+             for name, kind in (("ctrl", "down"), ("shift", "down"), ("b", "down"),
+                                ("b", "up"), ("shift", "up"), ("ctrl", "up"))]
+
+    win32 = Win32HotkeyBackend.__new__(Win32HotkeyBackend)
+    HotkeyBackend.__init__(win32, hits.append)
+    win32._actions = {1: "toggle", 2: "block"}
+    fake = FakeHotkeyBackend(hits.append)
+    fake.apply(table)
+
+    def timed(func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1e6
+
+    results = {}
+    results['keyboard'] = {
+        "一般按鍵": timed(lambda: run_keyboard(typing), 1) / len(typing),
+        # 一次組合鍵包含 6 個按鍵事件（三個按下、三個放開）
+        "快捷鍵": timed(lambda: run_keyboard(chord), 2000),
+    }
+    hotkey_message = (None, WM_HOTKEY, 1, 0, 0, (0, 0))
+    results['win32'] = {
+        # 未註冊的按鍵由系統處理，不會送到本程式
+        "一般按鍵": None,
+        "快捷鍵": timed(lambda: win32.handle_message(hotkey_message), 20000),
+    }
+    results['fake'] = {
+        "一般按鍵": None,
+        "快捷鍵": timed(lambda: fake.press("ctrl+shift+b"), 20000),
+    }
+
+    if contention:
+        payload = ("規則名稱: WarframePairBlockPort\r\n已啟用: 是\r\n" * 200).encode("cp950")
+
+        def contended(handle, samples=300):
+            stop = threading.Event()
+
+            def decode_loop():
+                while not stop.is_set():
+                    for line in payload.decode("cp950").splitlines():
+                        line.split(":", 1)
+
+            worker = threading.Thread(target=decode_loop, daemon=True)
+            worker.start()
+            latencies = []
+            for i in range(samples):
+                # 事件在任意時間點到達：真實的監聽 / 掛鉤執行緒被喚醒後必須先取得 GIL，
+                # 這裡以睡眠後重新取得 GIL 模擬，延遲從預定的到達時間開始計算
+                arrival = time.perf_counter() + 0.001
+                time.sleep(0.001)
+                handle(i)
+                latencies.append((time.perf_counter() - arrival) * 1e6)
+            stop.set()
+            worker.join()
+            latencies.sort()
+            return percentile(latencies, 50), percentile(latencies, 99)
+
+        for name, handle in (
+            ('keyboard', lambda i: hook.on_key_event(typing[i * 2])),
+            ('win32', lambda i: win32.handle_message(hotkey_message)),
+            ('fake', lambda i: fake.press("ctrl+shift+b")),
+        ):
+            results[name]["GIL 競爭 p50"], results[name]["GIL 競爭 p99"] = contended(handle)
+    return results
+
+
+if __name__ == "__main__":
+    # 微基準：python -m src.utils.hotkey_backends
+    import sys
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    # Shift+1 的事件名稱為 "!"，依掃描碼對回 "shift+1"（綁定與捕獲一致）
+    from types import SimpleNamespace
+    hits = []
+    shifted = KeyboardHotkeyBackend(hits.append, keyboard_module=SimpleNamespace(hook=lambda cb: cb))
+    shifted.apply(BindingTable({"toggle": "shift+1"}))
+    events = [SimpleNamespace(name=name, scan_code=code, event_type=kind)
+              for name, code, kind in (("shift", 42, "down"), ("!", 2, "down"), ("!", 2, "up"), ("shift", 42, "up"))]
+    for event in events:
+        shifted.on_key_event(event)
+    captured = []
+    shifted.begin_capture(captured.append)
+    for event in events:
+        shifted.on_key_event(event)
+    shifted.end_capture()
+    assert hits == ["toggle"] and captured == ["shift+1"], (hits, captured)
+
+    results = benchmark()
+    columns = list(results['keyboard'])
+    print(f"{'後端':<10}" + "".join(f"{column:>16}" for column in columns) + "   (微秒 / 按鍵)")
+    for name, row in results.items():
+        print(f"{name:<10}" + "".join(
+            f"{'n/a' if row.get(column) is None else format(row[column], '.2f'):>16}" for column in columns
+        ))
+    print("win32 的一般按鍵不會送到本程式（由系統比對已註冊的組合鍵），因此為 n/a；"
+          "GIL 競爭一欄為各後端實際會收到的事件（keyboard 為一般按鍵，其他為快捷鍵）")
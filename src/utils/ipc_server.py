@@ -0,0 +1,84 @@
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer
+from loguru import logger
+
+from src.ipc import COMMANDS, decode, encode, send_command, server_address
+
+
+class IpcServer(QObject):
+    """
+    單一執行個體的本機 IPC 伺服器（於 UI 線程處理）。
+
+    收到的命令交給 handler(command, args) 處理，handler 回傳的 dict 即為回應；
+    ping 由伺服器直接回應，用來確認執行個體仍然存活。
+    """
+
+    def __init__(self, handler, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.address = server_address()
+        self._server = QLocalServer(self)
+        # 只允許同一個使用者連線
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """開始監聽，回傳是否成功（已有其他執行個體時回傳 False）"""
+        if self._server.listen(self.address):
+            logger.debug(f"IPC 伺服器已啟動: {self.address}")
+            return True
+        if send_command('ping') is not None:
+            logger.warning("已有其他執行個體正在監聽 IPC")
+            return False
+        # 上次異常結束留下的 socket 檔案
+        QLocalServer.removeServer(self.address)
+        if self._server.listen(self.address):
+            logger.debug(f"已清除殘留的 IPC 位址並重新監聽: {self.address}")
+            return True
+        logger.error(f"IPC 伺服器啟動失敗: {self._server.errorString()}")
+        return False
+
+    def close(self):
+        self._server.close()
+        logger.debug("IPC 伺服器已關閉")
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            connection = self._server.nextPendingConnection()
+            self._buffers[connection] = b''
+            connection.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.disconnected.connect(lambda c=connection: self._forget(c))
+
+    def _forget(self, connection):
+        self._buffers.pop(connection, None)
+        connection.deleteLater()
+
+    def _on_ready_read(self, connection):
+        data = self._buffers.get(connection, b'') + bytes(connection.readAll())
+        if not data.endswith(b'\n'):
+            self._buffers[connection] = data
+            return
+        self._buffers[connection] = b''
+        connection.write(encode(self._dispatch(data)))
+        connection.flush()
+        connection.disconnectFromServer()
+
+    def _dispatch(self, data):
+        try:
+            request = decode(data)
+            command = request.get("command")
+            args = request.get("args") or {}
+        except (ValueError, AttributeError) as e:
+            return {"ok": False, "message": f"無法解析的請求: {e}"}
+        if command not in COMMANDS:
+            return {"ok": False, "message": f"未知的命令: {command}"}
+        if command == 'ping':
+            return {"ok": True}
+        logger.info(f"收到 IPC 命令: {command} {args or ''}")
+        try:
+            return self.handler(command, args)
+        except Exception as e:
+            logger.error(f"處理 IPC 命令 {command} 時發生錯誤: {e}")
+            logger.exception("詳細錯誤")
+            return {"ok": False, "message": str(e)}
@@ -0,0 +1,76 @@
+from PySide6.QtCore import QObject, QThreadPool, QTimer, Signal
+from loguru import logger
+
+from src.controller.registry import RegistryWatcher
+
+
+class RuleStateMonitor(QObject):
+    """
+    低頻率的背景規則檢查器。
+
+    定期在背景呼叫 FirewallController.refresh_status()（有提供 worker 時
+    排入防火牆工作執行緒，與其他操作依序執行；否則使用 Qt 執行緒池），
+    偵測外部變更（例如在 wf.msc 中手動刪除規則），
+    狀態與快取不同時透過 status_changed 訊號通知 UI 線程。
+
+    防火牆有登錄快速路徑時另外監看登錄機碼的變更通知，外部修改會立即觸發檢查，
+    定期檢查只作為備援並放慢頻率。
+    """
+    status_changed = Signal(str)
+
+    # 內部使用：把登錄變更通知帶回 UI 線程
+    _registry_changed = Signal()
+
+    DEFAULT_INTERVAL_MS = 15000
+    # 有變更通知時，備援輪詢的間隔倍數
+    PUSH_INTERVAL_FACTOR = 4
+
+    def __init__(self, firewall, worker=None, interval_ms=DEFAULT_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.firewall = firewall
+        self.worker = worker
+        self._running = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.refresh_now)
+        self._watcher = None
+        self._registry_changed.connect(self.refresh_now)
+
+    def start(self):
+        """開始定期檢查，可用時同時監看登錄變更通知"""
+        registry = self.firewall.registry
+        if registry is not None and self._watcher is None:
+            self._watcher = RegistryWatcher(registry, self._registry_changed.emit)
+            self._watcher.start()
+            self._timer.setInterval(self._timer.interval() * self.PUSH_INTERVAL_FACTOR)
+        logger.debug(f"啟動規則狀態背景檢查 (間隔 {self._timer.interval()} ms)")
+        self._timer.start()
+
+    def stop(self):
+        """停止定期檢查"""
+        self._timer.stop()
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        logger.debug("規則狀態背景檢查已停止")
+
+    def refresh_now(self):
+        """立即在背景執行一次檢查（上一次尚未完成時略過）"""
+        if self._running:
+            return
+        self._running = True
+        if self.worker is not None:
+            self.worker.submit("refresh", self._refresh)
+        else:
+            QThreadPool.globalInstance().start(self._refresh)
+
+    def _refresh(self):
+        try:
+            changed, status = self.firewall.refresh_status()
+            if changed and status != self.firewall.STATUS_UNKNOWN:
+                logger.info(f"偵測到防火牆規則外部變更，目前狀態: {status}")
+                self.status_changed.emit(status)
+        except Exception as e:
+            logger.error(f"背景檢查規則狀態時發生錯誤: {e}")
+        finally:
+            self._running = False
@@ -0,0 +1,150 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+from loguru import logger
+
+
+class ToggleCoalescer(QObject):
+    """
+    期望狀態合併器：把短時間內的多次切換請求合併成單一最終目標。
+
+    - toggle() / request() 只更新「期望狀態」並重新計時，不會直接操作防火牆
+    - 計時結束且沒有操作進行中時，發送 dispatch(目標是否阻斷, 合併的請求數)
+    - 操作進行中收到的請求不會排隊，只保留最新的目標，
+      操作完成呼叫 mark_done() 後再決定是否需要下一次操作
+    - 請求互相抵銷（目標等於目前實際狀態）時發送 settled，不執行任何操作
+    - hold() 後到 release() 前實際狀態未知（例如啟動時仍在確認規則狀態），
+      期間的切換只記錄次數，release() 取得實際狀態後才換算成目標並執行
+    """
+    dispatch = Signal(bool, int)
+    settled = Signal(bool)
+
+    DEFAULT_WINDOW_MS = 150
+
+    def __init__(self, window_ms=DEFAULT_WINDOW_MS, parent=None):
+        super().__init__(parent)
+        self.applied = False      # 最後確認的實際狀態（是否阻斷）
+        self.desired = None       # 尚未套用的期望狀態，None 表示沒有待處理請求
+        self.in_flight = False
+        self._in_flight_target = False
+        self._count = 0
+        self.holding = False
+        self._held_base = None    # 暫停期間指定的絕對目標，None 表示以實際狀態為準
+        self._held_flips = 0      # 暫停期間（在 _held_base 之後）的切換次數
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(window_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def is_busy(self):
+        """是否有待處理或進行中的請求（暫停期間一律視為忙碌）"""
+        return self.holding or self.in_flight or self.desired is not None
+
+    def target(self):
+        """
+        目前的目標狀態（待處理請求 > 進行中操作 > 實際狀態）；
+        暫停期間無法得知時回傳 None
+        """
+        if self.holding:
+            if self._held_base is None:
+                return None
+            return self._held_base != bool(self._held_flips % 2)
+        if self.desired is not None:
+            return self.desired
+        if self.in_flight:
+            return self._in_flight_target
+        return self.applied
+
+    def reset(self, blocked):
+        """同步實際狀態（初始化或偵測到外部變更時使用）"""
+        self.applied = blocked
+        if not self.is_busy():
+            self._count = 0
+
+    def toggle(self):
+        """翻轉期望狀態，回傳新的目標（暫停期間且無法得知時回傳 None）"""
+        if self.holding:
+            self._held_flips += 1
+            self._count += 1
+            return self.target()
+        return self.request(not self.target())
+
+    def request(self, blocked):
+        """指定期望狀態，回傳新的目標"""
+        if self.holding:
+            self._held_base = blocked
+            self._held_flips = 0
+            self._count += 1
+            return blocked
+        self.desired = blocked
+        self._count += 1
+        self._timer.start()
+        return blocked
+
+    def hold(self):
+        """暫停執行：實際狀態確認前收到的請求先排入，不會發送 dispatch"""
+        self.holding = True
+        self._held_base = None
+        self._held_flips = 0
+        self._count = 0
+
+    def release(self, blocked):
+        """
+        取得實際狀態後恢復執行，並以實際狀態換算暫停期間排入的請求。
+        有需要執行的操作時立即發送 dispatch（互相抵銷時發送 settled），
+        回傳是否有排入的請求。
+        """
+        count = self._count
+        base = blocked if self._held_base is None else self._held_base
+        self.holding = False
+        self.applied = blocked
+        self._held_base = None
+        if not count:
+            return False
+        logger.info(f"實際狀態確認前排入了 {count} 次切換請求，開始處理")
+        self.desired = base != bool(self._held_flips % 2)
+        self._held_flips = 0
+        self._timer.stop()
+        self._flush()
+        return True
+
+    def _flush(self):
+        if self.holding or self.in_flight or self.desired is None:
+            return
+        target, count = self.desired, self._count
+        self.desired = None
+        self._count = 0
+        if target == self.applied:
+            if count > 1:
+                logger.info(f"{count} 次切換請求互相抵銷，不需要操作防火牆")
+            self.settled.emit(target)
+            return
+        if count > 1:
+            logger.info(f"合併 {count} 次切換請求為單一操作: {'阻斷' if target else '解除阻斷'}")
+        self.in_flight = True
+        self._in_flight_target = target
+        self.dispatch.emit(target, count)
+
+    def mark_done(self, blocked):
+        """
+        操作結束（成功或失敗）後回報實際狀態。
+        回傳 True 表示仍有後續請求待處理，呼叫端不應顯示最終狀態。
+        """
+        self.in_flight = False
+        self.applied = blocked
+        if self.desired is None or self._timer.isActive():
+            return self.is_busy()
+        if self.desired == blocked:
+            # 進行中時收到的請求最後回到同一個狀態，不需要再操作
+            self.desired = None
+            self._count = 0
+            return False
+        self._flush()
+        return True
+
+    def cancel(self):
+        """捨棄待處理的請求（結束程式時使用）"""
+        self._timer.stop()
+        self.holding = False
+        self._held_base = None
+        self._held_flips = 0
+        self.desired = None
+        self._count = 0
@@ -0,0 +1,72 @@
+"""防火牆後端：以假的 COM 物件測試 ComBackend"""
+
+import shutil
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.controller.backends import ComBackend, FakeBackend, create_backend
+from src.controller.errors import RuleDeletionError
+
+
+class ComError(Exception):
+    pass
+
+
+class FakeRules:
+    """模擬 INetFwRules：Item 找不到時拋出 com_error，Remove 一次移除一條同名規則"""
+
+    def __init__(self, names, removable=True):
+        self.rules = [SimpleNamespace(Name=name) for name in names]
+        self.removable = removable
+        self.removes = 0
+
+    def __iter__(self):
+        return iter(list(self.rules))
+
+    def Item(self, name):
+        for rule in self.rules:
+            if rule.Name == name:
+                return rule
+        raise ComError(name)
+
+    def Remove(self, name):
+        self.removes += 1
+        if not self.removable:
+            return
+        for rule in self.rules:
+            if rule.Name == name:
+                self.rules.remove(rule)
+                return
+
+
+def com_backend(rules):
+    backend = ComBackend.__new__(ComBackend)
+    backend._pythoncom = SimpleNamespace(com_error=ComError)
+    backend._local = threading.local()
+    backend._local.policy = SimpleNamespace(Rules=rules)
+    return backend
+
+
+def test_delete_removes_duplicates():
+    rules = FakeRules(['WarframePairBlockPort', 'Other', 'WarframePairBlockPort'])
+    com_backend(rules).delete_rule('WarframePairBlockPort')
+    assert [rule.Name for rule in rules] == ['Other']
+    assert rules.removes == 2
+
+
+def test_delete_stops_when_remove_has_no_effect():
+    rules = FakeRules(['WarframePairBlockPort', 'WarframePairBlockPort'], removable=False)
+    with pytest.raises(RuleDeletionError):
+        com_backend(rules).delete_rule('WarframePairBlockPort')
+    assert rules.removes == 2
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="auto 只在 Linux 上使用 nftables")
+def test_auto_without_nft_uses_fake_backend(monkeypatch):
+    monkeypatch.setattr(shutil, 'which', lambda name: None)
+    backend = create_backend('auto')
+    assert isinstance(backend, FakeBackend)
+    backend.close()
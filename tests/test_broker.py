@@ -0,0 +1,74 @@
+"""特權代理程式：常駐與重新開啟的 UI 沿用同一個代理程式"""
+
+import os
+
+import pytest
+
+from src.controller import FirewallError
+from src.controller.broker import SESSION_FILE, BrokerBackend, LocalBroker, launch_unprivileged, read_session
+
+
+@pytest.fixture
+def broker():
+    broker = LocalBroker()
+    yield broker
+    broker.stop()
+
+
+def test_client_reuses_resident_broker(broker):
+    first = broker.client()
+    first.add_rule('WarframePairBlockPort', '4950-4955', True)
+    first.close()
+    assert read_session(broker.session_path) is not None
+
+    # 重新開啟的 UI 不啟動代理程式，start() 就連上常駐的代理程式
+    second = broker.client(launch=False)
+    second.start()
+    assert second.is_ready()
+    assert second.get_rule('WarframePairBlockPort') == {'ports': '4950-4955', 'enabled': True, 'count': 1}
+    second.close()
+
+
+def test_stale_session_is_removed(broker):
+    first = broker.client()
+    first.request('ping')
+    first.shutdown_broker()
+    assert not os.path.exists(broker.session_path)
+
+    with pytest.raises(FirewallError):
+        broker.client(launch=False).get_rule('WarframePairBlockPort')
+
+
+def test_broker_process_stays_resident(tmp_path):
+    session_path = str(tmp_path / SESSION_FILE)
+    remote = BrokerBackend('fake', launcher=launch_unprivileged, session_path=session_path)
+    remote.add_rule('WarframePairBlockPort', '3074', True)
+    remote.close()
+
+    reopened = BrokerBackend('fake', launcher=None, session_path=session_path)
+    try:
+        assert reopened.get_rule('WarframePairBlockPort')['ports'] == '3074'
+    finally:
+        reopened.shutdown_broker()
+    assert not os.path.exists(session_path)
+
+
+def test_background_refresh_does_not_launch_broker(broker):
+    from src.controller import FirewallController
+
+    launches = []
+
+    def launcher(argv, authkey):
+        launches.append(argv)
+        return broker.launch(argv, authkey)
+
+    firewall = FirewallController(BrokerBackend('fake', launcher=launcher, session_path=broker.session_path),
+                                  registry='none')
+    assert firewall.refresh_status() == (False, firewall.STATUS_UNKNOWN)
+    assert launches == []
+
+    # 使用者的操作啟動代理程式之後，背景檢查才經由它查詢
+    firewall.get_rule_status()
+    assert len(launches) == 1
+    assert firewall.refresh_status() == (False, firewall.STATUS_NORMAL)
+    firewall.close()
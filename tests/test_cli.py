@@ -0,0 +1,52 @@
+"""命令列模式（main.py --block / --unblock / --status），以 fake 後端在子行程中執行"""
+
+import configparser
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def run_cli(tmp_path):
+    """以獨立的設定目錄執行 main.py，回傳 CompletedProcess"""
+    config_dir = tmp_path / "WarframePairBlockTool"
+    config_dir.mkdir()
+
+    def run(*args, **settings):
+        config = configparser.ConfigParser()
+        config["Settings"] = dict({"firewall_backend": "fake"}, **settings)
+        with open(config_dir / "WarframePairBlockTool.ini", "w", encoding="utf-8") as f:
+            config.write(f)
+        env = dict(os.environ, APPDATA=str(tmp_path), HOME=str(tmp_path))
+        return subprocess.run(
+            [sys.executable, os.path.join(ROOT, "main.py"), *args],
+            cwd=ROOT, env=env, capture_output=True, text=True, encoding="utf-8", timeout=60
+        )
+
+    return run
+
+
+def test_block_without_duration_uses_settings(run_cli):
+    # 沒有 --for 時依設定檔的自動恢復設定（型別化的 Settings）決定是否自動解除
+    result = run_cli("--block", "--ports", "4950-4955", "--json", auto_recover="false")
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["ok"] and report["status"] == "blocked" and report["ports"] == "4950-4955"
+
+
+def test_block_auto_recover_from_settings(run_cli):
+    result = run_cli("--block", "--ports", "4950-4955", "--json", auto_recover="true", recover_time="1")
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.splitlines()[-1])
+    assert report["ok"] and report["status"] == "normal" and report["duration"] == 1
+
+
+def test_status(run_cli):
+    result = run_cli("--status", "--json")
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)["status"] == "normal"
@@ -0,0 +1,110 @@
+"""快捷鍵管理器：以只記錄掛鉤的 keyboard 替身執行（不安裝系統掛鉤、不需要顯示器）"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from PySide6.QtCore import Qt
+
+from src.bindings import BindingTable
+from src.utils.hotkey import HotkeyManager
+from src.utils.hotkey_backends import KeyboardHotkeyBackend
+
+
+class RecordingKeyboard:
+    """只記錄掛鉤的 keyboard 替身；press() 模擬按鍵事件"""
+
+    def __init__(self):
+        self.hooks = []
+
+    def hook(self, callback):
+        self.hooks.append(callback)
+        return callback
+
+    def unhook(self, callback):
+        self.hooks.remove(callback)
+
+    def press(self, chord):
+        keys = chord.split("+")
+        for key in keys:
+            for hook in list(self.hooks):
+                hook(SimpleNamespace(name=key, event_type="down"))
+        for key in reversed(keys):
+            for hook in list(self.hooks):
+                hook(SimpleNamespace(name=key, event_type="up"))
+
+
+BINDINGS = BindingTable({
+    "toggle": "ctrl+shift+b",
+    "block": "ctrl+alt+b",
+    "show_window": "ctrl+shift+w",
+})
+
+
+@pytest.fixture
+def keyboard():
+    return RecordingKeyboard()
+
+
+@pytest.fixture
+def manager(keyboard):
+    baseline = threading.active_count()
+    manager = HotkeyManager(backend=KeyboardHotkeyBackend(keyboard_module=keyboard))
+    manager.baseline = baseline
+    manager.triggered = []
+    manager.action_triggered.connect(lambda action, trace: manager.triggered.append(action))
+    yield manager
+    assert manager.shutdown(), "掛鉤執行緒應在時限內結束"
+    assert threading.active_count() == baseline
+    assert not keyboard.hooks
+
+
+def test_rebinding_keeps_one_hook_thread(manager, keyboard):
+    for i in range(500):
+        manager.set_bindings(BindingTable({"toggle": f"ctrl+f{i % 12 + 1}"}))
+        if i % 3 == 0:
+            manager.clear_bindings()
+    manager.set_bindings(BINDINGS)
+    manager._queue.join()  # 等待掛鉤執行緒處理完所有訊息
+    assert threading.active_count() == manager.baseline + 1, "重新設定不應產生額外的執行緒"
+    assert len(keyboard.hooks) == 1, "所有綁定應共用單一掛鉤"
+
+    keyboard.press("left ctrl+shift+b")
+    keyboard.press("ctrl+alt+b")
+    keyboard.press("ctrl+b")
+    keyboard.press("ctrl+shift+w")
+    assert manager.triggered == ["toggle", "block", "show_window"]
+
+
+def test_capture_reuses_hook_thread(manager, keyboard):
+    manager.set_bindings(BINDINGS)
+    captured = []
+    # 沒有事件迴圈，從掛鉤執行緒直接呼叫
+    manager.capture_finished.connect(
+        lambda session, chord, result: captured.append((session, chord, result)), Qt.DirectConnection
+    )
+    manager.clear_bindings()
+    first = manager.start_capture()
+    manager._queue.join()
+    assert len(keyboard.hooks) == 1
+    assert threading.active_count() == manager.baseline + 1
+    keyboard.press("ctrl+shift+w")
+    manager._queue.join()
+    manager.start_capture()
+    manager._queue.join()
+    keyboard.press("esc")
+    manager._queue.join()
+    manager.start_capture(timeout=0.05)
+    time.sleep(0.2)
+    manager.start_capture()
+    manager.cancel_capture()
+    manager._queue.join()
+    assert captured == [
+        (first, "ctrl+shift+w", HotkeyManager.CAPTURED),
+        (first + 1, "", HotkeyManager.CAPTURE_CANCELLED),
+        (first + 2, "", HotkeyManager.CAPTURE_TIMEOUT_EXPIRED),
+        (first + 3, "", HotkeyManager.CAPTURE_CANCELLED),
+    ]
+    assert manager.triggered == [], "捕獲期間不應分派動作"
+    assert not keyboard.hooks, "沒有綁定時捕獲結束應移除掛鉤"
@@ -0,0 +1,102 @@
+"""長駐命令 session：中斷、重啟與超時"""
+
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from src.controller.backends import NetshBackend
+from src.controller.errors import RuleCreationError
+from src.controller.session import CommandSession, SessionInterruptedError, SessionTimeoutError
+
+# 假的直譯器：每行為「命令 ;; 標記」，執行過的命令記錄在 log 檔
+FAKE_SHELL = textwrap.dedent('''
+    import sys
+    import time
+    log = open(sys.argv[1], "a")
+    for line in sys.stdin:
+        command, _, marker = line.rstrip("\\n").partition(" ;; ")
+        log.write(command + "\\n")
+        log.flush()
+        if command == "crash" or " add rule " in command:
+            sys.exit(3)
+        if command == "hang":
+            time.sleep(60)
+        print(command)
+        print(f"{marker} 0", flush=True)
+''')
+
+
+@pytest.fixture
+def session(tmp_path):
+    script = tmp_path / "fake_shell.py"
+    script.write_text(FAKE_SHELL, encoding="utf-8")
+    log = tmp_path / "commands.log"
+    session = CommandSession([sys.executable, "-u", str(script), str(log)], "{command} ;; {marker}", timeout=10)
+    session.executed = lambda: log.read_text(encoding="utf-8").splitlines()
+    yield session
+    session.close()
+
+
+def test_restarts_when_command_was_not_sent(session):
+    assert session.execute("first") == (0, "first")
+    session._process.kill()
+    session._process.wait()
+    assert session.execute("second") == (0, "second")
+    assert session.restart_count == 1
+    assert session.executed() == ["first", "second"]
+
+
+def test_interrupted_command_is_not_resent(session):
+    with pytest.raises(SessionInterruptedError):
+        session.execute("crash")
+    # 命令已送達直譯器，不可以自動重送（例如建立規則會重複）
+    assert session.executed() == ["crash"]
+    assert session.execute("next") == (0, "next")
+    assert session.executed() == ["crash", "next"]
+
+
+def test_netsh_add_rule_runs_once_when_interrupted(session):
+    backend = NetshBackend(session)
+    with pytest.raises(RuleCreationError):
+        backend.add_rule('WarframePairBlockPort', '4950-4955')
+    # 不在 session 中重送，也不退回單次執行
+    assert len(session.executed()) == 1
+
+
+def test_timeout_restarts_session(session):
+    with pytest.raises(SessionTimeoutError):
+        session.execute("hang", timeout=0.5)
+    assert not session.is_alive()
+    assert session.execute("next") == (0, "next")
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="以 sh 的子行程與 /proc 檢查行程樹")
+def test_timeout_kills_process_tree(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    session = CommandSession(CommandSession.SH_ARGV, CommandSession.SH_FRAME)
+    try:
+        # 直譯器底下的子行程卡住（如 PowerShell 底下的 netsh）
+        start = time.monotonic()
+        with pytest.raises(SessionTimeoutError):
+            session.execute(f"sleep 60 & echo $! > {pid_file}; wait", timeout=0.5)
+        assert time.monotonic() - start < 5
+        child = int(pid_file.read_text())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and _alive(child):
+            time.sleep(0.05)
+        assert not _alive(child), "超時後應結束整個行程樹"
+        assert session.execute("echo ok") == (0, "ok")
+    finally:
+        session.close()
+
+
+def _alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # 已結束但尚未被回收（zombie）視為已結束
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False